@@ -0,0 +1,330 @@
+"""
+Record/replay stand-in for the arXiv API and PDF host.
+
+A fixture bundle is a directory with `index.json` (request -> status,
+content type and body file), content-addressed bodies under `bodies/` and,
+optionally, `fetch.json` describing the fetch it was recorded for.
+
+  record      proxy /api/query to export.arxiv.org and /pdf/ to arxiv.org,
+              saving every successful response into the bundle
+  serve       replay a bundle offline; requests it does not hold get a 404
+  synthesize  write a bundle of generated feeds and PDFs for a date range
+
+PDF links in served Atom feeds are rewritten to this server, so the
+extraction queue downloads from it too. Each response waits --latency
+seconds before its headers and then streams at --bandwidth bytes/s. Point
+the app at it with
+
+    ARXIV_API_URL=http://127.0.0.1:8002/api/query ARXIV_REQUEST_DELAY=0
+
+(keep the default delay while recording from the live API).
+
+Run from the backend directory:
+    python -m benchmarks.arxiv_replay record fixtures/arxiv --port 8002
+    python -m benchmarks.arxiv_replay serve fixtures/arxiv --latency 0.3 --bandwidth 2000000
+    python -m benchmarks.arxiv_replay synthesize /tmp/arxiv_bundle --papers 1000
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import AsyncIterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+from xml.sax.saxutils import escape
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import Response, StreamingResponse
+
+CHUNK_SIZE = 64 * 1024
+UPSTREAMS = {
+    "/api/query": "https://export.arxiv.org",
+    "/pdf/": "https://arxiv.org",
+}
+ATOM_CONTENT_TYPE = "application/atom+xml; charset=utf-8"
+PDF_CONTENT_TYPE = "application/pdf"
+SYNTHETIC_CATEGORIES = ["cs.AI", "cs.LG", "cs.CL", "cs.CV", "stat.ML", "q-bio.QM"]
+SYNTHETIC_PDF_PAGES = (2, 4, 8, 12)
+
+
+# ---------------------------------------------------------------------------
+# Bundle
+# ---------------------------------------------------------------------------
+
+class Bundle:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        (self.root / "bodies").mkdir(parents=True, exist_ok=True)
+        index = self.root / "index.json"
+        self.index = json.loads(index.read_text()) if index.exists() else {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(path: str, query: str = "") -> str:
+        """Request key, independent of query parameter order."""
+        params = sorted(parse_qsl(query, keep_blank_values=True))
+        return f"{path}?{urlencode(params)}" if params else path
+
+    def get(self, key: str) -> Optional[Tuple[dict, bytes]]:
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        return entry, (self.root / "bodies" / entry["body"]).read_bytes()
+
+    def put(self, key: str, content_type: str, body: bytes, status: int = 200) -> None:
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.root / "bodies" / digest
+        if not path.exists():
+            path.write_bytes(body)
+        with self._lock:
+            self.index[key] = {"status": status, "content_type": content_type, "body": digest}
+
+    def save(self) -> None:
+        with self._lock:
+            tmp = self.root / "index.json.tmp"
+            tmp.write_text(json.dumps(self.index, indent=1, sort_keys=True))
+            tmp.replace(self.root / "index.json")
+
+    def fetch(self) -> Optional[dict]:
+        """The fetch the bundle was recorded for: start_date, end_date, categories, max_results."""
+        path = self.root / "fetch.json"
+        return json.loads(path.read_text()) if path.exists() else None
+
+    def save_fetch(self, fetch: dict) -> None:
+        (self.root / "fetch.json").write_text(json.dumps(fetch, indent=1))
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+def _upstream_url(path: str, query: str) -> Optional[str]:
+    for prefix, host in UPSTREAMS.items():
+        if path.startswith(prefix):
+            return f"{host}{path}?{query}" if query else f"{host}{path}"
+    return None
+
+
+def _rewrite_pdf_links(body: bytes, base_url: str) -> bytes:
+    base = base_url.encode()
+    return body.replace(b"http://arxiv.org/pdf/", base + b"/pdf/").replace(
+        b"https://arxiv.org/pdf/", base + b"/pdf/"
+    )
+
+
+def create_app(bundle: Bundle, record: bool = False, latency: float = 0.0, bandwidth: float = 0.0) -> FastAPI:
+    app = FastAPI(title="arXiv replay")
+    stats = {"hits": 0, "misses": 0, "recorded": 0, "bytes": 0}
+    upstream = httpx.AsyncClient(
+        headers={"User-Agent": "arxiv-newsletter-recorder"}, timeout=60, follow_redirects=True
+    ) if record else None
+
+    async def throttled(body: bytes) -> AsyncIterator[bytes]:
+        for i in range(0, len(body), CHUNK_SIZE):
+            chunk = body[i:i + CHUNK_SIZE]
+            if bandwidth:
+                await asyncio.sleep(len(chunk) / bandwidth)
+            yield chunk
+
+    @app.get("/stats")
+    def read_stats():
+        return stats
+
+    @app.get("/{path:path}")
+    async def replay(request: Request):
+        path, query = request.url.path, request.url.query
+        key = Bundle.key(path, query)
+        found = bundle.get(key)
+        if found is not None:
+            stats["hits"] += 1
+        elif upstream is not None and (url := _upstream_url(path, query)):
+            response = await upstream.get(url)
+            if response.status_code != 200:
+                return Response(response.content, status_code=response.status_code)
+            content_type = response.headers.get("Content-Type", PDF_CONTENT_TYPE)
+            bundle.put(key, content_type, response.content)
+            bundle.save()
+            stats["recorded"] += 1
+            found = bundle.get(key)
+        if found is None:
+            stats["misses"] += 1
+            return Response(f"Not in bundle: {key}", status_code=404, media_type="text/plain")
+
+        entry, body = found
+        if "atom" in entry["content_type"]:
+            body = _rewrite_pdf_links(body, f"{request.url.scheme}://{request.url.netloc}")
+        stats["bytes"] += len(body)
+        if latency:
+            await asyncio.sleep(latency)
+        return StreamingResponse(
+            throttled(body),
+            status_code=entry["status"],
+            media_type=entry["content_type"],
+            headers={"Content-Length": str(len(body))},
+        )
+
+    return app
+
+
+# ---------------------------------------------------------------------------
+# Synthetic bundles
+# ---------------------------------------------------------------------------
+
+def _atom_feed(entries: List[dict], total: int, start: int) -> bytes:
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom" '
+        'xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/" '
+        'xmlns:arxiv="http://arxiv.org/schemas/atom">\n'
+        '  <id>http://arxiv.org/api/synthetic</id>\n'
+        '  <title type="html">ArXiv Query: synthetic</title>\n'
+        f'  <updated>{datetime.utcnow():%Y-%m-%dT%H:%M:%SZ}</updated>\n'
+        f'  <opensearch:totalResults>{total}</opensearch:totalResults>\n'
+        f'  <opensearch:startIndex>{start}</opensearch:startIndex>\n'
+        f'  <opensearch:itemsPerPage>{len(entries)}</opensearch:itemsPerPage>\n'
+    ]
+    for e in entries:
+        stamp = f"{e['published']:%Y-%m-%dT%H:%M:%SZ}"
+        authors = "".join(f"    <author><name>{escape(a)}</name></author>\n" for a in e["authors"])
+        categories = "".join(
+            f'    <category term="{c}" scheme="http://arxiv.org/schemas/atom"/>\n' for c in e["categories"]
+        )
+        parts.append(
+            "  <entry>\n"
+            f"    <id>http://arxiv.org/abs/{e['id']}</id>\n"
+            f"    <updated>{stamp}</updated>\n"
+            f"    <published>{stamp}</published>\n"
+            f"    <title>{escape(e['title'])}</title>\n"
+            f"    <summary>{escape(e['abstract'])}</summary>\n"
+            f"{authors}"
+            f'    <link href="http://arxiv.org/abs/{e["id"]}" rel="alternate" type="text/html"/>\n'
+            f'    <link title="pdf" href="http://arxiv.org/pdf/{e["id"]}" rel="related" type="application/pdf"/>\n'
+            f'    <arxiv:primary_category term="{e["categories"][0]}" scheme="http://arxiv.org/schemas/atom"/>\n'
+            f"{categories}"
+            "  </entry>\n"
+        )
+    parts.append("</feed>\n")
+    return "".join(parts).encode()
+
+
+def synthesize(
+    root: Path,
+    start_date: datetime,
+    end_date: datetime,
+    categories: List[str],
+    n_papers: int,
+    max_results: int = 200,
+    seed: int = 42,
+) -> Bundle:
+    """
+    Write a bundle holding every page `fetch_papers_for_range` requests for
+    each category over the date range, and a PDF for every paper. Papers
+    are cross-listed in a second category 30% of the time, as on arXiv.
+    """
+    # App modules read the settings on import; keep them out of `serve`
+    import arxiv
+    from benchmarks.bench_pdf_extraction import make_fixture
+    from benchmarks.synthetic import _sentence, author_names
+    from services.arxiv_service import range_query
+
+    rng = random.Random(seed)
+    bundle = Bundle(root)
+    pool = author_names(max(n_papers, 50), rng)
+    span = (end_date - start_date + timedelta(days=1)).total_seconds()
+    papers = []
+    for i in range(n_papers):
+        published = start_date + timedelta(seconds=rng.uniform(0, span - 1))
+        cats = [rng.choice(categories)]
+        if len(categories) > 1 and rng.random() < 0.3:
+            cats.append(rng.choice([c for c in categories if c != cats[0]]))
+        papers.append({
+            "id": f"{published:%y%m}.{i:05d}v1",
+            "published": published,
+            "title": _sentence(rng, rng.randint(6, 12)).rstrip("."),
+            "abstract": " ".join(_sentence(rng, rng.randint(12, 24)) for _ in range(5)),
+            "authors": rng.sample(pool, rng.randint(1, 6)),
+            "categories": cats,
+        })
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdfs = [
+            make_fixture(Path(tmp) / f"{pages}.pdf", pages).read_bytes()
+            for pages in SYNTHETIC_PDF_PAGES
+        ]
+    for paper in papers:
+        bundle.put(f"/pdf/{paper['id']}", PDF_CONTENT_TYPE, rng.choice(pdfs))
+
+    client = arxiv.Client()
+    client.query_url_format = "/api/query?{}"
+    for category in categories:
+        matching = sorted(
+            (p for p in papers if category in p["categories"]),
+            key=lambda p: p["published"], reverse=True,
+        )
+        search = arxiv.Search(
+            query=range_query(category, start_date, end_date),
+            max_results=max_results,
+            sort_by=arxiv.SortCriterion.SubmittedDate,
+            sort_order=arxiv.SortOrder.Descending,
+        )
+        for offset in range(0, max(min(len(matching), max_results), 1), client.page_size):
+            path, _, query = client._format_url(search, offset, client.page_size).partition("?")
+            page = matching[offset:offset + client.page_size]
+            bundle.put(Bundle.key(path, query), ATOM_CONTENT_TYPE, _atom_feed(page, len(matching), offset))
+
+    bundle.save()
+    bundle.save_fetch({
+        "start_date": f"{start_date:%Y-%m-%d}",
+        "end_date": f"{end_date:%Y-%m-%d}",
+        "categories": categories,
+        "max_results": max_results,
+    })
+    return bundle
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Record or replay the arXiv API and PDF host.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("record", "serve"):
+        sub = commands.add_parser(name)
+        sub.add_argument("bundle", type=Path)
+        sub.add_argument("--host", default="127.0.0.1")
+        sub.add_argument("--port", type=int, default=8002)
+        sub.add_argument("--latency", type=float, default=0.0, help="seconds before each response")
+        sub.add_argument("--bandwidth", type=float, default=0.0, help="bytes/s per response; 0 is unlimited")
+    sub = commands.add_parser("synthesize")
+    sub.add_argument("bundle", type=Path)
+    sub.add_argument("--start", default="2024-06-03")
+    sub.add_argument("--end", default="2024-06-07")
+    sub.add_argument("--categories", nargs="+", default=SYNTHETIC_CATEGORIES)
+    sub.add_argument("--papers", type=int, default=1000)
+    sub.add_argument("--max-results", type=int, default=200)
+    sub.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    if args.command == "synthesize":
+        bundle = synthesize(
+            args.bundle,
+            datetime.strptime(args.start, "%Y-%m-%d"),
+            datetime.strptime(args.end, "%Y-%m-%d"),
+            args.categories,
+            args.papers,
+            max_results=args.max_results,
+            seed=args.seed,
+        )
+        print(f"Wrote {len(bundle.index)} responses to {args.bundle}")
+        return
+
+    app = create_app(Bundle(args.bundle), record=args.command == "record",
+                     latency=args.latency, bandwidth=args.bandwidth)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Latency benchmark for author typeahead (`GET /api/authors/suggest`).
+
+Times `suggest_authors` for the query shapes a user types while
+completing a name: a short prefix, a longer prefix, a surname fragment
+and a full name. Exits non-zero if any p95 is over budget.
+
+Run from the backend directory:
+    python -m benchmarks.bench_author_suggest                    # 500k papers
+    python -m benchmarks.bench_author_suggest --db /tmp/synthetic.db --reuse
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+from pathlib import Path
+from typing import List
+
+from sqlalchemy import text
+
+from benchmarks.bench_filter_queries import _time
+from benchmarks.synthetic import build_synthetic_db, session_factory
+from services.author_index import suggest_authors
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Author typeahead latency benchmark.")
+    parser.add_argument("--papers", type=int, default=500_000)
+    parser.add_argument("--db", type=Path, default=Path(tempfile.gettempdir()) / "bench_filters.db")
+    parser.add_argument("--reuse", action="store_true", help="Reuse an existing --db file")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--budget-ms", type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    if not (args.reuse and args.db.exists()):
+        print(f"Building synthetic database with {args.papers} papers at {args.db} ...")
+        build_synthetic_db(args.db, args.papers)
+
+    SessionLocal = session_factory(args.db)
+    db = SessionLocal()
+    failed = False
+    try:
+        name = db.execute(text(
+            "SELECT name FROM authors WHERE id = (SELECT MAX(author_id) FROM paper_author)"
+        )).scalar()
+        surname = name.split()[-1]
+        queries = {
+            "prefix (2 chars)": name[:2],
+            "prefix (5 chars)": name[:5],
+            "surname fragment": surname[1:6],
+            "full name": name,
+            "no match": "zzqx",
+        }
+        print(f"{'query':<24}{'p50 ms':>10}{'p95 ms':>10}{'hits':>6}")
+        for label, q in queries.items():
+            hits = suggest_authors(db, q)
+            samples = _time(lambda: suggest_authors(db, q), args.repeat)
+            p50 = statistics.median(samples)
+            p95 = statistics.quantiles(samples, n=20)[-1]
+            over = p95 > args.budget_ms
+            failed |= over
+            print(f"{label:<24}{p50:>10.2f}{p95:>10.2f}{len(hits):>6}{'  OVER BUDGET' if over else ''}")
+    finally:
+        db.close()
+
+    print(f"\nBudget: p95 <= {args.budget_ms:.0f} ms -> {'FAIL' if failed else 'OK'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Latency benchmark for filtered paper listings (`GET /api/papers`).
+
+Builds (or reuses) a synthetic database and times `query_papers` for
+category- and author-filtered listings, comparing the p50/p95 against a
+latency budget. Exits non-zero if any scenario's p95 is over budget.
+
+Run from the backend directory:
+    python -m benchmarks.bench_filter_queries                    # 500k papers
+    python -m benchmarks.bench_filter_queries --papers 50000 --budget-ms 20
+    python -m benchmarks.bench_filter_queries --db /tmp/synthetic.db --reuse
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from sqlalchemy import text
+
+from benchmarks.synthetic import build_synthetic_db, session_factory
+from routers.papers import query_papers
+
+LISTING_DEFAULTS = dict(
+    skip=0, limit=20, search=None, category=None, author=None,
+    days=None, date=None, start_date=None, end_date=None,
+)
+
+
+def _time(fn: Callable[[], object], repeat: int) -> List[float]:
+    fn()  # warm the page cache and statement cache
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _scenarios(db) -> Dict[str, dict]:
+    """Pick filter values that cover common, rare and prolific cases."""
+    rows = db.execute(text(
+        "SELECT c.name, COUNT(*) AS n FROM paper_category pc "
+        "JOIN categories c ON c.id = pc.category_id GROUP BY c.id ORDER BY n DESC"
+    )).fetchall()
+    common_cat, rare_cat = rows[0][0], rows[-1][0]
+    prolific = db.execute(text(
+        "SELECT a.name FROM paper_author pa JOIN authors a ON a.id = pa.author_id "
+        "GROUP BY pa.author_id ORDER BY COUNT(*) DESC LIMIT 1"
+    )).scalar()
+    single = db.execute(text(
+        "SELECT a.name FROM authors a WHERE a.id = (SELECT MAX(author_id) FROM paper_author)"
+    )).scalar()
+    return {
+        f"category={common_cat} (common)": dict(category=common_cat),
+        f"category={rare_cat} (rare)": dict(category=rare_cat),
+        "author (prolific, exact)": dict(author=prolific),
+        "author (single paper, exact)": dict(author=single),
+        "author (substring)": dict(author=single.split()[-1][:6]),
+        "category + author": dict(category=common_cat, author=prolific),
+        "category + date range": dict(
+            category=rare_cat, start_date="2024-06-01", end_date="2024-06-30"
+        ),
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Filtered listing latency benchmark.")
+    parser.add_argument("--papers", type=int, default=500_000)
+    parser.add_argument("--db", type=Path, default=Path(tempfile.gettempdir()) / "bench_filters.db")
+    parser.add_argument("--reuse", action="store_true", help="Reuse an existing --db file")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    args = parser.parse_args(argv)
+
+    if not (args.reuse and args.db.exists()):
+        print(f"Building synthetic database with {args.papers} papers at {args.db} ...")
+        build_synthetic_db(args.db, args.papers)
+
+    SessionLocal = session_factory(args.db)
+    db = SessionLocal()
+    failed = False
+    try:
+        print(f"{'scenario':<36}{'p50 ms':>10}{'p95 ms':>10}{'rows':>6}")
+        for name, filters in _scenarios(db).items():
+            params = {**LISTING_DEFAULTS, **filters}
+            rows = query_papers(db, **params)
+            samples = _time(lambda: query_papers(db, **params), args.repeat)
+            p50 = statistics.median(samples)
+            p95 = statistics.quantiles(samples, n=20)[-1]
+            over = p95 > args.budget_ms and not name.endswith("*")
+            failed |= over
+            print(f"{name:<36}{p50:>10.2f}{p95:>10.2f}{len(rows):>6}{'  OVER BUDGET' if over else ''}")
+    finally:
+        db.close()
+
+    print(f"\nBudget: p95 <= {args.budget_ms:.0f} ms (* = not budgeted) -> {'FAIL' if failed else 'OK'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+"""
+Microbenchmarks for the backend's hot paths, with stored baselines.
+
+Times each hot path on synthetic corpora of increasing size and prints a
+scaling table: the best of --repeat timings per size, and the growth
+exponent between the smallest and largest size (about 0 for constant time,
+1 for linear). Per corpus size, over all of its papers:
+
+  format_paper_for_prompt, count_tokens (of the formatted prompts),
+  batch_papers_by_budget, cluster_papers_by_category
+
+and per corpus size, once each:
+
+  get_papers (search / category / author / date range), a page of `query_papers`
+  _store_paper, storing 50 new papers into a copy of the corpus
+
+`extract_text_from_pdf_bytes` on a 20-page PDF does not depend on the
+corpus and is timed once.
+
+--save-baseline writes the results to --baseline. Later runs compare
+against it and exit non-zero if any hot path is slower than its baseline
+by more than --tolerance (and by at least --min-ms, to ignore noise on
+sub-millisecond timings). Baselines are only comparable on the machine
+that recorded them, and the gate needs an otherwise idle one.
+
+Run from the backend directory:
+    python -m benchmarks.bench_hot_paths --save-baseline               # 1k, 10k, 100k papers
+    python -m benchmarks.bench_hot_paths                               # compare with the baseline
+    python -m benchmarks.bench_hot_paths --sizes 1000 5000 --repeat 3 --tolerance 0.5
+"""
+import argparse
+import json
+import math
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+from benchmarks.bench_filter_queries import LISTING_DEFAULTS
+from benchmarks.bench_pdf_extraction import make_fixture
+from benchmarks.synthetic import END_DATE, TOPIC_WORDS, build_synthetic_db, session_factory
+from routers.papers import query_papers
+from services.arxiv_service import _store_paper
+from services.extraction_service import extract_text_from_pdf_bytes
+from services.overview_service import (
+    batch_papers_by_budget,
+    cluster_papers_by_category,
+    format_paper_for_prompt,
+    iter_overview_papers,
+)
+from services.tokens import count_tokens
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines" / "hot_paths.json"
+BATCH_TOKENS = 30_000
+STORE_PAPERS = 50
+PDF_PAGES = 20
+MIN_SAMPLE_SECONDS = 0.02
+
+
+def _best_ms(fn: Callable[[], object], repeat: int) -> float:
+    """
+    Fastest of `repeat` samples in ms per call, as timeit recommends: noise
+    only ever adds time. Fast calls are looped so each sample spans
+    MIN_SAMPLE_SECONDS.
+    """
+    start = time.perf_counter()
+    fn()  # warm caches
+    loops = max(1, int(MIN_SAMPLE_SECONDS / max(time.perf_counter() - start, 1e-6)))
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - start) * 1000 / loops)
+    return min(samples)
+
+
+def _listing_variants(db) -> Dict[str, dict]:
+    common_cat = db.execute(text(
+        "SELECT c.name FROM paper_category pc JOIN categories c ON c.id = pc.category_id "
+        "GROUP BY c.id ORDER BY COUNT(*) DESC LIMIT 1"
+    )).scalar()
+    prolific = db.execute(text(
+        "SELECT a.name FROM paper_author pa JOIN authors a ON a.id = pa.author_id "
+        "GROUP BY pa.author_id ORDER BY COUNT(*) DESC LIMIT 1"
+    )).scalar()
+    week_start = END_DATE - timedelta(days=60)
+    return {
+        "get_papers search": dict(search=TOPIC_WORDS[0]),
+        "get_papers category": dict(category=common_cat),
+        "get_papers author": dict(author=prolific),
+        "get_papers date range": dict(
+            start_date=f"{week_start:%Y-%m-%d}", end_date=f"{week_start + timedelta(days=6):%Y-%m-%d}"
+        ),
+    }
+
+
+def _fake_results(existing: List[str], count: int, offset: int) -> List[SimpleNamespace]:
+    """arxiv.Result stand-ins; two of each three authors are `existing` ones, as in real ingests."""
+    results = []
+    for i in range(offset, offset + count):
+        authors = [existing[i % len(existing)], f"New Author {i}", existing[(i * 7) % len(existing)]]
+        results.append(SimpleNamespace(
+            entry_id=f"http://arxiv.org/abs/9999.{i:05d}v1",
+            title=f"Benchmark paper {i} on {TOPIC_WORDS[i % len(TOPIC_WORDS)]} models",
+            summary=" ".join(TOPIC_WORDS) * 3,
+            pdf_url=None,  # keeps the extraction queue out of the measurement
+            published=END_DATE - timedelta(hours=i),
+            authors=[SimpleNamespace(name=name) for name in authors],
+            categories=["cs.LG", "cs.AI"] if i % 2 else ["stat.ML"],
+        ))
+    return results
+
+
+def bench_corpus(path: Path, repeat: int) -> Dict[str, float]:
+    """Best ms of every corpus-dependent hot path on the database at `path`."""
+    results = {}
+    SessionLocal = session_factory(path)
+    db = SessionLocal()
+    try:
+        papers = list(iter_overview_papers(db))
+        prompts = [format_paper_for_prompt(p) for p in papers]
+        token_counts = [count_tokens(p) for p in prompts]
+        results["format_paper_for_prompt"] = _best_ms(
+            lambda: [format_paper_for_prompt(p) for p in papers], repeat)
+        results["count_tokens"] = _best_ms(lambda: [count_tokens(p) for p in prompts], repeat)
+        results["batch_papers_by_budget"] = _best_ms(
+            lambda: batch_papers_by_budget(papers, BATCH_TOKENS, token_counts), repeat)
+        results["cluster_papers_by_category"] = _best_ms(lambda: cluster_papers_by_category(papers), repeat)
+        for name, filters in _listing_variants(db).items():
+            params = {**LISTING_DEFAULTS, **filters}
+            results[name] = _best_ms(lambda: query_papers(db, **params), repeat)
+    finally:
+        db.close()
+
+    # Storing mutates the corpus, so it runs on a copy
+    with tempfile.TemporaryDirectory() as tmp:
+        copy = Path(tmp) / path.name
+        shutil.copy(path, copy)
+        db = session_factory(copy)()
+        try:
+            existing = [name for (name,) in db.execute(text("SELECT name FROM authors LIMIT 200"))]
+            offsets = iter(range(0, sys.maxsize, STORE_PAPERS))
+
+            def store():
+                for r in _fake_results(existing, STORE_PAPERS, next(offsets)):
+                    _store_paper(db, r)
+            results["_store_paper"] = _best_ms(store, repeat)
+        finally:
+            db.close()
+    return results
+
+
+def bench_pdf(repeat: int) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_bytes = make_fixture(Path(tmp) / "bench.pdf", PDF_PAGES).read_bytes()
+    return _best_ms(lambda: extract_text_from_pdf_bytes(pdf_bytes), repeat)
+
+
+def _growth(sizes: List[int], timings: Dict[int, float]) -> Optional[float]:
+    first, last = sizes[0], sizes[-1]
+    if first == last or timings.get(first, 0) <= 0 or last not in timings:
+        return None
+    return math.log(timings[last] / timings[first]) / math.log(last / first)
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: dict, tolerance: float, min_ms: float) -> List[str]:
+    """Descriptions of the hot paths slower than their baseline beyond tolerance."""
+    regressions = []
+    for op, timings in results.items():
+        for size, ms in timings.items():
+            base = baseline.get("results", {}).get(op, {}).get(size)
+            if base is None:
+                continue
+            if ms > base * (1 + tolerance) and ms - base >= min_ms:
+                regressions.append(f"{op} @ {size}: {ms:.2f} ms vs baseline {base:.2f} ms (+{(ms / base - 1) * 100:.0f}%)")
+    return regressions
+
+
+def print_table(results: Dict[str, Dict[str, float]], sizes: List[int]) -> None:
+    header = f"{'hot path':<28}" + "".join(f"{f'{n:,}':>12}" for n in sizes) + f"{'growth':>8}"
+    print(f"\nbest ms per corpus size\n{header}")
+    for op, timings in results.items():
+        if "-" in timings:
+            print(f"{op:<28}{timings['-']:>12.2f}  (independent of corpus size)")
+            continue
+        by_size = {int(k): v for k, v in timings.items()}
+        cells = "".join(f"{by_size[n]:>12.2f}" if n in by_size else f"{'':>12}" for n in sizes)
+        growth = _growth(sizes, by_size)
+        print(f"{op:<28}{cells}{'' if growth is None else f'{growth:>8.2f}'}")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Hot path microbenchmarks with baselines.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--db-dir", type=Path, default=Path(tempfile.gettempdir()))
+    parser.add_argument("--reuse", action="store_true", help="reuse existing corpora in --db-dir")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--min-ms", type=float, default=0.5, help="ignore slowdowns smaller than this")
+    args = parser.parse_args(argv)
+
+    sizes = sorted(args.sizes)
+    results: Dict[str, Dict[str, float]] = {}
+    for n in sizes:
+        path = args.db_dir / f"bench_hot_paths_{n}.db"
+        if not (args.reuse and path.exists()):
+            print(f"Building synthetic database with {n} papers at {path} ...")
+            build_synthetic_db(path, n)
+        print(f"Timing hot paths on {n} papers ...")
+        for op, ms in bench_corpus(path, args.repeat).items():
+            results.setdefault(op, {})[str(n)] = ms
+    results["extract_text_from_pdf_bytes"] = {"-": bench_pdf(args.repeat)}
+    print_table(results, sizes)
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps({
+            "created": datetime.utcnow().isoformat(timespec="seconds"),
+            "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                        "processor": platform.processor()},
+            "repeat": args.repeat,
+            "results": results,
+        }, indent=1))
+        print(f"\nSaved baseline to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"\nNo baseline at {args.baseline}; record one with --save-baseline")
+        return 0
+    regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance, args.min_ms)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    print(f"\nBaseline {args.baseline}, tolerance +{args.tolerance * 100:.0f}% -> "
+          f"{'FAIL' if regressions else 'OK'}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
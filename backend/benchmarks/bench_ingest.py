@@ -0,0 +1,186 @@
+"""
+Ingestion throughput benchmark for `fetch_papers_for_range`.
+
+Serves an arXiv fixture bundle with `benchmarks.arxiv_replay` at a given
+latency and bandwidth, then runs fetch_papers_for_range over the bundle's
+date range and categories in a fresh process with an empty database and
+PDF cache, reporting papers/s. With --pdfs the extraction queue runs too
+and the clock stops once every stored paper is extracted, measuring PDF
+download and extraction end to end.
+
+Without --bundle a synthetic one is built. --record captures a bundle from
+the live arXiv API first (observing its 3 s request delay).
+
+Run from the backend directory:
+    python -m benchmarks.bench_ingest                              # synthetic, 1000 papers
+    python -m benchmarks.bench_ingest --latency 0.3 --bandwidth 1000000 --pdfs
+    python -m benchmarks.bench_ingest --bundle fixtures/arxiv --record --pdfs \\
+        --start 2024-06-03 --end 2024-06-04 --categories cs.AI cs.LG
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+import httpx
+
+from benchmarks.arxiv_replay import SYNTHETIC_CATEGORIES, Bundle, synthesize
+from benchmarks.servers import free_port, server_env, start_server, stop_server
+
+DRAIN_TIMEOUT = 1800  # seconds to wait for the extraction queue
+
+
+def _run_fetch(fetch: dict, pdfs: bool, conn) -> None:
+    # Imported here so the settings come from the environment set by `measure`
+    from database import SessionLocal
+    from migrations import init_database
+    from models import FULL_TEXT_PENDING, FULL_TEXT_READY, Paper
+    from services.arxiv_service import fetch_papers_for_range
+    from services.extraction_service import extraction_queue
+
+    init_database()
+    if pdfs:
+        extraction_queue.start()
+    db = SessionLocal()
+
+    def count(status: str) -> int:
+        db.rollback()
+        return db.query(Paper).filter(Paper.full_text_status == status).count()
+
+    start_date = datetime.strptime(fetch["start_date"], "%Y-%m-%d")
+    end_date = datetime.strptime(fetch["end_date"], "%Y-%m-%d")
+    started = time.perf_counter()
+    stored = sum(
+        fetch_papers_for_range(db, start_date, end_date, category=category, max_results=fetch["max_results"])
+        for category in fetch["categories"]
+    )
+    fetched = time.perf_counter() - started
+
+    extracted, ready = None, 0
+    if pdfs:
+        deadline = time.monotonic() + DRAIN_TIMEOUT
+        while count(FULL_TEXT_PENDING) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        extracted = time.perf_counter() - started
+        extraction_queue.stop()
+        ready = count(FULL_TEXT_READY)
+    db.close()
+    conn.send((stored, fetched, extracted, ready))
+
+
+def measure(env: dict, fetch: dict, pdfs: bool) -> tuple:
+    """One ingest in a fresh process; returns (stored, fetch_seconds, end_to_end_seconds, extracted)."""
+    # A spawned process inherits the environment at start, before it imports the app
+    os.environ.update(env)
+    ctx = multiprocessing.get_context("spawn")
+    parent, child = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_run_fetch, args=(fetch, pdfs, child))
+    proc.start()
+    result = parent.recv()
+    proc.join()
+    return result
+
+
+def _serve(bundle: Path, mode: str, log_dir: Path, latency: float = 0.0, bandwidth: float = 0.0):
+    port = free_port()
+    proc = start_server(
+        [sys.executable, "-m", "benchmarks.arxiv_replay", mode, str(bundle), "--port", str(port),
+         "--latency", str(latency), "--bandwidth", str(bandwidth)],
+        server_env(), f"http://127.0.0.1:{port}/stats", log_dir / f"arxiv_{mode}.log",
+    )
+    return proc, f"http://127.0.0.1:{port}"
+
+
+def _ingest_env(run_dir: Path, base_url: str, args, request_delay: Optional[float]) -> dict:
+    env = {
+        "DATABASE_URL": f"sqlite:///{run_dir / 'ingest.db'}",
+        "PDF_CACHE_DIR": str(run_dir / "pdf_cache"),
+        "ARXIV_API_URL": f"{base_url}/api/query",
+        "EXTRACTION_WORKERS": str(args.workers),
+        "EXTRACTION_MAX_RETRIES": "1",
+    }
+    if request_delay is not None:
+        env["ARXIV_REQUEST_DELAY"] = str(request_delay)
+    return env
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark fetch_papers_for_range against the arXiv replay.")
+    parser.add_argument("--bundle", type=Path, help="fixture bundle; a synthetic one is built if omitted")
+    parser.add_argument("--papers", type=int, default=1000, help="synthetic bundle size")
+    parser.add_argument("--record", action="store_true", help="record --bundle from the live arXiv API first")
+    parser.add_argument("--start", default="2024-06-03")
+    parser.add_argument("--end", default="2024-06-07")
+    parser.add_argument("--categories", nargs="+", default=SYNTHETIC_CATEGORIES)
+    parser.add_argument("--max-results", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="replay seconds per response")
+    parser.add_argument("--bandwidth", type=float, default=0.0, help="replay bytes/s per response")
+    parser.add_argument("--request-delay", type=float, default=0.0, help="ARXIV_REQUEST_DELAY while replaying")
+    parser.add_argument("--pdfs", action="store_true", help="also download and extract the PDFs")
+    parser.add_argument("--workers", type=int, default=2, help="EXTRACTION_WORKERS")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    work_dir = Path(tempfile.mkdtemp(prefix="bench_ingest_"))
+    fetch = {
+        "start_date": args.start, "end_date": args.end,
+        "categories": args.categories, "max_results": args.max_results,
+    }
+    bundle_dir = args.bundle
+    if args.record:
+        if bundle_dir is None:
+            parser.error("--record needs --bundle")
+        print(f"Recording {fetch} into {bundle_dir} ...")
+        proc, base_url = _serve(bundle_dir, "record", work_dir)
+        try:
+            measure(_ingest_env(work_dir / "record", base_url, args, None), fetch, args.pdfs)
+        finally:
+            stop_server(proc)
+        Bundle(bundle_dir).save_fetch(fetch)
+    elif bundle_dir is None:
+        bundle_dir = work_dir / "bundle"
+        print(f"Synthesizing a bundle with {args.papers} papers ...")
+        synthesize(
+            bundle_dir, datetime.strptime(args.start, "%Y-%m-%d"), datetime.strptime(args.end, "%Y-%m-%d"),
+            args.categories, args.papers, max_results=args.max_results,
+        )
+
+    fetch = Bundle(bundle_dir).fetch()
+    if fetch is None:
+        raise SystemExit(f"{bundle_dir} has no fetch.json; record it with --record")
+    print(f"Replaying {bundle_dir}: {fetch['start_date']}..{fetch['end_date']}, "
+          f"{len(fetch['categories'])} categories, latency {args.latency}s, "
+          f"bandwidth {args.bandwidth or 'unlimited'} B/s")
+
+    proc, base_url = _serve(bundle_dir, "serve", work_dir, args.latency, args.bandwidth)
+    rates, e2e_rates = [], []
+    try:
+        for run in range(args.repeat):
+            env = _ingest_env(work_dir / f"run{run}", base_url, args, args.request_delay)
+            (work_dir / f"run{run}").mkdir()
+            stored, fetched, extracted, ready = measure(env, fetch, args.pdfs)
+            rates.append(stored / fetched if fetched else 0.0)
+            line = f"  run {run + 1}: {stored} papers in {fetched:.2f}s ({rates[-1]:.1f} papers/s)"
+            if extracted is not None:
+                e2e_rates.append(ready / extracted if extracted else 0.0)
+                line += f", {ready} extracted after {extracted:.2f}s ({e2e_rates[-1]:.1f} papers/s end to end)"
+            print(line)
+        misses = httpx.get(f"{base_url}/stats").json()["misses"]
+    finally:
+        stop_server(proc)
+
+    print(f"median: {statistics.median(rates):.1f} papers/s metadata"
+          + (f", {statistics.median(e2e_rates):.1f} papers/s with PDFs" if e2e_rates else ""))
+    if misses:
+        print(f"warning: {misses} requests were not in the bundle (served 404)")
+    return 1 if misses or not any(rates) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""
+End-to-end load test of the API against the stub LLM.
+
+Builds (or reuses) a synthetic database, starts `benchmarks.stub_llm` and
+the API (uvicorn, INGEST_MODE=external so nothing talks to arXiv) as
+subprocesses, then runs each scenario with N concurrent simulated users
+and reports throughput, errors and p50/p95/p99 latency:
+
+  papers    GET /api/papers/ with random pages, categories, searches and date ranges
+  chat      POST /api/chat/ as multi-turn sessions; also reports time to first token
+  overview  POST /api/overview/generate over random date ranges, until the job completes
+
+Run from the backend directory:
+    python -m benchmarks.bench_load                              # 20k papers, 10 users
+    python -m benchmarks.bench_load --users 50 --duration 60 --scenarios papers chat
+    python -m benchmarks.bench_load --stub-ttft 2 --stub-error-rate 0.05 --workers 4
+    python -m benchmarks.bench_load --app-url http://127.0.0.1:8000   # an app that is already running
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+import httpx
+import numpy as np
+
+from benchmarks.servers import free_port, server_env, start_server, stop_server
+from benchmarks.synthetic import CATEGORIES, END_DATE, TOPIC_WORDS, build_synthetic_db
+
+SCENARIOS = ("papers", "chat", "overview")
+PERCENTILES = (50, 95, 99)
+CHAT_QUESTIONS = [
+    "What problem does this paper address?",
+    "Summarize the method in three sentences.",
+    "How does it compare to prior work?",
+    "What are the main limitations?",
+    "Which datasets were used for the evaluation?",
+]
+
+
+class Sample(NamedTuple):
+    seconds: float
+    ttft: Optional[float]
+    ok: bool
+
+
+# ---------------------------------------------------------------------------
+# Scenarios
+# ---------------------------------------------------------------------------
+
+def _random_range(rng: random.Random, max_days: int) -> Dict[str, str]:
+    start = END_DATE - timedelta(days=rng.randint(max_days, 360))
+    end = start + timedelta(days=rng.randint(0, max_days - 1))
+    return {"start_date": start.strftime("%Y-%m-%d"), "end_date": end.strftime("%Y-%m-%d")}
+
+
+def _papers_user(client: httpx.AsyncClient, rng: random.Random, paper_ids: List[str]):
+    async def request() -> Sample:
+        params = {"skip": rng.choice((0, 0, 0, 20, 40, 200)), "limit": 20}
+        kind = rng.random()
+        if kind < 0.3:
+            params["category"] = rng.choice(CATEGORIES[:8])
+        elif kind < 0.5:
+            params["search"] = rng.choice(TOPIC_WORDS)
+        elif kind < 0.7:
+            params.update(_random_range(rng, 7))
+        started = time.perf_counter()
+        response = await client.get("/api/papers/", params=params)
+        return Sample(time.perf_counter() - started, None, response.status_code == 200)
+    return request
+
+
+async def _read_sse(response: httpx.Response, started: float, done: Callable[[dict], Optional[bool]]):
+    """Read SSE data events until done() returns True/False; returns (ok, ttft)."""
+    ttft = None
+    async for line in response.aiter_lines():
+        if not line.startswith("data: "):
+            continue
+        if ttft is None:
+            ttft = time.perf_counter() - started
+        outcome = done(json.loads(line[len("data: "):]))
+        if outcome is not None:
+            return outcome, ttft
+    return True, ttft
+
+
+def _chat_user(client: httpx.AsyncClient, rng: random.Random, paper_ids: List[str]):
+    session = {"id": None, "paper_id": None, "turns": 0}
+
+    async def request() -> Sample:
+        # A few turns per session, then a new paper
+        if session["id"] is None or session["turns"] >= 4:
+            session.update(id=None, paper_id=rng.choice(paper_ids), turns=0)
+        payload = {"paper_id": session["paper_id"], "message": rng.choice(CHAT_QUESTIONS)}
+        if session["id"]:
+            payload["session_id"] = session["id"]
+        started = time.perf_counter()
+        async with client.stream("POST", "/api/chat/", json=payload) as response:
+            if response.status_code != 200:
+                await response.aread()
+                return Sample(time.perf_counter() - started, None, False)
+            session["id"] = response.headers.get("X-Chat-Session-Id")
+            session["turns"] += 1
+            ok, ttft = await _read_sse(response, started, lambda e: False if "error" in e else None)
+        return Sample(time.perf_counter() - started, ttft, ok)
+    return request
+
+
+def _overview_user(client: httpx.AsyncClient, rng: random.Random, paper_ids: List[str]):
+    def done(event: dict) -> Optional[bool]:
+        if event.get("status") == "complete":
+            return True
+        if event.get("status") == "error":
+            return False
+        return None
+
+    async def request() -> Sample:
+        started = time.perf_counter()
+        async with client.stream("POST", "/api/overview/generate", json=_random_range(rng, 7)) as response:
+            if response.status_code != 200:
+                await response.aread()
+                return Sample(time.perf_counter() - started, None, False)
+            ok, _ = await _read_sse(response, started, done)
+        return Sample(time.perf_counter() - started, None, ok)
+    return request
+
+
+USER_FACTORIES = {"papers": _papers_user, "chat": _chat_user, "overview": _overview_user}
+
+
+async def _user(request: Callable[[], Awaitable[Sample]], deadline: float, samples: List[Sample]) -> None:
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            samples.append(await request())
+        except httpx.HTTPError:
+            samples.append(Sample(time.perf_counter() - started, None, False))
+
+
+async def run_scenario(app_url: str, scenario: str, users: int, duration: float, seed: int) -> dict:
+    limits = httpx.Limits(max_connections=users + 10, max_keepalive_connections=users + 10)
+    async with httpx.AsyncClient(base_url=app_url, timeout=900, limits=limits) as client:
+        listing = (await client.get("/api/papers/", params={"limit": 100})).json()
+        paper_ids = [paper["id"] for paper in listing]
+        samples: List[Sample] = []
+        started = time.monotonic()
+        deadline = started + duration
+        await asyncio.gather(*(
+            _user(USER_FACTORIES[scenario](client, random.Random(seed + i), paper_ids), deadline, samples)
+            for i in range(users)
+        ))
+        elapsed = time.monotonic() - started
+    return summarize(scenario, samples, elapsed)
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {f"p{p}": None for p in PERCENTILES}
+    return {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+
+def summarize(scenario: str, samples: List[Sample], elapsed: float) -> dict:
+    ok = [s for s in samples if s.ok]
+    return {
+        "scenario": scenario,
+        "requests": len(samples),
+        "errors": len(samples) - len(ok),
+        "throughput": len(ok) / elapsed if elapsed else 0.0,
+        "latency": _percentiles([s.seconds for s in ok]),
+        "ttft": _percentiles([s.ttft for s in ok if s.ttft is not None]),
+    }
+
+
+def _ms(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value * 1000:.0f}"
+
+
+def print_report(results: List[dict], users: int) -> None:
+    print(f"\n{users} concurrent users per scenario (latency in ms)")
+    print(f"{'scenario':<10} {'requests':>8} {'errors':>6} {'req/s':>7} "
+          f"{'p50':>8} {'p95':>8} {'p99':>8} {'ttft p50':>9} {'ttft p95':>9}")
+    for r in results:
+        lat, ttft = r["latency"], r["ttft"]
+        ttft_cols = (_ms(ttft["p50"]), _ms(ttft["p95"])) if r["scenario"] == "chat" else ("-", "-")
+        print(f"{r['scenario']:<10} {r['requests']:>8} {r['errors']:>6} {r['throughput']:>7.1f} "
+              f"{_ms(lat['p50']):>8} {_ms(lat['p95']):>8} {_ms(lat['p99']):>8} "
+              f"{ttft_cols[0]:>9} {ttft_cols[1]:>9}")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the API against the stub LLM.")
+    parser.add_argument("--papers", type=int, default=20_000, help="synthetic corpus size")
+    parser.add_argument("--db", type=Path, default=Path(tempfile.gettempdir()) / "bench_load.db")
+    parser.add_argument("--reuse", action="store_true", help="reuse --db if it exists")
+    parser.add_argument("--users", type=int, default=10, help="concurrent users per scenario")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per scenario")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--app-url", help="test this running app instead of starting one")
+    parser.add_argument("--stub-ttft", type=float, default=0.3)
+    parser.add_argument("--stub-tokens-per-second", type=float, default=80.0)
+    parser.add_argument("--stub-completion-tokens", type=int, default=300)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    procs = []
+    try:
+        app_url = args.app_url
+        if app_url is None:
+            if not (args.reuse and args.db.exists()):
+                print(f"Building synthetic database with {args.papers} papers at {args.db} ...")
+                build_synthetic_db(args.db, args.papers, full_text_chars=4_000)
+            log_dir = Path(tempfile.mkdtemp(prefix="bench_load_"))
+            stub_port, app_port = free_port(), free_port()
+            stub_url = f"http://127.0.0.1:{stub_port}/v1"
+            env = server_env()
+            procs.append(start_server(
+                [sys.executable, "-m", "benchmarks.stub_llm", "--port", str(stub_port),
+                 "--ttft", str(args.stub_ttft),
+                 "--tokens-per-second", str(args.stub_tokens_per_second),
+                 "--completion-tokens", str(args.stub_completion_tokens),
+                 "--error-rate", str(args.stub_error_rate), "--seed", str(args.seed)],
+                env, f"{stub_url}/models", log_dir / "stub_llm.log",
+            ))
+            app_env = dict(
+                env,
+                DATABASE_URL=f"sqlite:///{args.db.resolve()}",
+                INGEST_MODE="external",
+                BASE_URL=stub_url, API_KEY="stub",
+                OPENROUTER_BASE_URL=stub_url, OPENROUTER_API_KEY="stub",
+            )
+            app_url = f"http://127.0.0.1:{app_port}"
+            procs.append(start_server(
+                [sys.executable, "-m", "uvicorn", "main:app", "--port", str(app_port),
+                 "--workers", str(args.workers), "--log-level", "warning"],
+                app_env, f"{app_url}/", log_dir / "api.log",
+            ))
+            print(f"Stub LLM at {stub_url}, API at {app_url}, logs in {log_dir}")
+
+        results = []
+        for scenario in args.scenarios:
+            print(f"Running {scenario}: {args.users} users for {args.duration:.0f}s ...")
+            results.append(asyncio.run(run_scenario(app_url, scenario, args.users, args.duration, args.seed)))
+    finally:
+        for proc in reversed(procs):
+            stop_server(proc)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results, args.users)
+    return 1 if any(r["errors"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
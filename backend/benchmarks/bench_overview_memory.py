@@ -0,0 +1,119 @@
+"""
+Peak-memory benchmark for loading the papers of a research overview.
+
+Builds a synthetic database whose papers carry extracted full text, then
+loads an overview's papers with each strategy in a fresh subprocess,
+clusters them and formats every prompt entry, measuring peak RSS and wall
+time:
+
+  legacy     `db.query(Paper)...all()`, full ORM objects with full_text and
+             lazy-loaded authors/categories (pre-projection code)
+  projected  `iter_overview_papers`, column tuples streamed with yield_per
+
+Run from the backend directory:
+    python -m benchmarks.bench_overview_memory                    # 10k papers
+    python -m benchmarks.bench_overview_memory --papers 2000 --full-text-chars 50000
+"""
+import argparse
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import List
+
+from benchmarks.synthetic import build_synthetic_db
+
+STRATEGIES = ("legacy", "projected")
+
+
+def _max_rss_bytes() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def _legacy_prompts(db) -> dict:
+    from models import Paper
+
+    papers = db.query(Paper).order_by(Paper.published_date.desc()).all()
+    clusters = defaultdict(list)
+    for paper in papers:
+        primary = paper.categories[0].name if paper.categories else "Uncategorized"
+        authors = ", ".join(a.name for a in paper.authors[:5])
+        if len(paper.authors) > 5:
+            authors += " et al."
+        date_str = paper.published_date.strftime("%Y-%m-%d")
+        clusters[primary].append(
+            f"### {paper.title}\n**Authors:** {authors} | **Date:** {date_str}\n\n{paper.abstract}\n"
+        )
+    return clusters
+
+
+def _projected_prompts(db) -> dict:
+    from services.overview_service import (
+        cluster_papers_by_category,
+        format_paper_for_prompt,
+        iter_overview_papers,
+    )
+
+    clusters = cluster_papers_by_category(iter_overview_papers(db))
+    return {
+        name: [format_paper_for_prompt(paper) for paper in papers]
+        for name, papers in clusters.items()
+    }
+
+
+def _run_strategy(strategy: str, path: str, conn) -> None:
+    from benchmarks.synthetic import session_factory
+
+    db = session_factory(Path(path))()
+    baseline = _max_rss_bytes()
+    start = time.perf_counter()
+    if strategy == "legacy":
+        clusters = _legacy_prompts(db)
+    else:
+        clusters = _projected_prompts(db)
+    elapsed = time.perf_counter() - start
+    papers = sum(len(prompts) for prompts in clusters.values())
+    conn.send((_max_rss_bytes() - baseline, elapsed, papers, len(clusters)))
+    conn.close()
+    db.close()
+
+
+def measure(strategy: str, path: Path) -> tuple:
+    """Run one load in a fresh process; returns (peak_rss_delta, seconds, papers, clusters)."""
+    ctx = multiprocessing.get_context("spawn")
+    parent, child = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_run_strategy, args=(strategy, str(path), child))
+    proc.start()
+    result = parent.recv()
+    proc.join()
+    return result
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--papers", type=int, default=10_000)
+    parser.add_argument("--full-text-chars", type=int, default=30_000)
+    parser.add_argument("--db", type=Path, default=Path(tempfile.gettempdir()) / "bench_overview.db")
+    parser.add_argument("--reuse", action="store_true", help="Reuse an existing --db file")
+    args = parser.parse_args(argv)
+
+    if not (args.reuse and args.db.exists()):
+        print(
+            f"Building synthetic database with {args.papers} papers "
+            f"({args.full_text_chars} chars of full text each) at {args.db} ..."
+        )
+        build_synthetic_db(args.db, args.papers, full_text_chars=args.full_text_chars)
+
+    print(f"{'strategy':<12}{'peak RSS':>12}{'time':>10}{'papers':>9}{'clusters':>10}")
+    for strategy in STRATEGIES:
+        rss, elapsed, papers, clusters = measure(strategy, args.db)
+        print(f"{strategy:<12}{rss / 1024 / 1024:>10.1f}MB{elapsed:>9.2f}s{papers:>9}{clusters:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Helpers for benchmarks that run servers (the app, the stub LLM, the arXiv
+replay) as subprocesses.
+"""
+import os
+import socket
+import subprocess
+import time
+from pathlib import Path
+from typing import List
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def server_env(**overrides: str) -> dict:
+    """This process's environment with the backend importable, plus overrides."""
+    path = os.pathsep.join(filter(None, [str(BACKEND_DIR), os.environ.get("PYTHONPATH")]))
+    return dict(os.environ, PYTHONPATH=path, **overrides)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(cmd: List[str], env: dict, ready_url: str, log_path: Path) -> subprocess.Popen:
+    """Start a server from the backend directory and wait until ready_url answers."""
+    log = open(log_path, "wb")
+    proc = subprocess.Popen(cmd, env=env, cwd=BACKEND_DIR, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"{cmd[2]} exited with {proc.returncode}, see {log_path}")
+        try:
+            if httpx.get(ready_url, timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit(f"{cmd[2]} did not become ready, see {log_path}")
+
+
+def stop_server(proc: subprocess.Popen) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
@@ -0,0 +1,168 @@
+"""
+Local OpenAI-compatible LLM stub for load tests.
+
+Serves POST /v1/chat/completions (plain and streamed) and GET /v1/models
+with a configurable time to first token, prefill and decode speed, reply
+length and injected errors, so overview and chat throughput can be
+measured without provider keys. Point the app at it with
+
+    BASE_URL=http://127.0.0.1:8001/v1 API_KEY=stub
+    OPENROUTER_BASE_URL=http://127.0.0.1:8001/v1 OPENROUTER_API_KEY=stub
+
+Run from the backend directory:
+    python -m benchmarks.stub_llm --port 8001
+    python -m benchmarks.stub_llm --ttft 1.5 --tokens-per-second 30 --error-rate 0.05 --error-status 429
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import AsyncIterator, List, NamedTuple, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from benchmarks.synthetic import TOPIC_WORDS
+from services.tokens import count_tokens
+
+CHUNK_INTERVAL = 0.05  # seconds between streamed chunks
+
+
+class StubConfig(NamedTuple):
+    ttft: float = 0.2  # seconds before the first token, on top of prefill
+    prefill_tokens_per_second: float = 5_000.0
+    tokens_per_second: float = 80.0
+    completion_tokens: int = 300  # reply length, capped by the request's max_tokens
+    error_rate: float = 0.0  # fraction of requests answered with error_status
+    error_status: int = 500
+    context_length: int = 128_000
+    seed: Optional[int] = None
+
+
+def _reply_words(n: int, rng: random.Random) -> List[str]:
+    return [rng.choice(TOPIC_WORDS) for _ in range(n)]
+
+
+def create_app(config: StubConfig) -> FastAPI:
+    app = FastAPI(title="Stub LLM")
+    rng = random.Random(config.seed)
+    stats = {"requests": 0, "streams": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    @app.get("/v1/models")
+    def list_models():
+        # Any model id is accepted; these cover the app's defaults
+        from config import settings
+        models = {settings.openai_model, settings.overview_model, "openrouter/auto", "stub"}
+        return {"object": "list", "data": [
+            {
+                "id": model, "object": "model", "context_length": config.context_length,
+                "top_provider": {"max_completion_tokens": config.completion_tokens * 4},
+            }
+            for model in sorted(models)
+        ]}
+
+    @app.get("/stats")
+    def read_stats():
+        return stats
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+        if rng.random() < config.error_rate:
+            stats["errors"] += 1
+            return JSONResponse(
+                {"error": {"message": "Injected stub error", "type": "stub_error"}},
+                status_code=config.error_status,
+            )
+
+        model = body.get("model", "stub")
+        prompt_tokens = sum(count_tokens(str(m.get("content") or "")) for m in body.get("messages", []))
+        completion_tokens = min(config.completion_tokens, body.get("max_tokens") or config.completion_tokens)
+        words = _reply_words(completion_tokens, rng)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        stats["prompt_tokens"] += prompt_tokens
+        stats["completion_tokens"] += completion_tokens
+        first_token_delay = config.ttft + prompt_tokens / config.prefill_tokens_per_second
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        if not body.get("stream"):
+            await asyncio.sleep(first_token_delay + completion_tokens / config.tokens_per_second)
+            return {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": " ".join(words)},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            }
+
+        stats["streams"] += 1
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+        def event(delta: dict, finish_reason: Optional[str] = None, **extra) -> str:
+            chunk = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                **extra,
+            }
+            return f"data: {json.dumps(chunk)}\n\n"
+
+        async def generate() -> AsyncIterator[str]:
+            await asyncio.sleep(first_token_delay)
+            yield event({"role": "assistant", "content": ""})
+            per_chunk = max(1, round(config.tokens_per_second * CHUNK_INTERVAL))
+            for i in range(0, len(words), per_chunk):
+                if i:
+                    await asyncio.sleep(per_chunk / config.tokens_per_second)
+                yield event({"content": " ".join(words[i:i + per_chunk]) + " "})
+            yield event({}, "stop")
+            if include_usage:
+                yield f"data: {json.dumps({'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model, 'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(generate(), media_type="text/event-stream")
+
+    return app
+
+
+def main(argv: List[str] = None) -> None:
+    defaults = StubConfig()
+    parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible LLM stub.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--ttft", type=float, default=defaults.ttft)
+    parser.add_argument("--prefill-tokens-per-second", type=float, default=defaults.prefill_tokens_per_second)
+    parser.add_argument("--tokens-per-second", type=float, default=defaults.tokens_per_second)
+    parser.add_argument("--completion-tokens", type=int, default=defaults.completion_tokens)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--error-status", type=int, default=defaults.error_status)
+    parser.add_argument("--context-length", type=int, default=defaults.context_length)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    config = StubConfig(
+        ttft=args.ttft,
+        prefill_tokens_per_second=args.prefill_tokens_per_second,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        context_length=args.context_length,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Synthetic corpus generator for benchmarks.
+
+Builds a SQLite database with the application schema and a deterministic,
+realistically skewed corpus: a few categories and prolific authors account
+for most papers, while most authors appear only once or twice.
+
+    python -m benchmarks.synthetic /tmp/synthetic.db --papers 500000
+"""
+import argparse
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+import models  # noqa: F401  (registers the tables on Base.metadata)
+from migrations import run_migrations
+from services.author_index import normalize_author_name
+
+CATEGORIES = [
+    "cs.AI", "cs.LG", "cs.CL", "cs.CV", "cs.CR", "cs.DB", "cs.DC", "cs.DS",
+    "cs.HC", "cs.IR", "cs.IT", "cs.MA", "cs.NE", "cs.NI", "cs.PL", "cs.RO",
+    "cs.SE", "cs.SI", "stat.ML", "stat.ME", "stat.TH", "stat.AP", "stat.CO",
+    "q-bio.QM", "q-bio.BM", "q-bio.GN", "q-bio.NC", "q-bio.PE", "q-bio.MN",
+    "math.OC", "math.ST", "eess.SP", "eess.IV", "physics.comp-ph",
+]
+
+FIRST_NAMES = [
+    "Alice", "Bao", "Carlos", "Dmitri", "Elena", "Fatima", "Gustavo", "Hiro",
+    "Ines", "Jun", "Kwame", "Lena", "Mateo", "Nadia", "Olu", "Priya", "Quinn",
+    "Rafael", "Sofia", "Tariq", "Uma", "Viktor", "Wei", "Ximena", "Yusuf", "Zoe",
+]
+
+LAST_NAMES = [
+    "Anderson", "Brown", "Chen", "Dubois", "Eriksson", "Fischer", "Garcia",
+    "Hoffmann", "Ivanov", "Jensen", "Kim", "Li", "Müller", "Nakamura",
+    "Okafor", "Patel", "Quispe", "Rossi", "Schmidt", "Tanaka", "Ueda",
+    "Walker", "Xu", "Yamamoto", "Zhang",
+]
+
+TOPIC_WORDS = [
+    "transformer", "diffusion", "graph", "retrieval", "reinforcement",
+    "contrastive", "federated", "causal", "sparse", "bayesian", "protein",
+    "genomic", "robust", "adversarial", "multimodal", "quantization",
+    "distillation", "benchmark", "agent", "reasoning", "alignment", "kernel",
+    "optimization", "uncertainty", "segmentation", "language", "vision",
+]
+
+END_DATE = datetime(2025, 1, 1)
+
+
+def author_names(n: int, rng: random.Random) -> List[str]:
+    """Unique, plausible author names."""
+    names = []
+    for i in range(n):
+        first = FIRST_NAMES[i % len(FIRST_NAMES)]
+        last = LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]
+        middle = chr(ord("A") + rng.randrange(26))
+        names.append(f"{first} {middle}. {last}-{i}")
+    return names
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(TOPIC_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def build_synthetic_db(
+    path: Path,
+    n_papers: int,
+    n_authors: int = None,
+    days: int = 365,
+    seed: int = 42,
+    full_text_chars: int = 0,
+) -> Path:
+    """
+    Create (or replace) a SQLite database at `path` with n_papers papers.
+    Returns the path.
+    """
+    path = Path(path)
+    if path.exists():
+        path.unlink()
+    n_authors = n_authors or max(n_papers * 3 // 5, 10)
+    rng = random.Random(seed)
+
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+
+    conn = sqlite3.connect(str(path))
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+
+    conn.executemany(
+        "INSERT INTO categories (id, name) VALUES (?, ?)",
+        [(i + 1, name) for i, name in enumerate(CATEGORIES)],
+    )
+    conn.executemany(
+        "INSERT INTO authors (id, name, name_normalized) VALUES (?, ?, ?)",
+        [
+            (i + 1, name, normalize_author_name(name))
+            for i, name in enumerate(author_names(n_authors, rng))
+        ],
+    )
+
+    # Zipf-like skew: low IDs are far more common than high ones
+    category_weights = [1 / (i + 1) for i in range(len(CATEGORIES))]
+    prolific = list(range(1, min(200, n_authors) + 1))
+    prolific_weights = [1 / rank for rank in prolific]
+    body = ("lorem ipsum dolor sit amet " * (full_text_chars // 27 + 1))[:full_text_chars]
+
+    batch_papers, batch_authors, batch_categories = [], [], []
+    span_seconds = days * 86400
+    for i in range(n_papers):
+        paper_id = f"{2400 + i // 100000}.{i % 100000:05d}v1"
+        published = END_DATE - timedelta(seconds=rng.randrange(span_seconds))
+        title = _sentence(rng, 8)
+        abstract = " ".join(_sentence(rng, 18) for _ in range(6))
+        batch_papers.append((
+            paper_id, title, abstract, body or None, "ready" if body else "pending",
+            published.isoformat(sep=" "), f"http://arxiv.org/pdf/{paper_id}",
+            f"http://arxiv.org/abs/{paper_id}",
+        ))
+
+        authors = {
+            rng.choices(prolific, weights=prolific_weights)[0] if rng.random() < 0.02
+            else rng.randrange(1, n_authors + 1)
+            for _ in range(rng.randint(1, 6))
+        }
+        batch_authors.extend((paper_id, a, i) for i, a in enumerate(authors))
+        cats = set(rng.choices(range(1, len(CATEGORIES) + 1), weights=category_weights, k=rng.randint(1, 3)))
+        batch_categories.extend((paper_id, c, i) for i, c in enumerate(cats))
+
+        if len(batch_papers) >= 20000:
+            _flush(conn, batch_papers, batch_authors, batch_categories)
+    _flush(conn, batch_papers, batch_authors, batch_categories)
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+    return path
+
+
+def _flush(conn, papers, authors, categories) -> None:
+    conn.executemany(
+        "INSERT INTO papers (id, title, abstract, full_text, full_text_status, "
+        "published_date, pdf_url, entry_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        papers,
+    )
+    conn.executemany("INSERT INTO paper_author (paper_id, author_id, position) VALUES (?, ?, ?)", authors)
+    conn.executemany("INSERT INTO paper_category (paper_id, category_id, position) VALUES (?, ?, ?)", categories)
+    papers.clear()
+    authors.clear()
+    categories.clear()
+
+
+def session_factory(path: Path) -> sessionmaker:
+    """
+    Sessions on the database at `path`, brought up to the current schema the
+    way the app does on startup, so databases built by older code still work.
+    """
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build a synthetic arXiv database.")
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--papers", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--full-text-chars", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    build_synthetic_db(args.path, args.papers, days=args.days, full_text_chars=args.full_text_chars)
+    print(f"Built {args.papers} papers in {time.perf_counter() - start:.1f}s -> {args.path}")
+
+
+if __name__ == "__main__":
+    main()
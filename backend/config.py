@@ -5,9 +5,13 @@ from typing import List
 
 class Settings(BaseSettings):
     openrouter_api_key: str = Field(default="", alias="OPENROUTER_API_KEY")
+    openrouter_base_url: str = "https://openrouter.ai/api/v1"
     openai_api_key: str = Field(default="", alias="API_KEY")
     openai_base_url: str = Field(default="", alias="BASE_URL")
     openai_model: str = "qwen3.5-122b-a10b"
+    # AcademicCloud's /models response has no context_length
+    openai_context_window: int = 32_000
+    openai_max_output: int = 4_096
     database_url: str = "sqlite:///./arxiv_newsletter.db"
     arxiv_categories: List[str] = [
         "cs.*",     # Computer Science
@@ -17,9 +21,64 @@ class Settings(BaseSettings):
         "cs.LG"
     ]
     max_papers_per_fetch: int = 50
+    arxiv_api_url: str = "https://export.arxiv.org/api/query"
+    arxiv_request_delay: float = 3.0  # seconds between API pages, per arXiv's terms of use
+    extraction_workers: int = 2
+    extraction_max_retries: int = 3
+    extraction_retry_delay: int = 60  # seconds, doubled on every retry
+    extraction_sweep_interval: int = 300  # seconds between scans for papers stored by other processes
+    pdf_max_download_bytes: int = 50 * 1024 * 1024
+    pdf_max_pages: int = 200
+    pdf_max_chars: int = 500_000
+    pdf_cache_dir: str = "./pdf_cache"
+    pdf_cache_max_bytes: int = 2 * 1024 * 1024 * 1024
+    tts_engine: str = "edge"  # "edge" or "stub" (offline, silent audio)
+    tts_chunk_chars: int = 600
+    tts_concurrency: int = 4
+    podcast_cache_max_bytes: int = 500 * 1024 * 1024
+    podcast_cache_max_age_days: int = 30
+    # "embedded": API workers elect one of themselves to run the arXiv schedule
+    # and extraction queue; "external": only `python -m ingest` does
+    ingest_mode: str = "embedded"
+    ingest_lease_seconds: int = 30
+    ingest_metrics_port: int = 0  # serve /metrics from `python -m ingest`; 0 disables
+    job_workers: int = 2
+    job_lease_seconds: int = 60  # a running job whose lease lapses is retried
+    job_max_attempts: int = 3
+    job_poll_interval: float = 0.5  # seconds, for idle workers and SSE subscribers
+    job_retention_days: int = 7
+    llm_ledger_retention_days: int = 30
+    response_cache_max_bytes: int = 64 * 1024 * 1024
+    # Chat: recent messages sent with each turn; older ones are summarized
+    chat_history_tokens: int = 3_000
+    # Chat: if the primary has not streamed a token within the hedge delay,
+    # start the fallback too and keep whichever answers first
+    chat_hedging: bool = False
+    chat_hedge_delay: float = 0.0  # seconds; 0 uses the primary's p95 time to first token
     overview_model: str = "google/gemini-2.0-flash-001"
     overview_context_window: int = 1000000  # fallback if API fetch fails
+    overview_max_output: int = 8_192  # likewise
     overview_budget_ratio: float = 0.80
+    overview_concurrency: int = 4  # LLM calls in flight per overview
+    overview_include_trends: bool = True  # give the executive summary real term counts
+    # Overviews precomputed after every ingestion run (and daily, as presets
+    # are relative to today); "days" counts back from today
+    overview_presets: List[dict] = [
+        {"days": 7},
+        {"days": 7, "category": "cs.AI"},
+        {"days": 7, "category": "cs.LG"},
+    ]
+    overview_warm_podcasts: bool = False  # also synthesize each preset's podcast
+    overview_snapshot_retention_days: int = 7
+    # Per-paper structured summaries (contribution, method, results), written
+    # in the background after each ingestion run; overview prompts use them
+    # in place of the abstracts
+    paper_summaries: bool = True
+    paper_summary_batch_size: int = 10  # papers per LLM call
+    paper_summary_concurrency: int = 2  # LLM calls in flight
+    paper_summary_max_retries: int = 3
+    paper_summary_days: int = 30  # summarize papers published this recently; 0 for all
+    overview_use_summaries: bool = True
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,146 @@
+"""
+Run arXiv ingestion outside the API process.
+
+Ingestion is the arXiv fetch schedule (an initial fetch shortly after
+start, then weekly, each followed by queueing the new papers' summaries
+and the overview presets for precomputation) plus the full-text
+extraction queue. Only the process holding the "ingest" lease runs it, so
+any number of API and ingest workers can run side by side. This worker
+also runs date-range fetch jobs.
+
+With INGEST_MODE=embedded (the default) the API workers elect a leader
+among themselves and this worker is optional. For multi-worker API
+deployments, set INGEST_MODE=external and run ingestion here instead.
+
+Run from the backend directory:
+    python -m ingest
+"""
+import argparse
+import asyncio
+import logging
+import signal
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from config import settings
+from database import SessionLocal
+from migrations import init_database
+from services.arxiv_service import fetch_and_store_latest_papers
+from services.extraction_service import extraction_queue
+from services.job_queue import INGEST_JOB_KINDS, JobQueue, submit_job
+from services.leader import LeaderElection
+from services.metrics import serve_metrics, timed_job
+from services.overview_cache import missing_presets, preset_params, prune_snapshots
+
+logger = logging.getLogger(__name__)
+
+
+def fetch_job():
+    logger.info("Starting background arxiv fetch job...")
+    db = SessionLocal()
+    try:
+        fetch_and_store_latest_papers(db)
+    finally:
+        db.close()
+    logger.info("Finished background arxiv fetch job.")
+    # New papers: summarize them, then recompute every preset overview
+    if settings.paper_summaries and (settings.openrouter_api_key or settings.openai_api_key):
+        submit_job("summarize_papers", {"warm_overviews": True})
+    else:
+        warm_overviews_job()
+
+
+def warm_overviews_job(only_missing: bool = False):
+    """Queue the overview presets for precomputation by the API's job workers."""
+    prune_snapshots()
+    if not settings.openrouter_api_key and not settings.openai_api_key:
+        return
+    presets = missing_presets() if only_missing else preset_params()
+    for params in presets:
+        submit_job("overview_warm", params)
+    if presets:
+        logger.info(f"Queued {len(presets)} overview preset(s) for precomputation")
+
+
+class Ingestion:
+    """The fetch schedule and extraction queue, run while this process leads."""
+
+    def __init__(self):
+        self._scheduler: Optional[BackgroundScheduler] = None
+
+    def start(self) -> None:
+        scheduler = BackgroundScheduler()
+        # Run fetch job somewhat soon after startup to populate initially
+        fetch = timed_job("arxiv_fetch", fetch_job)
+        scheduler.add_job(fetch, trigger='date', run_date=datetime.now() + timedelta(seconds=5))
+        # And run it weekly
+        scheduler.add_job(fetch, trigger='interval', weeks=1)
+        # Presets are relative to today, so resolve them again after midnight
+        scheduler.add_job(
+            timed_job("overview_warm", warm_overviews_job), trigger='cron', hour=0, minute=5,
+            timezone="UTC", kwargs={"only_missing": True},
+        )
+        # Papers stored by other processes (e.g. range fetches) wait as pending
+        scheduler.add_job(
+            timed_job("extraction_sweep", extraction_queue.enqueue_pending), trigger='interval',
+            seconds=settings.extraction_sweep_interval, kwargs={"new_only": True},
+        )
+        scheduler.start()
+        self._scheduler = scheduler
+        # Fill in full text for new and previously pending papers in the background
+        extraction_queue.start()
+
+    def stop(self) -> None:
+        if self._scheduler:
+            self._scheduler.shutdown()
+            self._scheduler = None
+        extraction_queue.stop()
+
+
+ingestion = Ingestion()
+ingest_leader = LeaderElection(
+    "ingest",
+    ttl=settings.ingest_lease_seconds,
+    on_elected=ingestion.start,
+    on_demoted=ingestion.stop,
+)
+
+
+async def serve() -> None:
+    """Compete for the ingest lease and run range-fetch jobs until signalled."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    jobs = JobQueue(
+        workers=1,
+        lease_seconds=settings.job_lease_seconds,
+        max_attempts=settings.job_max_attempts,
+        poll_interval=settings.job_poll_interval,
+        kinds=INGEST_JOB_KINDS,
+    )
+    if settings.ingest_metrics_port:
+        serve_metrics(settings.ingest_metrics_port)
+    ingest_leader.start()
+    await jobs.start()
+    logger.info("Ingest worker running")
+    await stop.wait()
+
+    logger.info("Ingest worker shutting down")
+    await jobs.stop()
+    await asyncio.to_thread(ingest_leader.stop)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run arXiv ingestion outside the API process.")
+    parser.parse_args(argv)
+    init_database()
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -2,41 +2,34 @@ import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from apscheduler.schedulers.background import BackgroundScheduler
-import datetime
+from fastapi.responses import Response
 
-from database import engine, Base, SessionLocal
-from services.arxiv_service import fetch_and_store_latest_papers
-from routers import papers, chat, overview
+from config import settings
+from migrations import init_database
+from ingest import ingest_leader
+from services.job_queue import job_queue
+from services.llm_ledger import prune_llm_calls
+from services.metrics import MetricsMiddleware, CONTENT_TYPE, render as render_metrics
+from routers import papers, chat, overview, authors, trends, jobs, admin
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Create tables
-Base.metadata.create_all(bind=engine)
-
-def fetch_job():
-    logger.info("Starting background arxiv fetch job...")
-    db = SessionLocal()
-    try:
-        fetch_and_store_latest_papers(db)
-    finally:
-        db.close()
-    logger.info("Finished background arxiv fetch job.")
-
-scheduler = BackgroundScheduler()
+init_database()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Run fetch job somewhat soon after startup to populate initially
-    from datetime import datetime, timedelta
-    scheduler.add_job(fetch_job, trigger='date', run_date=datetime.now() + timedelta(seconds=5))
-    
-    # And run it weekly
-    scheduler.add_job(fetch_job, trigger='interval', weeks=1)
-    scheduler.start()
+    # With several uvicorn workers only the holder of the ingest lease runs
+    # the arXiv schedule and the extraction queue
+    if settings.ingest_mode == "embedded":
+        ingest_leader.start()
+    # Overview, podcast and range-fetch jobs, including any left by a previous run
+    await job_queue.start()
+    prune_llm_calls()
     yield
-    scheduler.shutdown()
+    await job_queue.stop()
+    ingest_leader.stop()
 
 app = FastAPI(title="ArXiv Newsletter API", lifespan=lifespan)
 
@@ -46,12 +39,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+# Outermost, so its latency and Server-Timing cover the whole request
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(papers.router, prefix="/api/papers", tags=["papers"])
+app.include_router(authors.router, prefix="/api/authors", tags=["authors"])
+app.include_router(trends.router, prefix="/api/trends", tags=["trends"])
 app.include_router(chat.router, prefix="/api/chat", tags=["chat"])
 app.include_router(overview.router, prefix="/api/overview", tags=["overview"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
+app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
 
 @app.get("/")
 def root():
     return {"message": "ArXiv Newsletter API is running"}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics of this worker process."""
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
@@ -0,0 +1,254 @@
+"""
+Lightweight schema migrations for existing SQLite databases.
+
+`Base.metadata.create_all` creates missing tables but never alters tables
+that already exist, so columns and indexes added after a database was first
+created are applied here. Every migration is idempotent and runs on startup.
+"""
+import logging
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+
+try:
+    import fcntl
+except ImportError:  # Windows: schema setup is not serialized across processes
+    fcntl = None
+
+from database import engine, Base
+from models import FULL_TEXT_PENDING, FULL_TEXT_READY, FULL_TEXT_UNAVAILABLE, SUMMARY_PENDING
+from services.author_index import normalize_author_name
+from services.facet_service import rebuild_facet_rollups
+from services.trend_service import rebuild_term_rollups
+
+logger = logging.getLogger(__name__)
+
+
+def _column_names(conn: Connection, table: str) -> set:
+    return {col["name"] for col in inspect(conn).get_columns(table)}
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl: str) -> bool:
+    """Add a column if it is missing. Returns True if the column was added."""
+    if column in _column_names(conn, table):
+        return False
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    logger.info(f"Migration: added column {table}.{column}")
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Migrations
+# ---------------------------------------------------------------------------
+
+def migrate_full_text_status(conn: Connection) -> None:
+    """Add the deferred-extraction columns and backfill existing rows."""
+    added = _add_column(conn, "papers", "full_text_status", "VARCHAR")
+    _add_column(conn, "papers", "full_text_attempts", "INTEGER DEFAULT 0")
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_papers_full_text_status "
+        "ON papers (full_text_status)"
+    ))
+    if not added:
+        return
+
+    # Papers stored before the split were extracted inline. An empty
+    # full_text means that extraction failed, so queue those for a retry.
+    conn.execute(
+        text(
+            "UPDATE papers SET full_text_status = CASE "
+            "WHEN full_text IS NOT NULL AND full_text != '' THEN :ready "
+            "WHEN pdf_url IS NULL OR pdf_url = '' THEN :unavailable "
+            "ELSE :pending END"
+        ),
+        {
+            "ready": FULL_TEXT_READY,
+            "unavailable": FULL_TEXT_UNAVAILABLE,
+            "pending": FULL_TEXT_PENDING,
+        },
+    )
+
+
+def _rebuild_association_table(
+    conn: Connection, table: str, left: str, right: str, right_table: str
+) -> None:
+    """
+    Give an association table a composite (left, right) primary key, a
+    reverse (right, left) index and a `position` column. SQLite cannot add a
+    primary key in place, so the table is rebuilt; duplicate and NULL rows
+    are dropped on the way. Rows keep their insertion order as rowids, from
+    which missing positions are backfilled.
+    """
+    pk = inspect(conn).get_pk_constraint(table).get("constrained_columns") or []
+    rebuilt = pk != [left, right]
+    if rebuilt:
+        logger.info(f"Migration: rebuilding {table} with a composite primary key")
+        conn.execute(text(f"ALTER TABLE {table} RENAME TO {table}_old"))
+        conn.execute(text(
+            f"CREATE TABLE {table} ("
+            f" {left} VARCHAR NOT NULL REFERENCES papers (id),"
+            f" {right} INTEGER NOT NULL REFERENCES {right_table} (id),"
+            f" position INTEGER,"
+            f" PRIMARY KEY ({left}, {right}))"
+        ))
+        conn.execute(text(
+            f"INSERT OR IGNORE INTO {table} ({left}, {right}) "
+            f"SELECT {left}, {right} FROM {table}_old "
+            f"WHERE {left} IS NOT NULL AND {right} IS NOT NULL ORDER BY rowid"
+        ))
+        conn.execute(text(f"DROP TABLE {table}_old"))
+        conn.execute(text(f"ANALYZE {table}"))
+    conn.execute(text(
+        f"CREATE INDEX IF NOT EXISTS ix_{table}_{right} ON {table} ({right}, {left})"
+    ))
+    if not (_add_column(conn, table, "position", "INTEGER") or rebuilt):
+        return
+    backfilled = conn.execute(text(
+        f"UPDATE {table} SET position = ("
+        f" SELECT COUNT(*) FROM {table} AS earlier"
+        f" WHERE earlier.{left} = {table}.{left} AND earlier.rowid < {table}.rowid) "
+        f"WHERE position IS NULL"
+    )).rowcount
+    if backfilled:
+        logger.info(f"Migration: backfilled {table}.position for {backfilled} rows")
+
+
+def migrate_filter_indexes(conn: Connection) -> None:
+    """Indexes behind category/author filtered listings."""
+    _rebuild_association_table(conn, "paper_author", "paper_id", "author_id", "authors")
+    _rebuild_association_table(conn, "paper_category", "paper_id", "category_id", "categories")
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_papers_published_date_id "
+        "ON papers (published_date, id)"
+    ))
+
+
+def migrate_author_search(conn: Connection) -> None:
+    """Normalized author names plus the FTS5 trigram table over them."""
+    _add_column(conn, "authors", "name_normalized", "VARCHAR")
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_authors_name_normalized "
+        "ON authors (name_normalized)"
+    ))
+    # Normalization is Unicode-aware, so the backfill runs in Python
+    rows = conn.execute(text("SELECT id, name FROM authors WHERE name_normalized IS NULL")).fetchall()
+    if rows:
+        conn.execute(
+            text("UPDATE authors SET name_normalized = :normalized WHERE id = :id"),
+            [{"id": author_id, "normalized": normalize_author_name(name or "")} for author_id, name in rows],
+        )
+        logger.info(f"Migration: normalized {len(rows)} author names")
+
+    exists = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'authors_fts'"
+    )).first()
+    if exists:
+        return
+    try:
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE authors_fts USING fts5("
+            "name_normalized, content='authors', content_rowid='id', tokenize='trigram')"
+        ))
+    except OperationalError as e:
+        # FTS5 trigram needs SQLite 3.34+; substring search falls back to LIKE
+        logger.warning(f"Migration: author trigram index unavailable ({e})")
+        return
+    conn.execute(text(
+        "CREATE TRIGGER authors_fts_ai AFTER INSERT ON authors BEGIN "
+        "INSERT INTO authors_fts (rowid, name_normalized) VALUES (new.id, new.name_normalized); END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER authors_fts_ad AFTER DELETE ON authors BEGIN "
+        "INSERT INTO authors_fts (authors_fts, rowid, name_normalized) "
+        "VALUES ('delete', old.id, old.name_normalized); END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER authors_fts_au AFTER UPDATE OF name_normalized ON authors BEGIN "
+        "INSERT INTO authors_fts (authors_fts, rowid, name_normalized) "
+        "VALUES ('delete', old.id, old.name_normalized); "
+        "INSERT INTO authors_fts (rowid, name_normalized) VALUES (new.id, new.name_normalized); END"
+    ))
+    conn.execute(text("INSERT INTO authors_fts (authors_fts) VALUES ('rebuild')"))
+    logger.info("Migration: built the author trigram index")
+
+
+def migrate_facet_rollups(conn: Connection) -> None:
+    """Backfill the facet rollups for papers stored before they existed."""
+    has_rollups = conn.execute(text("SELECT 1 FROM daily_paper_counts LIMIT 1")).first()
+    has_papers = conn.execute(text("SELECT 1 FROM papers LIMIT 1")).first()
+    if has_papers and not has_rollups:
+        rebuild_facet_rollups(conn)
+
+
+def migrate_term_rollups(conn: Connection) -> None:
+    """Backfill the trend term rollups for papers stored before they existed."""
+    has_rollups = conn.execute(text("SELECT 1 FROM term_period_counts LIMIT 1")).first()
+    has_papers = conn.execute(text("SELECT 1 FROM papers LIMIT 1")).first()
+    if has_papers and not has_rollups:
+        logger.info("Migration: building trend term rollups, this may take a while")
+        rebuild_term_rollups(conn)
+
+
+def migrate_paper_summaries(conn: Connection) -> None:
+    """Structured summary columns; existing papers are queued for summarizing."""
+    _add_column(conn, "papers", "summary", "TEXT")
+    _add_column(conn, "papers", "summary_status", f"VARCHAR DEFAULT '{SUMMARY_PENDING}'")
+    _add_column(conn, "papers", "summary_attempts", "INTEGER DEFAULT 0")
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_papers_summary_status_published_date "
+        "ON papers (summary_status, published_date)"
+    ))
+
+
+MIGRATIONS = [
+    migrate_full_text_status,
+    migrate_filter_indexes,
+    migrate_author_search,
+    migrate_facet_rollups,
+    migrate_term_rollups,
+    migrate_paper_summaries,
+]
+
+
+def run_migrations(bind: Engine = None) -> None:
+    """Apply all migrations in order inside a single transaction."""
+    with (bind or engine).begin() as conn:
+        for migration in MIGRATIONS:
+            migration(conn)
+
+
+def _schema_lock_path(bind: Engine) -> Optional[str]:
+    database = bind.url.database
+    if bind.url.get_backend_name() != "sqlite" or not database or database == ":memory:":
+        return None
+    return f"{database}.lock"
+
+
+@contextmanager
+def _schema_lock(bind: Engine) -> Iterator[None]:
+    """
+    Exclusive file lock next to the database. With several uvicorn workers
+    starting at once, the first creates and migrates the schema while the
+    others wait, then find nothing left to do.
+    """
+    path = _schema_lock_path(bind)
+    if fcntl is None or path is None:
+        yield
+        return
+    with open(path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def init_database(bind: Engine = None) -> None:
+    """Create missing tables and apply migrations, one process at a time."""
+    bind = bind or engine
+    with _schema_lock(bind):
+        Base.metadata.create_all(bind=bind)
+        run_migrations(bind)
@@ -1,42 +1,89 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Table
+from sqlalchemy import Column, Boolean, Integer, Float, String, Text, Date, DateTime, ForeignKey, Table, Index, text
 from sqlalchemy.orm import relationship
 from database import Base
 import datetime
 
+# Values for Paper.full_text_status. Metadata is stored immediately at ingest;
+# the PDF text is filled in later by the background extraction queue.
+FULL_TEXT_PENDING = "pending"
+FULL_TEXT_READY = "ready"
+FULL_TEXT_FAILED = "failed"
+FULL_TEXT_UNAVAILABLE = "unavailable"  # no PDF URL to extract from
+
+# Values for Paper.summary_status. The structured summary is written by the
+# background summarize_papers job after ingestion.
+SUMMARY_PENDING = "pending"
+SUMMARY_READY = "ready"
+SUMMARY_FAILED = "failed"
+
+# Values for Job.status. Queued and running jobs are "active": at most one
+# active job exists per dedupe key.
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETE = "complete"
+JOB_FAILED = "failed"
+
+# Association tables: the composite primary key serves paper -> author/category
+# lookups, the reverse index serves "papers with this author/category" filters.
+# `position` keeps arXiv's order (first author, primary category first), which
+# the primary key would otherwise replace with ID order.
 paper_author_association = Table(
     'paper_author',
     Base.metadata,
-    Column('paper_id', String, ForeignKey('papers.id')),
-    Column('author_id', Integer, ForeignKey('authors.id'))
+    Column('paper_id', String, ForeignKey('papers.id'), primary_key=True),
+    Column('author_id', Integer, ForeignKey('authors.id'), primary_key=True),
+    Column('position', Integer),
+    Index('ix_paper_author_author_id', 'author_id', 'paper_id'),
 )
 
 paper_category_association = Table(
     'paper_category',
     Base.metadata,
-    Column('paper_id', String, ForeignKey('papers.id')),
-    Column('category_id', Integer, ForeignKey('categories.id'))
+    Column('paper_id', String, ForeignKey('papers.id'), primary_key=True),
+    Column('category_id', Integer, ForeignKey('categories.id'), primary_key=True),
+    Column('position', Integer),
+    Index('ix_paper_category_category_id', 'category_id', 'paper_id'),
 )
 
 class Paper(Base):
     __tablename__ = "papers"
+    __table_args__ = (
+        # Lets filtered listings walk papers in date order without touching rows
+        Index('ix_papers_published_date_id', 'published_date', 'id'),
+        # Newest papers still waiting for a summary
+        Index('ix_papers_summary_status_published_date', 'summary_status', 'published_date'),
+    )
 
     id = Column(String, primary_key=True, index=True) # ArXiv ID
     title = Column(String, index=True)
     abstract = Column(Text)
     full_text = Column(Text, nullable=True) # Extracted from PDF
+    full_text_status = Column(String, default=FULL_TEXT_PENDING, index=True)
+    full_text_attempts = Column(Integer, default=0)
+    summary = Column(Text, nullable=True)  # JSON: contribution, method, results
+    summary_status = Column(String, default=SUMMARY_PENDING)
+    summary_attempts = Column(Integer, default=0)
     published_date = Column(DateTime, index=True)
     pdf_url = Column(String)
     entry_id = Column(String) # the arxiv entry url
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
-    authors = relationship("Author", secondary=paper_author_association, back_populates="papers")
-    categories = relationship("Category", secondary=paper_category_association, back_populates="papers")
+    authors = relationship(
+        "Author", secondary=paper_author_association, back_populates="papers",
+        order_by=paper_author_association.c.position,
+    )
+    categories = relationship(
+        "Category", secondary=paper_category_association, back_populates="papers",
+        order_by=paper_category_association.c.position,
+    )
 
 class Author(Base):
     __tablename__ = "authors"
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True)
+    # Accent-stripped, case-folded name used for typeahead and author filters
+    name_normalized = Column(String, index=True)
 
     papers = relationship("Paper", secondary=paper_author_association, back_populates="authors")
 
@@ -47,3 +94,134 @@ class Category(Base):
     name = Column(String, unique=True, index=True)
 
     papers = relationship("Paper", secondary=paper_category_association, back_populates="categories")
+
+# Facet rollups: paper counts per published day, overall and per category.
+# Ingestion increments them alongside each new paper, so facet queries read
+# O(days + categories) rows regardless of archive size.
+class DailyPaperCount(Base):
+    __tablename__ = "daily_paper_counts"
+
+    day = Column(Date, primary_key=True)
+    paper_count = Column(Integer, nullable=False, default=0)
+
+class DailyCategoryCount(Base):
+    __tablename__ = "daily_category_counts"
+    __table_args__ = (
+        Index('ix_daily_category_counts_category_id', 'category_id', 'day'),
+    )
+
+    day = Column(Date, primary_key=True)
+    category_id = Column(Integer, ForeignKey('categories.id'), primary_key=True)
+    paper_count = Column(Integer, nullable=False, default=0)
+
+# Trend rollup: papers mentioning each title/abstract term, per week and per
+# month. Maintained at ingest like the facet rollups above.
+class TermPeriodCount(Base):
+    __tablename__ = "term_period_counts"
+
+    granularity = Column(String, primary_key=True)  # "week" or "month"
+    period_start = Column(Date, primary_key=True)
+    term = Column(String, primary_key=True)
+    paper_count = Column(Integer, nullable=False, default=0)
+
+# Single-row counter bumped in every transaction that changes what the paper
+# endpoints return; response caches and ETags are keyed on it.
+class DatasetVersion(Base):
+    __tablename__ = "dataset_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+# Durable background jobs (overviews, podcast scripts, range fetches). Workers
+# claim rows with a lease; `seq` is bumped on every update and doubles as the
+# SSE event id, so a client can resume a subscription where it left off.
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index(
+            'ix_jobs_active_dedupe_key', 'dedupe_key', unique=True,
+            sqlite_where=text("status IN ('queued', 'running')"),
+        ),
+        Index('ix_jobs_status_created_at', 'status', 'created_at'),
+    )
+
+    id = Column(String, primary_key=True)
+    kind = Column(String, nullable=False)
+    dedupe_key = Column(String, nullable=False)
+    params = Column(Text, nullable=False)  # JSON
+    status = Column(String, nullable=False, default=JOB_QUEUED)
+    progress = Column(Float, nullable=False, default=0.0)  # 0..1
+    message = Column(String)
+    result = Column(Text)  # JSON, set when complete
+    error = Column(Text)
+    seq = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+    worker_id = Column(String)
+    lease_expires_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+# Named leases for leader election between processes, e.g. so that only one
+# of several API workers (or the standalone ingest worker) runs ingestion.
+class Lease(Base):
+    __tablename__ = "leases"
+
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+# Server-side paper chat history. Each turn's prompt carries only the recent
+# messages that fit the history budget; older ones are folded into `summary`,
+# which covers every message with seq <= summarized_seq.
+class ChatSession(Base):
+    __tablename__ = "chat_sessions"
+
+    id = Column(String, primary_key=True)
+    paper_id = Column(String, ForeignKey('papers.id'), nullable=False, index=True)
+    summary = Column(Text)
+    summarized_seq = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class ChatMessage(Base):
+    __tablename__ = "chat_messages"
+
+    session_id = Column(String, ForeignKey('chat_sessions.id'), primary_key=True)
+    seq = Column(Integer, primary_key=True)  # 1, 2, ... within a session
+    role = Column(String, nullable=False)
+    content = Column(Text, nullable=False)
+    token_count = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+# Overviews precomputed for the configured presets. `key` hashes the resolved
+# filters (start and end date, search, category), so a request with exactly
+# those filters is answered from `result` without generating anything.
+class OverviewSnapshot(Base):
+    __tablename__ = "overview_snapshots"
+
+    key = Column(String, primary_key=True)
+    params = Column(Text, nullable=False)  # JSON
+    result = Column(Text, nullable=False)  # JSON, as returned by generate_overview
+    podcast = Column(Text)  # JSON, set when podcasts are warmed too
+    generated_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow, index=True)
+
+# One row per call_llm / stream_llm invocation, for GET /api/admin/llm-stats.
+# `attempts` counts primary attempts; `fallback` is set when OpenRouter
+# served a call although a primary is configured.
+class LlmCall(Base):
+    __tablename__ = "llm_calls"
+
+    id = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+    caller = Column(String, nullable=False)
+    provider = Column(String, nullable=False)  # "primary" or "openrouter"
+    model = Column(String, nullable=False)
+    streamed = Column(Boolean, nullable=False, default=False)
+    prompt_tokens = Column(Integer)
+    completion_tokens = Column(Integer)
+    ttft = Column(Float)  # seconds, streamed calls only
+    latency = Column(Float, nullable=False)  # seconds, including retries
+    attempts = Column(Integer, nullable=False, default=0)
+    fallback = Column(Boolean, nullable=False, default=False)
+    error = Column(Text)  # set when the call failed
@@ -0,0 +1,82 @@
+"""
+Rebuild `full_text` from the on-disk PDF cache without touching the network.
+
+Useful after switching to a better extractor or changing the page/character
+limits, and after rebuilding a lost database from arXiv metadata.
+
+Run from the backend directory:
+    python -m reextract                  # every paper with a cached PDF
+    python -m reextract --status failed  # only papers whose extraction failed
+    python -m reextract 2401.12345v1 2401.54321v2
+"""
+import argparse
+import logging
+from typing import List, Optional
+
+from database import SessionLocal
+from migrations import init_database
+from models import Paper, FULL_TEXT_READY
+from services.dataset_version import bump_version
+from services.extraction_service import extract_text_from_pdf
+from services.pdf_cache import pdf_cache
+
+logger = logging.getLogger(__name__)
+
+
+def reextract(paper_ids: Optional[List[str]] = None, status: Optional[str] = None) -> dict:
+    """
+    Re-extract full text for papers whose PDF is in the cache.
+    Returns counts of updated, missing (not cached) and failed papers.
+    """
+    counts = {"updated": 0, "missing": 0, "failed": 0}
+    db = SessionLocal()
+    try:
+        query = db.query(Paper.id).filter(Paper.pdf_url.isnot(None))
+        if paper_ids:
+            query = query.filter(Paper.id.in_(paper_ids))
+        if status:
+            query = query.filter(Paper.full_text_status == status)
+        ids = [paper_id for (paper_id,) in query.all()]
+
+        for paper_id in ids:
+            paper = db.get(Paper, paper_id)
+            entry = pdf_cache.get_for_url(paper.pdf_url, touch=False)
+            if entry is None:
+                counts["missing"] += 1
+                continue
+            full_text = extract_text_from_pdf(entry.path)
+            if not full_text:
+                counts["failed"] += 1
+                continue
+            paper.full_text = full_text
+            paper.full_text_status = FULL_TEXT_READY
+            counts["updated"] += 1
+            if counts["updated"] % 100 == 0:
+                bump_version(db)
+                db.commit()
+                logger.info(f"Re-extracted {counts['updated']} papers so far")
+        if counts["updated"] % 100:
+            bump_version(db)
+        db.commit()
+    finally:
+        db.close()
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild full_text from the PDF cache.")
+    parser.add_argument("paper_ids", nargs="*", help="Only re-extract these paper IDs")
+    parser.add_argument("--status", help="Only re-extract papers with this full_text_status")
+    args = parser.parse_args(argv)
+
+    init_database()
+    counts = reextract(args.paper_ids or None, args.status)
+    logger.info(
+        f"Re-extraction finished: {counts['updated']} updated, "
+        f"{counts['missing']} not cached, {counts['failed']} failed"
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
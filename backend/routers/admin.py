@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+from database import get_db
+from pydantic import BaseModel
+from services.llm_ledger import llm_stats
+from services.llm_service import model_chain
+from services.model_registry import model_registry
+
+router = APIRouter()
+
+class LlmCallStats(BaseModel):
+    caller: str  # e.g. overview-cluster, overview-merge, podcast-script, chat
+    provider: str  # primary or openrouter
+    calls: int
+    errors: int
+    fallbacks: int
+    retries: int  # primary attempts beyond the first
+    prompt_tokens: int
+    completion_tokens: int
+    latency_seconds: Dict[str, Optional[float]]  # p50, p95, p99 of successful calls
+    ttft_seconds: Dict[str, Optional[float]]  # likewise, streamed calls only
+
+class LlmStatsResponse(BaseModel):
+    since: datetime
+    stats: List[LlmCallStats]
+    models: List[dict]  # limits and fitted speed from the model registry
+
+@router.get("/llm-stats", response_model=LlmStatsResponse)
+def read_llm_stats(
+    db: Session = Depends(get_db),
+    hours: int = Query(24, ge=1, le=24 * 90),
+):
+    """LLM calls of the last `hours`, aggregated per caller and provider."""
+    since = datetime.utcnow() - timedelta(hours=hours)
+    return {
+        "since": since,
+        "stats": llm_stats(db, since),
+        "models": [model_registry.describe(model) for model in model_chain()],
+    }
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List
+from database import get_db
+from pydantic import BaseModel
+from services.author_index import suggest_authors
+
+router = APIRouter()
+
+class AuthorSuggestion(BaseModel):
+    id: int
+    name: str
+    paper_count: int
+
+@router.get("/suggest", response_model=List[AuthorSuggestion])
+def suggest(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+):
+    """Typeahead suggestions for the author filter, best matches first."""
+    return suggest_authors(db, q, limit)
@@ -1,12 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
-from database import get_db
-from models import Paper
+from database import get_db, SessionLocal
+from models import Paper, ChatSession, FULL_TEXT_READY, FULL_TEXT_PENDING
 from config import settings
 from services.llm_service import stream_llm
+from services.metrics import sse_stream
+from services.chat_memory import (
+    create_session, append_message, append_messages, history_window, build_prompt,
+    get_history, summarize_if_needed,
+)
+from services.tokens import count_tokens
 import json
 import logging
 
@@ -20,37 +27,110 @@ class Message(BaseModel):
 
 class ChatRequest(BaseModel):
     paper_id: str
-    messages: List[Message]
+    session_id: Optional[str] = None  # omit to start a session
+    message: Optional[str] = None  # the new user message
+    # Full history, for clients without sessions: the last entry is the new
+    # message and the rest seed a new session
+    messages: List[Message] = []
     model: str = "openrouter/auto" # Default auto routing
 
+class SessionRequest(BaseModel):
+    paper_id: str
+
+class SessionResponse(BaseModel):
+    session_id: str
+    paper_id: str
+    summary: Optional[str] = None
+    messages: List[Message] = []
+
+@router.post("/sessions", response_model=SessionResponse)
+def start_session(request: SessionRequest, db: Session = Depends(get_db)):
+    if db.get(Paper, request.paper_id) is None:
+        raise HTTPException(status_code=404, detail="Paper not found")
+    session = create_session(db, request.paper_id)
+    return SessionResponse(session_id=session.id, paper_id=session.paper_id)
+
+@router.get("/sessions/{session_id}", response_model=SessionResponse)
+def get_session(session_id: str, db: Session = Depends(get_db)):
+    history = get_history(db, session_id)
+    if history is None:
+        raise HTTPException(status_code=404, detail="Chat session not found")
+    return history
+
 @router.post("/")
 async def chat_with_paper(request: ChatRequest, db: Session = Depends(get_db)):
     paper = db.query(Paper).filter(Paper.id == request.paper_id).first()
     if not paper:
         raise HTTPException(status_code=404, detail="Paper not found")
-        
+
     if not settings.openrouter_api_key and not settings.openai_api_key:
         raise HTTPException(status_code=500, detail="No API key configured for LLM provider")
 
+    if request.message is not None:
+        user_message, earlier = request.message, []
+    elif request.messages and request.messages[-1].role == "user":
+        user_message, earlier = request.messages[-1].content, request.messages[:-1]
+    else:
+        raise HTTPException(status_code=400, detail="No user message to answer")
+
+    if request.session_id:
+        session = db.get(ChatSession, request.session_id)
+        if session is None or session.paper_id != paper.id:
+            raise HTTPException(status_code=404, detail="Chat session not found")
+    else:
+        session = create_session(db, paper.id)
+        for msg in earlier:
+            append_message(db, session.id, msg.role, msg.content)
+
+    # Full text is extracted in the background after ingestion, so it may not be ready yet
+    if paper.full_text_status == FULL_TEXT_READY and paper.full_text:
+        full_text_snippet = paper.full_text[:15000]
+    elif paper.full_text_status == FULL_TEXT_PENDING:
+        full_text_snippet = "Full text is still being extracted; answer from the title and abstract."
+    else:
+        full_text_snippet = "No full text available"
+
     # Construct messages with system prompt containing paper text
-    system_prompt = f"You are a helpful AI assistant analyzing a research paper.\n\nTitle: {paper.title}\nAbstract: {paper.abstract}\n\nFull Text Snippet:\n{paper.full_text[:15000] if paper.full_text else 'No full text available'}"
+    system_prompt = f"You are a helpful AI assistant analyzing a research paper.\n\nTitle: {paper.title}\nAbstract: {paper.abstract}\n\nFull Text Snippet:\n{full_text_snippet}"
     
-    api_messages = [{"role": "system", "content": system_prompt}]
-    for msg in request.messages:
-        api_messages.append({"role": msg.role, "content": msg.content})
+    # Summary of older turns plus the recent ones that fit the history budget.
+    # The new message is stored with the reply, so a failed turn leaves no trace.
+    window = history_window(db, session, reserve_tokens=count_tokens(user_message))
+    api_messages = build_prompt(system_prompt, session, window)
+    api_messages.append({"role": "user", "content": user_message})
+    session_id = session.id
 
     async def generate_chat_stream():
-        try:
-            stream = await stream_llm(
-                messages=api_messages,
-                timeout=120,
-                fallback_model=request.model,
-            )
-            async for chunk in stream:
-                if chunk.choices and chunk.choices[0].delta.content is not None:
-                    yield f"data: {json.dumps({'text': chunk.choices[0].delta.content})}\n\n"
-        except Exception as e:
-            logger.error(f"Chat stream failed: {e}")
-            yield f"data: {json.dumps({'error': str(e)})}\n\n"
-
-    return StreamingResponse(generate_chat_stream(), media_type="text/event-stream")
+        with sse_stream("chat"):
+            reply = []
+            try:
+                stream = await stream_llm(
+                    messages=api_messages,
+                    timeout=120,
+                    fallback_model=request.model,
+                    caller="chat",
+                )
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content is not None:
+                        reply.append(chunk.choices[0].delta.content)
+                        yield f"data: {json.dumps({'text': chunk.choices[0].delta.content})}\n\n"
+            except Exception as e:
+                logger.error(f"Chat stream failed: {e}")
+                yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            if reply:
+                history_db = SessionLocal()
+                try:
+                    append_messages(
+                        history_db, session_id,
+                        [("user", user_message), ("assistant", "".join(reply))],
+                    )
+                finally:
+                    history_db.close()
+
+    # Older turns are folded into the summary after the reply, off the critical path
+    return StreamingResponse(
+        generate_chat_stream(),
+        media_type="text/event-stream",
+        headers={"X-Chat-Session-Id": session_id},
+        background=BackgroundTask(summarize_if_needed, session_id),
+    )
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Any, Optional
+from datetime import datetime
+from pydantic import BaseModel
+from services.job_queue import get_job, job_events
+
+router = APIRouter()
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str  # queued, running, complete or failed
+    progress: float
+    message: Optional[str] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    seq: int  # id of the job's latest SSE event
+    attempts: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+@router.get("/{job_id}", response_model=JobResponse)
+def read_job(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/{job_id}/events")
+async def subscribe_job(
+    job_id: str,
+    last_event_id: Optional[int] = Query(None, ge=-1),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """
+    Resume a job's SSE stream. Only events after the Last-Event-ID header
+    (or `last_event_id` parameter) are sent, so a client that lost its
+    connection picks up where it left off.
+    """
+    if get_job(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if last_event_id is None and last_event_id_header:
+        try:
+            last_event_id = int(last_event_id_header)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+    return StreamingResponse(
+        job_events(job_id, last_event_id), media_type="text/event-stream", headers={"X-Job-Id": job_id}
+    )
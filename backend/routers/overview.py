@@ -4,20 +4,22 @@ Generates a coherent markdown narrative summarizing filtered papers,
 and provides a chat interface to discuss the overview.
 Also generates podcast audio from the overview.
 """
-import asyncio
 import json
 from pathlib import Path
 from fastapi.responses import StreamingResponse, FileResponse
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 
-from database import get_db
 from config import settings
-from services.overview_service import generate_overview
-from services.podcast_service import generate_podcast, PODCAST_DIR
+from services.job_queue import active_job, submit_job, job_events
+from services.overview_cache import get_snapshot, overview_params
+from services.podcast_service import (
+    has_podcast_stream,
+    stream_podcast_audio,
+    PODCAST_DIR,
+)
 from services.llm_service import call_llm
 
 router = APIRouter()
@@ -56,60 +58,49 @@ class PodcastRequest(BaseModel):
 
 
 @router.post("/generate")
-async def generate_research_overview(
-    request: OverviewRequest,
-    db: Session = Depends(get_db),
-):
+async def generate_research_overview(request: OverviewRequest):
+    """Generate a research overview as a background job and stream its
+    progress as SSE. The final event carries the overview and its
+    `generated_at`; precomputed presets are served from their snapshot."""
     if not settings.openrouter_api_key and not settings.openai_api_key:
         raise HTTPException(
             status_code=500, detail="No API key configured for LLM provider"
         )
 
     try:
-        start_dt = datetime.strptime(request.start_date, "%Y-%m-%d")
+        datetime.strptime(request.start_date, "%Y-%m-%d")
     except ValueError:
         raise HTTPException(
             status_code=400, detail="Invalid start_date format, use YYYY-MM-DD"
         )
 
-    if request.end_date:
-        try:
-            end_dt = datetime.strptime(request.end_date, "%Y-%m-%d") + timedelta(days=1)
-        except ValueError:
-            raise HTTPException(
-                status_code=400, detail="Invalid end_date format, use YYYY-MM-DD"
-            )
-    else:
-        end_dt = datetime.utcnow() + timedelta(days=1)
-
-    async def event_generator():
-        task = asyncio.create_task(
-            generate_overview(
-                db, start_dt, end_dt,
-                search=request.search,
-                category=request.category,
-            )
+    end_date = request.end_date or datetime.utcnow().strftime("%Y-%m-%d")
+    try:
+        datetime.strptime(end_date, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(
+            status_code=400, detail="Invalid end_date format, use YYYY-MM-DD"
         )
-        # Yield initial status immediately
-        yield f"data: {json.dumps({'status': 'processing'})}\n\n"
-        
-        while not task.done():
-            try:
-                # wait_for throws TimeoutError if timeout expires
-                await asyncio.wait_for(asyncio.shield(task), timeout=10.0)
-            except asyncio.TimeoutError:
-                yield f"data: {json.dumps({'status': 'processing'})}\n\n"
-            except Exception:
-                # If inner task fails, task.done() becomes True, loop exits
-                pass
-        
-        try:
-            result = task.result()
-            yield f"data: {json.dumps({'status': 'complete', 'result': result})}\n\n"
-        except Exception as e:
-            yield f"data: {json.dumps({'status': 'error', 'detail': str(e)})}\n\n"
-
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+
+    params = overview_params(request.start_date, end_date, request.search, request.category)
+
+    # Precomputed presets are answered at once, as a single final event
+    snapshot = get_snapshot(params)
+    if snapshot is not None:
+        event = {"status": "complete", "kind": "overview", "result": snapshot}
+        return StreamingResponse(
+            iter([f"data: {json.dumps(event)}\n\n"]),
+            media_type="text/event-stream",
+            headers={"X-Overview-Generated-At": snapshot["generated_at"]},
+        )
+
+    # Identical requests in flight share one job, including a preset being
+    # precomputed; the stream resumes via /api/jobs/{job_id}/events if the
+    # connection drops
+    job_id = active_job("overview_warm", params) or submit_job("overview", params)
+    return StreamingResponse(
+        job_events(job_id), media_type="text/event-stream", headers={"X-Job-Id": job_id}
+    )
 
 
 @router.post("/chat", response_model=OverviewChatResponse)
@@ -144,6 +135,7 @@ async def chat_with_overview(request: OverviewChatRequest):
             messages=api_messages,
             timeout=60,
             fallback_model=request.model,
+            caller="overview-chat",
         )
         return OverviewChatResponse(reply=reply)
     except Exception as e:
@@ -152,8 +144,9 @@ async def chat_with_overview(request: OverviewChatRequest):
 
 @router.post("/podcast")
 async def generate_podcast_audio(request: PodcastRequest):
-    """Generate a podcast MP3 from the overview markdown using edge-tts.
-    Streams SSE events with heartbeat to prevent timeouts."""
+    """Generate a podcast script from the overview markdown.
+    Runs as a background job and streams its progress as SSE. The final event
+    carries a `stream_url` that plays the audio while it is synthesized."""
     if not settings.openrouter_api_key and not settings.openai_api_key:
         raise HTTPException(
             status_code=500, detail="No API key configured for LLM provider"
@@ -164,27 +157,30 @@ async def generate_podcast_audio(request: PodcastRequest):
             status_code=400, detail="Overview markdown is too short to generate a podcast"
         )
 
-    async def event_generator():
-        task = asyncio.create_task(
-            generate_podcast(request.overview_markdown)
+    job_id = submit_job("podcast", {"overview_markdown": request.overview_markdown})
+    return StreamingResponse(
+        job_events(job_id), media_type="text/event-stream", headers={"X-Job-Id": job_id}
+    )
+
+
+@router.get("/podcast/stream/{key}")
+async def stream_podcast(key: str):
+    """Stream podcast audio chunk by chunk while it is being synthesized.
+    Falls back to the cached file once synthesis has completed."""
+    filepath = PODCAST_DIR / f"podcast_{Path(key).name}.mp3"
+    # Named so that downloading the stream saves an MP3 file
+    if filepath.exists():
+        return FileResponse(
+            path=str(filepath), media_type="audio/mpeg",
+            filename=filepath.name, content_disposition_type="inline",
         )
-        yield f"data: {json.dumps({'status': 'generating_script'})}\n\n"
-
-        while not task.done():
-            try:
-                await asyncio.wait_for(asyncio.shield(task), timeout=10.0)
-            except asyncio.TimeoutError:
-                yield f"data: {json.dumps({'status': 'processing'})}\n\n"
-            except Exception:
-                pass
-
-        try:
-            result = task.result()
-            yield f"data: {json.dumps({'status': 'complete', 'result': result})}\n\n"
-        except Exception as e:
-            yield f"data: {json.dumps({'status': 'error', 'detail': str(e)})}\n\n"
-
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+    if not has_podcast_stream(key):
+        raise HTTPException(status_code=404, detail="Podcast not found")
+
+    return StreamingResponse(
+        stream_podcast_audio(key), media_type="audio/mpeg",
+        headers={"Content-Disposition": f'inline; filename="{filepath.name}"'},
+    )
 
 
 @router.get("/podcast/{filename}")
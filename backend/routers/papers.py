@@ -1,15 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.orm import Session, defer
+from sqlalchemy import or_, select, func, literal_column
 from typing import List, Optional
-from database import get_db, SessionLocal
-from models import Paper, Author, Category
-from pydantic import BaseModel
+from database import get_db
+from models import Paper, Category, paper_author_association, paper_category_association
+from pydantic import BaseModel, TypeAdapter
 from datetime import datetime, timedelta
-from services.arxiv_service import fetch_papers_for_range
-import asyncio
-import json
+from services.author_index import resolve_author_ids
+from services.dataset_version import current_version
+from services.facet_service import date_bounds, get_facets
+from services.job_queue import submit_job, job_events
+from services.metrics import timed
+from services.response_cache import cached_response
 
 router = APIRouter()
 
@@ -30,24 +33,85 @@ class PaperResponse(BaseModel):
     published_date: datetime
     pdf_url: Optional[str]
     entry_id: str
+    full_text_status: Optional[str] = None
     authors: List[AuthorResponse]
     categories: List[CategoryResponse]
     class Config:
         from_attributes = True
 
 class PaperDetailResponse(PaperResponse):
-    full_text: Optional[str]
+    full_text: Optional[str] = None  # only with include_full_text=true
+    full_text_chars: int = 0
+
+class PaperTextResponse(BaseModel):
+    paper_id: str
+    full_text_status: Optional[str]
+    offset: int
+    limit: int
+    total_chars: int
+    total_pages: int  # of `limit` characters each
+    next_offset: Optional[int]  # None once the end of the text is reached
+    text: str
+
+class FacetCount(BaseModel):
+    name: str
+    count: int
+
+class DayCount(BaseModel):
+    date: str  # YYYY-MM-DD
+    count: int
+
+class FacetsResponse(BaseModel):
+    total: int
+    categories: List[FacetCount]
+    days: List[DayCount]
 
 class FetchRangeRequest(BaseModel):
     start_date: str  # YYYY-MM-DD
     end_date: str    # YYYY-MM-DD
     category: Optional[str] = None
 
-@router.get("/", response_model=List[PaperResponse])
-def get_papers(
-    db: Session = Depends(get_db),
-    skip: int = Query(0, ge=0),
-    limit: int = Query(20, ge=1, le=100),
+# Below this many matching rows an author/category filter drives the query
+# from the association table's reverse index and sorts the matches. Above it,
+# walking papers in date order and probing the association primary key is
+# cheaper, because it stops as soon as a page is filled.
+SELECTIVE_FILTER_ROWS = 2000
+
+
+def _filter_by_association(db: Session, query, table, column: str, ids):
+    """Restrict `query` to papers linked through `table` to any of `ids`."""
+    # Count at most SELECTIVE_FILTER_ROWS + 1 rows so broad filters stay cheap
+    sample = select(table.c.paper_id).where(table.c[column].in_(ids)).limit(SELECTIVE_FILTER_ROWS + 1)
+    matches = db.execute(select(func.count()).select_from(sample.subquery())).scalar()
+    if matches <= SELECTIVE_FILTER_ROWS:
+        return query.filter(Paper.id.in_(
+            select(table.c.paper_id).where(table.c[column].in_(ids))
+        ))
+    # "+ 0" keeps SQLite from probing the reverse index once per ID in `ids`;
+    # the probe should seek the (paper_id, ...) primary key and test the ID
+    return query.filter(
+        select(table.c.paper_id)
+        .where(table.c.paper_id == Paper.id, (table.c[column] + literal_column("0")).in_(ids))
+        .exists()
+    )
+
+
+_paper_list = TypeAdapter(List[PaperResponse])
+_paper_detail = TypeAdapter(PaperDetailResponse)
+_paper_text = TypeAdapter(PaperTextResponse)
+_facets = TypeAdapter(FacetsResponse)
+
+
+def _dump(adapter: TypeAdapter, value) -> bytes:
+    """Serialize ORM objects or dicts the way response_model would."""
+    with timed("serialize"):
+        return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+
+def query_papers(
+    db: Session,
+    skip: int = 0,
+    limit: int = 20,
     search: Optional[str] = None,
     category: Optional[str] = None,
     author: Optional[str] = None,
@@ -55,7 +119,8 @@ def get_papers(
     date: Optional[str] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None
-):
+) -> List[Paper]:
+    """One page of papers matching the listing filters, newest first."""
     query = db.query(Paper)
     
     if search:
@@ -68,11 +133,21 @@ def get_papers(
             )
         )
     
-    if category:
-        query = query.filter(Paper.categories.any(Category.name == category))
-        
+    # Author before category: SQLite evaluates the probes in this order and
+    # the author filter is almost always the more selective one
     if author:
-        query = query.filter(Paper.authors.any(Author.name.ilike(f"%{author}%")))
+        # Exact names hit the normalized-name index; anything else is a
+        # substring match through the trigram index
+        author_ids = resolve_author_ids(db, author)
+        query = _filter_by_association(
+            db, query, paper_author_association, "author_id", author_ids
+        )
+        
+    if category:
+        category_ids = select(Category.id).where(Category.name == category)
+        query = _filter_by_association(
+            db, query, paper_category_association, "category_id", category_ids
+        )
         
     if days is not None:
         cutoff = datetime.utcnow() - timedelta(days=days)
@@ -101,61 +176,169 @@ def get_papers(
         except ValueError:
             pass
         
-    papers = query.order_by(Paper.published_date.desc()).offset(skip).limit(limit).all()
+    # Pick the page of IDs first so the date-ordered scan stays inside the
+    # covering (published_date, id) index, then load only those rows
+    page_ids = (
+        query.with_entities(Paper.id)
+        .order_by(Paper.published_date.desc())
+        .offset(skip)
+        .limit(limit)
+        .subquery()
+    )
+    papers = (
+        db.query(Paper)
+        .filter(Paper.id.in_(select(page_ids.c.id)))
+        .order_by(Paper.published_date.desc())
+        .all()
+    )
     return papers
 
+
+def _cache_key(route: str, params: dict):
+    # "days" is relative to the current time, so those responses can go
+    # stale without a new dataset version and are never cached
+    if params.get("days") is not None:
+        return None
+    return (route, tuple(sorted(params.items())))
+
+
+@router.get("/", response_model=List[PaperResponse])
+def get_papers(
+    request: Request,
+    db: Session = Depends(get_db),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    search: Optional[str] = None,
+    category: Optional[str] = None,
+    author: Optional[str] = None,
+    days: Optional[int] = None,
+    date: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+):
+    params = dict(
+        skip=skip, limit=limit, search=search, category=category, author=author,
+        days=days, date=date, start_date=start_date, end_date=end_date,
+    )
+    return cached_response(
+        request, _cache_key("papers", params), current_version(db),
+        lambda: _dump(_paper_list, query_papers(db, **params)),
+    )
+
+@router.get("/facets", response_model=FacetsResponse)
+def get_paper_facets(
+    request: Request,
+    db: Session = Depends(get_db),
+    category: Optional[str] = None,
+    days: Optional[int] = None,
+    date: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+):
+    """
+    Per-category and per-day paper counts for the sidebar filters, read
+    from the facet rollups. Takes the same category and date filters as
+    the paper listing.
+    """
+    params = dict(category=category, days=days, date=date, start_date=start_date, end_date=end_date)
+    start, end = date_bounds(days, date, start_date, end_date)
+    return cached_response(
+        request, _cache_key("facets", params), current_version(db),
+        lambda: _dump(_facets, get_facets(db, category, start, end)),
+    )
+
 @router.get("/{paper_id}", response_model=PaperDetailResponse)
-def get_paper(paper_id: str, db: Session = Depends(get_db)):
-    paper = db.query(Paper).filter(Paper.id == paper_id).first()
-    if not paper:
-        raise HTTPException(status_code=404, detail="Paper not found")
-    return paper
+def get_paper(
+    paper_id: str,
+    request: Request,
+    db: Session = Depends(get_db),
+    include_full_text: bool = False,
+):
+    """
+    Paper metadata. The full text is left out unless asked for; readers
+    should page through it with GET /{paper_id}/text instead.
+    """
+    def build() -> bytes:
+        query = db.query(Paper, func.length(Paper.full_text)).filter(Paper.id == paper_id)
+        if not include_full_text:
+            query = query.options(defer(Paper.full_text))
+        row = query.first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Paper not found")
+        paper, full_text_chars = row
+        detail = PaperResponse.model_validate(paper, from_attributes=True).model_dump()
+        detail["full_text_chars"] = full_text_chars or 0
+        if include_full_text:
+            detail["full_text"] = paper.full_text
+        return _dump(_paper_detail, detail)
 
+    key = ("paper", paper_id, include_full_text)
+    return cached_response(request, key, current_version(db), build)
 
-@router.post("/fetch-range")
-async def fetch_range(request: FetchRangeRequest):
+@router.get("/{paper_id}/text", response_model=PaperTextResponse)
+def get_paper_text(
+    paper_id: str,
+    request: Request,
+    db: Session = Depends(get_db),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20_000, ge=1, le=200_000),
+    page: Optional[int] = Query(None, ge=1),
+):
     """
-    Fetch papers from ArXiv for a specific date range.
-    Streams SSE heartbeats to keep the connection alive.
+    A slice of the extracted full text: `limit` characters from `offset`,
+    or the 1-based `page` of `limit` characters. SQLite cuts the slice, so
+    the rest of the text is never loaded.
     """
-    try:
-        start_dt = datetime.strptime(request.start_date, "%Y-%m-%d")
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid start_date format, use YYYY-MM-DD")
+    if page is not None:
+        offset = (page - 1) * limit
 
-    try:
-        end_dt = datetime.strptime(request.end_date, "%Y-%m-%d")
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid end_date format, use YYYY-MM-DD")
+    def build() -> bytes:
+        row = (
+            db.query(
+                Paper.full_text_status,
+                func.length(Paper.full_text),
+                func.substr(Paper.full_text, offset + 1, limit),
+            )
+            .filter(Paper.id == paper_id)
+            .first()
+        )
+        if not row:
+            raise HTTPException(status_code=404, detail="Paper not found")
+        status, total_chars, text = row
+        total_chars, text = total_chars or 0, text or ""
+        end = offset + len(text)
+        return _dump(_paper_text, {
+            "paper_id": paper_id,
+            "full_text_status": status,
+            "offset": offset,
+            "limit": limit,
+            "total_chars": total_chars,
+            "total_pages": -(-total_chars // limit),
+            "next_offset": end if end < total_chars else None,
+            "text": text,
+        })
 
-    async def event_generator():
-        loop = asyncio.get_event_loop()
+    key = ("text", paper_id, offset, limit)
+    return cached_response(request, key, current_version(db), build)
 
-        # Run the sync fetch in a thread to avoid blocking
-        db = SessionLocal()
+
+@router.post("/fetch-range")
+async def fetch_range(request: FetchRangeRequest):
+    """
+    Fetch papers from ArXiv for a specific date range.
+    Runs as a background job and streams its progress as SSE.
+    """
+    for value, field in ((request.start_date, "start_date"), (request.end_date, "end_date")):
         try:
-            task = loop.run_in_executor(
-                None,
-                fetch_papers_for_range,
-                db, start_dt, end_dt, request.category,
-            )
+            datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid {field} format, use YYYY-MM-DD")
 
-            yield f"data: {json.dumps({'status': 'processing', 'message': 'Starting ArXiv fetch...'})}\n\n"
-
-            while not task.done():
-                try:
-                    await asyncio.wait_for(asyncio.shield(task), timeout=10.0)
-                except asyncio.TimeoutError:
-                    yield f"data: {json.dumps({'status': 'processing', 'message': 'Still fetching papers from ArXiv...'})}\n\n"
-                except Exception:
-                    pass
-
-            try:
-                new_count = task.result()
-                yield f"data: {json.dumps({'status': 'complete', 'new_papers': new_count})}\n\n"
-            except Exception as e:
-                yield f"data: {json.dumps({'status': 'error', 'detail': str(e)})}\n\n"
-        finally:
-            db.close()
-
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+    job_id = submit_job("fetch_range", {
+        "start_date": request.start_date,
+        "end_date": request.end_date,
+        "category": request.category,
+    })
+    return StreamingResponse(
+        job_events(job_id), media_type="text/event-stream", headers={"X-Job-Id": job_id}
+    )
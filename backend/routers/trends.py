@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import datetime
+from database import get_db
+from pydantic import BaseModel
+from services.trend_service import get_trends
+
+router = APIRouter()
+
+class TermTrend(BaseModel):
+    term: str
+    score: float
+    recent_count: int
+    baseline_count: int
+    growth: float  # log2 of the term's share of papers now vs then
+    counts: List[int]
+
+class CategoryTrend(BaseModel):
+    name: str
+    counts: List[int]
+    growth: float
+
+class TrendsResponse(BaseModel):
+    granularity: str
+    periods: List[str]  # period start dates, oldest first
+    paper_counts: List[int]
+    recent_periods: int = 0
+    baseline_periods: int = 0
+    categories: List[CategoryTrend]
+    emerging: List[TermTrend]
+    peaking: List[TermTrend]
+    fading: List[TermTrend]
+
+@router.get("/", response_model=TrendsResponse)
+def trends(
+    db: Session = Depends(get_db),
+    granularity: str = Query("week", pattern="^(week|month)$"),
+    periods: int = Query(12, ge=4, le=104),
+    end: Optional[str] = None,  # YYYY-MM-DD, defaults to the latest paper
+    limit: int = Query(10, ge=1, le=100),
+    min_count: int = Query(5, ge=1),
+):
+    """
+    Emerging, peaking and fading terms and category volumes per week or
+    month. The newest third of the window is compared with the rest.
+    """
+    end_day = None
+    if end:
+        try:
+            end_day = datetime.strptime(end, "%Y-%m-%d").date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid end format, use YYYY-MM-DD")
+    return get_trends(db, granularity, periods, end_day, limit, min_count)
@@ -1,41 +1,42 @@
 import arxiv
-import fitz  # PyMuPDF
-import urllib.request
 import logging
 from datetime import datetime
-from typing import Optional, List
+from typing import Callable, Optional, List
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from models import Paper, Author, Category
+from models import (
+    Paper, Author, Category, FULL_TEXT_PENDING, FULL_TEXT_UNAVAILABLE,
+    paper_author_association, paper_category_association,
+)
+from services.author_index import normalize_author_name
+from services.dataset_version import bump_version
+from services.facet_service import record_paper
+from services.trend_service import record_paper_terms
 from config import settings
+from services.extraction_service import extraction_queue
+from services.metrics import INGESTED_PAPERS
 
 logger = logging.getLogger(__name__)
 
-def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
-    try:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        text = ""
-        for page in doc:
-            text += page.get_text()
-        return text
-    except Exception as e:
-        logger.error(f"Error extracting text from PDF: {e}")
-        return ""
 
-def download_pdf(url: str) -> bytes:
-    try:
-        # arxiv urls might be http, replace to https
-        url = url.replace("http://", "https://")
-        req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, timeout=30) as response:
-            return response.read()
-    except Exception as e:
-        logger.error(f"Error downloading PDF from {url}: {e}")
-        return None
+def _arxiv_client() -> arxiv.Client:
+    """API client for settings.arxiv_api_url, which benchmarks point at a replay server."""
+    client = arxiv.Client(delay_seconds=settings.arxiv_request_delay)
+    client.query_url_format = settings.arxiv_api_url + "?{}"
+    return client
+
+
+def range_query(category: str, start_date: datetime, end_date: datetime) -> str:
+    """arXiv search query for a category's submissions between two dates, inclusive."""
+    start_str = start_date.strftime("%Y%m%d") + "0000"
+    end_str = end_date.strftime("%Y%m%d") + "2359"
+    return f"cat:{category} AND submittedDate:[{start_str} TO {end_str}]"
+
 
 def fetch_and_store_latest_papers(db: Session):
     for category_pattern in settings.arxiv_categories:
         logger.info(f"Fetching papers for category: {category_pattern}")
-        client = arxiv.Client()
+        client = _arxiv_client()
         search = arxiv.Search(
             query=f"cat:{category_pattern}",
             max_results=settings.max_papers_per_fetch,
@@ -50,7 +51,11 @@ def fetch_and_store_latest_papers(db: Session):
             continue
             
 def _store_paper(db: Session, r) -> bool:
-    """Store a single arxiv result in the database. Returns True if new paper was stored."""
+    """
+    Store a single arxiv result's metadata in the database. Returns True if
+    a new paper was stored. The PDF text is extracted later by the
+    background extraction queue, so the paper is listed immediately.
+    """
     entry_id_raw = r.entry_id
     paper_id = entry_id_raw.split('/')[-1]
     
@@ -62,51 +67,75 @@ def _store_paper(db: Session, r) -> bool:
     logger.info(f"Processing new paper: {r.title}")
     
     pdf_url = r.pdf_url
-    full_text = ""
-    if pdf_url:
-        pdf_bytes = download_pdf(pdf_url)
-        if pdf_bytes:
-            full_text = extract_text_from_pdf_bytes(pdf_bytes)
     
     new_paper = Paper(
         id=paper_id,
         title=r.title,
         abstract=r.summary,
-        full_text=full_text,
+        full_text=None,
+        full_text_status=FULL_TEXT_PENDING if pdf_url else FULL_TEXT_UNAVAILABLE,
         published_date=r.published,
         pdf_url=pdf_url,
         entry_id=entry_id_raw
     )
     
+    # The association tables are keyed on (paper, author/category), so
+    # repeats are dropped; the rest keep arXiv's order as their position
+    paper_authors: List[Author] = []
     for obj_author in r.authors:
         author_name = obj_author.name
+        if any(a.name == author_name for a in paper_authors):
+            continue
         db_author = db.query(Author).filter(Author.name == author_name).first()
         if not db_author:
-            db_author = Author(name=author_name)
+            db_author = Author(name=author_name, name_normalized=normalize_author_name(author_name))
             db.add(db_author)
-        new_paper.authors.append(db_author)
+        paper_authors.append(db_author)
         
+    paper_categories: List[Category] = []
     for cat_name in r.categories:
+        if any(c.name == cat_name for c in paper_categories):
+            continue
         db_cat = db.query(Category).filter(Category.name == cat_name).first()
         if not db_cat:
             db_cat = Category(name=cat_name)
             db.add(db_cat)
-        new_paper.categories.append(db_cat)
+        paper_categories.append(db_cat)
         
     db.add(new_paper)
     try:
+        db.flush()
+        if paper_authors:
+            db.execute(insert(paper_author_association), [
+                {"paper_id": paper_id, "author_id": a.id, "position": i}
+                for i, a in enumerate(paper_authors)
+            ])
+        if paper_categories:
+            db.execute(insert(paper_category_association), [
+                {"paper_id": paper_id, "category_id": c.id, "position": i}
+                for i, c in enumerate(paper_categories)
+            ])
+        db.expire(new_paper, ["authors", "categories"])
+        # Same transaction as the paper, so the rollups cannot drift
+        record_paper(db, new_paper)
+        record_paper_terms(db, new_paper)
+        bump_version(db)
         db.commit()
-        return True
     except Exception as e:
         db.rollback()
         logger.error(f"Error saving paper {paper_id}: {e}")
         return False
+    INGESTED_PAPERS.inc()
+
+    if pdf_url:
+        extraction_queue.enqueue(paper_id)
+    return True
 
 
 def fetch_and_store_latest_papers(db: Session):
     for category_pattern in settings.arxiv_categories:
         logger.info(f"Fetching papers for category: {category_pattern}")
-        client = arxiv.Client()
+        client = _arxiv_client()
         search = arxiv.Search(
             query=f"cat:{category_pattern}",
             max_results=settings.max_papers_per_fetch,
@@ -130,6 +159,7 @@ def fetch_papers_for_range(
     end_date: datetime,
     category: Optional[str] = None,
     max_results: int = 200,
+    on_progress: Optional[Callable[[float, str], None]] = None,
 ) -> int:
     """
     Fetch papers from ArXiv for a specific date range and store them.
@@ -138,13 +168,10 @@ def fetch_papers_for_range(
     
     If category is provided, only fetches that category.
     If category is None, iterates over all configured categories.
+    `on_progress(fraction, message)` is called before each category.
     
     Returns the count of newly stored papers.
     """
-    start_str = start_date.strftime("%Y%m%d") + "0000"
-    end_str = end_date.strftime("%Y%m%d") + "2359"
-    date_filter = f"submittedDate:[{start_str} TO {end_str}]"
-    
     # Determine which categories to query
     if category:
         categories_to_query = [category]
@@ -152,10 +179,15 @@ def fetch_papers_for_range(
         categories_to_query = settings.arxiv_categories
     
     new_count = 0
-    arxiv_client = arxiv.Client()
+    arxiv_client = _arxiv_client()
     
-    for cat in categories_to_query:
-        query_str = f"cat:{cat} AND {date_filter}"
+    for i, cat in enumerate(categories_to_query):
+        if on_progress:
+            on_progress(
+                i / len(categories_to_query),
+                f"Fetching {cat} ({i + 1}/{len(categories_to_query)}), {new_count} new so far...",
+            )
+        query_str = range_query(cat, start_date, end_date)
         logger.info(f"Fetching papers for query: {query_str}")
         
         search = arxiv.Search(
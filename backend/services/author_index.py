@@ -0,0 +1,138 @@
+"""
+Author Name Index
+
+Author lookups go through a normalized copy of the name (accents stripped,
+case-folded, punctuation collapsed) stored in `authors.name_normalized`:
+
+- Prefix matches use the B-tree index on that column as a range scan.
+- Substring matches use the `authors_fts` FTS5 trigram table, which the
+  migrations keep in sync with triggers. Where SQLite lacks FTS5 trigram
+  support, substring matches fall back to a LIKE scan.
+
+Both the typeahead endpoint and the papers author filter resolve names
+through this module.
+"""
+import logging
+import re
+import unicodedata
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, text, func, literal_column
+from sqlalchemy.orm import Session
+
+from models import Author, paper_author_association
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "authors_fts"
+TRIGRAM_MIN_CHARS = 3  # the trigram tokenizer cannot match shorter queries
+PREFIX_CANDIDATES = 50
+SUBSTRING_CANDIDATES = 100
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_fts_available: Optional[bool] = None
+
+
+def normalize_author_name(name: str) -> str:
+    """'  Müller, J.-P. ' -> 'muller j p'"""
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(" ", stripped.casefold()).strip()
+
+
+def _has_fts(db: Session) -> bool:
+    global _fts_available
+    if _fts_available is None:
+        _fts_available = db.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": FTS_TABLE},
+        ).first() is not None
+        if not _fts_available:
+            logger.warning("authors_fts is missing; substring author search will scan")
+    return _fts_available
+
+
+def _fts_phrase(query: str) -> str:
+    return '"' + query.replace('"', '""') + '"'
+
+
+def _prefix_clause(normalized: str):
+    # Range form of LIKE 'q%' so SQLite can use the index on name_normalized
+    return Author.name_normalized.between(normalized, normalized + "￿")
+
+
+def _substring_ids(db: Session, normalized: str):
+    """Select of author IDs whose normalized name contains `normalized`."""
+    if len(normalized) >= TRIGRAM_MIN_CHARS and _has_fts(db):
+        return select(literal_column("rowid")).select_from(text(FTS_TABLE)).where(
+            text(f"{FTS_TABLE} MATCH :fts_query").bindparams(fts_query=_fts_phrase(normalized))
+        )
+    return select(Author.id).where(Author.name_normalized.like(f"%{normalized}%"))
+
+
+def resolve_author_ids(db: Session, query: str):
+    """
+    Return a Select of author IDs matching `query` for the papers filter:
+    exact (normalized) name if one exists, otherwise a substring match.
+    """
+    normalized = normalize_author_name(query)
+    exact = select(Author.id).where(Author.name_normalized == normalized)
+    if db.execute(exact.limit(1)).first() is not None:
+        return exact
+    return _substring_ids(db, normalized)
+
+
+def suggest_authors(db: Session, query: str, limit: int = 10) -> List[Dict]:
+    """
+    Ranked typeahead suggestions: exact name, then name prefix, then word
+    prefix, then substring matches; ties broken by paper count.
+    """
+    normalized = normalize_author_name(query)
+    if not normalized:
+        return []
+
+    columns = (Author.id, Author.name, Author.name_normalized)
+    candidates: Dict[int, tuple] = {}
+    for author_id, name, key in db.execute(
+        select(*columns)
+        .where(_prefix_clause(normalized))
+        .order_by(Author.name_normalized)
+        .limit(PREFIX_CANDIDATES)
+    ):
+        candidates[author_id] = (name, key)
+    # Prefix matches always outrank substring matches, so the trigram pass
+    # only runs when the prefix pass cannot fill the page on its own and the
+    # query is not already a complete name
+    exact = any(key == normalized for _, key in candidates.values())
+    if len(candidates) < limit and not exact and len(normalized) >= TRIGRAM_MIN_CHARS:
+        substring_ids = _substring_ids(db, normalized).limit(SUBSTRING_CANDIDATES)
+        for author_id, name, key in db.execute(
+            select(*columns).where(Author.id.in_(substring_ids))
+        ):
+            candidates[author_id] = (name, key)
+    if not candidates:
+        return []
+
+    counts = dict(db.execute(
+        select(paper_author_association.c.author_id, func.count())
+        .where(paper_author_association.c.author_id.in_(candidates))
+        .group_by(paper_author_association.c.author_id)
+    ).all())
+
+    def _rank(item):
+        author_id, (_, key) = item
+        if key == normalized:
+            tier = 0
+        elif key.startswith(normalized):
+            tier = 1
+        elif f" {normalized}" in f" {key}":
+            tier = 2
+        else:
+            tier = 3
+        return tier, -counts.get(author_id, 0), key
+
+    ranked = sorted(candidates.items(), key=_rank)[:limit]
+    return [
+        {"id": author_id, "name": name, "paper_count": counts.get(author_id, 0)}
+        for author_id, (name, _) in ranked
+    ]
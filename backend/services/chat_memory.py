@@ -0,0 +1,179 @@
+"""
+Chat Memory
+Server-side history for paper chat sessions. Each turn sends the LLM the
+session's running summary plus the most recent messages that fit
+settings.chat_history_tokens. Once the unsummarized messages outgrow that
+budget, the oldest ones are folded into the summary by a background task
+that runs after the reply has streamed, so the prompt stays roughly the
+same size however long the conversation gets.
+"""
+import logging
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from models import ChatMessage, ChatSession
+from services.llm_service import call_llm
+from services.tokens import count_tokens, truncate_tokens
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT_SUMMARY = """You maintain the memory of a conversation between a user and an assistant
+about a research paper. Update the running summary with the new messages. Keep the user's
+questions and goals, the assistant's key answers and any facts, numbers or decisions that later
+questions may refer to. Write at most two short paragraphs. Do NOT add a heading.
+"""
+
+# Sessions this process is summarizing, so overlapping turns do not repeat the work
+_summarizing: Set[str] = set()
+
+
+def create_session(db: Session, paper_id: str) -> ChatSession:
+    session = ChatSession(id=uuid.uuid4().hex, paper_id=paper_id)
+    db.add(session)
+    db.commit()
+    return session
+
+
+def append_message(db: Session, session_id: str, role: str, content: str) -> ChatMessage:
+    """Store a message as the session's next one."""
+    return append_messages(db, session_id, [(role, content)])[0]
+
+
+def append_messages(db: Session, session_id: str, messages: List[Tuple[str, str]]) -> List[ChatMessage]:
+    """Store (role, content) messages as the session's next ones, in one transaction."""
+    for attempt in range(3):
+        seq = db.execute(
+            select(func.coalesce(func.max(ChatMessage.seq), 0) + 1)
+            .where(ChatMessage.session_id == session_id)
+        ).scalar()
+        stored = [
+            ChatMessage(
+                session_id=session_id, seq=seq + i, role=role,
+                content=content, token_count=count_tokens(content),
+            )
+            for i, (role, content) in enumerate(messages)
+        ]
+        db.add_all(stored)
+        db.execute(
+            update(ChatSession)
+            .where(ChatSession.id == session_id)
+            .values(updated_at=datetime.utcnow())
+        )
+        try:
+            db.commit()
+            return stored
+        except IntegrityError:
+            # Another request took this seq first
+            db.rollback()
+            if attempt == 2:
+                raise
+
+
+def _unsummarized(db: Session, session: ChatSession) -> List[ChatMessage]:
+    return db.execute(
+        select(ChatMessage)
+        .where(ChatMessage.session_id == session.id, ChatMessage.seq > session.summarized_seq)
+        .order_by(ChatMessage.seq)
+    ).scalars().all()
+
+
+def _newest_within(messages: List[ChatMessage], max_tokens: int) -> int:
+    """Index of the oldest message in the newest run that fits max_tokens (at least one)."""
+    start, total = len(messages), 0
+    while start > 0 and (start == len(messages) or total + messages[start - 1].token_count <= max_tokens):
+        start -= 1
+        total += messages[start].token_count
+    return start
+
+
+def history_window(db: Session, session: ChatSession, reserve_tokens: int = 0) -> List[ChatMessage]:
+    """
+    The most recent unsummarized messages that fit the history budget, less
+    `reserve_tokens` for a new message that is not stored yet.
+    """
+    messages = _unsummarized(db, session)
+    return messages[_newest_within(messages, max(settings.chat_history_tokens - reserve_tokens, 0)):]
+
+
+def build_prompt(system_prompt: str, session: ChatSession, window: List[ChatMessage]) -> List[Dict[str, str]]:
+    if session.summary:
+        system_prompt += f"\n\nSummary of the earlier conversation:\n{session.summary}"
+    return [{"role": "system", "content": system_prompt}] + [
+        {"role": m.role, "content": m.content} for m in window
+    ]
+
+
+def get_history(db: Session, session_id: str) -> Optional[dict]:
+    session = db.get(ChatSession, session_id)
+    if session is None:
+        return None
+    messages = db.execute(
+        select(ChatMessage.role, ChatMessage.content)
+        .where(ChatMessage.session_id == session_id)
+        .order_by(ChatMessage.seq)
+    ).all()
+    return {
+        "session_id": session.id,
+        "paper_id": session.paper_id,
+        "summary": session.summary,
+        "messages": [{"role": role, "content": content} for role, content in messages],
+    }
+
+
+async def summarize_if_needed(session_id: str) -> None:
+    """
+    Fold the oldest unsummarized messages into the running summary once they
+    exceed the history budget, keeping the newest half-budget verbatim.
+    """
+    if session_id in _summarizing:
+        return
+    _summarizing.add(session_id)
+    db = SessionLocal()
+    try:
+        session = db.get(ChatSession, session_id)
+        if session is None:
+            return
+        messages = _unsummarized(db, session)
+        if sum(m.token_count for m in messages) <= settings.chat_history_tokens:
+            return
+        folded = messages[:_newest_within(messages, settings.chat_history_tokens // 2)]
+        if not folded:
+            return
+        # Truncate so a single huge message cannot overflow the summary call
+        per_message = max(settings.chat_history_tokens // len(folded), 200)
+        transcript = "\n\n".join(
+            f"{m.role}: {truncate_tokens(m.content, per_message)}" for m in folded
+        )
+        user_prompt = (
+            f"Summary so far:\n{session.summary or '(none)'}\n\n"
+            f"New messages:\n{transcript}"
+        )
+        summary = await call_llm(
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT_SUMMARY},
+                {"role": "user", "content": user_prompt},
+            ],
+            timeout=60,
+            caller="chat-summary",
+        )
+        # Only apply if no other worker advanced the summary meanwhile
+        applied = db.execute(
+            update(ChatSession)
+            .where(ChatSession.id == session_id, ChatSession.summarized_seq == session.summarized_seq)
+            .values(summary=summary, summarized_seq=folded[-1].seq)
+        ).rowcount
+        db.commit()
+        if applied:
+            logger.info(f"Chat {session_id}: summarized through message {folded[-1].seq}")
+    except Exception as e:
+        logger.warning(f"Chat {session_id}: summarization failed: {e}")
+    finally:
+        _summarizing.discard(session_id)
+        db.close()
@@ -0,0 +1,22 @@
+"""
+Dataset Version
+
+A monotonically increasing counter for the paper data. Writers call
+`bump_version` inside the transaction that stores or updates papers, so
+readers in any process can tell whether cached responses are still current
+with a single-row lookup.
+"""
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+def current_version(db: Session) -> int:
+    return db.execute(text("SELECT version FROM dataset_version WHERE id = 1")).scalar() or 0
+
+
+def bump_version(db: Session) -> None:
+    """Increment the version as part of the caller's transaction."""
+    db.execute(text(
+        "INSERT INTO dataset_version (id, version) VALUES (1, 1) "
+        "ON CONFLICT (id) DO UPDATE SET version = version + 1"
+    ))
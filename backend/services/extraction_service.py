@@ -0,0 +1,362 @@
+"""
+Full-Text Extraction Service
+
+Ingestion stores paper metadata immediately and marks `full_text` as
+pending. This module downloads the PDFs and fills in the text afterwards
+on a background queue with a bounded number of workers and retries.
+"""
+import fitz  # PyMuPDF
+import hashlib
+import httpx
+import logging
+import queue
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+
+from database import SessionLocal
+from models import Paper, FULL_TEXT_PENDING, FULL_TEXT_READY, FULL_TEXT_FAILED
+from config import settings
+from services.dataset_version import bump_version
+from services.metrics import PDF_DOWNLOAD_BYTES, PDF_DOWNLOAD_SECONDS, PDF_EXTRACTION_SECONDS
+from services.pdf_cache import pdf_cache, key_for_url, UNVERSIONED
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------------------------
+# PDF download + text extraction
+#
+# PDFs are streamed to disk (into the PDF cache) instead of being held in
+# memory, and text is collected page by page so a single large paper cannot
+# spike RSS.
+# ---------------------------------------------------------------------------
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class PDFTooLargeError(Exception):
+    """Raised when a PDF exceeds settings.pdf_max_download_bytes."""
+
+
+def _extract_text(
+    doc: "fitz.Document",
+    max_pages: Optional[int],
+    max_chars: Optional[int],
+) -> str:
+    parts: List[str] = []
+    total_chars = 0
+    for page_number, page in enumerate(doc):
+        if max_pages and page_number >= max_pages:
+            break
+        page_text = page.get_text()
+        if max_chars and total_chars + len(page_text) >= max_chars:
+            parts.append(page_text[: max_chars - total_chars])
+            break
+        parts.append(page_text)
+        total_chars += len(page_text)
+    return "".join(parts)
+
+
+def extract_text_from_pdf(
+    path: Path,
+    max_pages: Optional[int] = None,
+    max_chars: Optional[int] = None,
+) -> str:
+    """Extract text from a PDF on disk, stopping at the page/character limits."""
+    max_pages = settings.pdf_max_pages if max_pages is None else max_pages
+    max_chars = settings.pdf_max_chars if max_chars is None else max_chars
+    try:
+        with fitz.open(str(path)) as doc:
+            return _extract_text(doc, max_pages, max_chars)
+    except Exception as e:
+        logger.error(f"Error extracting text from PDF {path}: {e}")
+        return ""
+
+
+def extract_text_from_pdf_bytes(
+    pdf_bytes: bytes,
+    max_pages: Optional[int] = None,
+    max_chars: Optional[int] = None,
+) -> str:
+    """Extract text from an in-memory PDF, stopping at the page/character limits."""
+    max_pages = settings.pdf_max_pages if max_pages is None else max_pages
+    max_chars = settings.pdf_max_chars if max_chars is None else max_chars
+    try:
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            return _extract_text(doc, max_pages, max_chars)
+    except Exception as e:
+        logger.error(f"Error extracting text from PDF: {e}")
+        return ""
+
+
+# ---------------------------------------------------------------------------
+# HTTP client — one pooled keep-alive client shared by all workers so PDF
+# downloads reuse connections instead of paying a TLS handshake each time.
+# ---------------------------------------------------------------------------
+_http_client: Optional[httpx.Client] = None
+_http_client_lock = threading.Lock()
+
+
+def _get_http_client() -> httpx.Client:
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                headers={"User-Agent": "Mozilla/5.0"},
+                timeout=30,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=max(settings.extraction_workers, 1) * 2,
+                    max_keepalive_connections=max(settings.extraction_workers, 1),
+                ),
+            )
+        return _http_client
+
+
+def close_http_client() -> None:
+    global _http_client
+    with _http_client_lock:
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
+
+
+def download_pdf_to_file(
+    url: str,
+    dest: BinaryIO,
+    max_bytes: Optional[int] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> Optional[Tuple[str, httpx.Headers]]:
+    """
+    Stream a PDF into an open binary file in fixed-size chunks.
+
+    Returns (sha256 of the content, response headers), or None if the server
+    answered 304 Not Modified to a conditional request.
+    Raises PDFTooLargeError as soon as the download (or its declared
+    Content-Length) exceeds max_bytes.
+    """
+    max_bytes = settings.pdf_max_download_bytes if max_bytes is None else max_bytes
+    # arxiv urls might be http, replace to https
+    if url.startswith("http://arxiv.org/"):
+        url = "https://" + url[len("http://"):]
+    started = time.perf_counter()
+    with _get_http_client().stream("GET", url, headers=headers) as response:
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        declared = response.headers.get("Content-Length")
+        if max_bytes and declared and int(declared) > max_bytes:
+            raise PDFTooLargeError(f"{url} is {declared} bytes (limit {max_bytes})")
+        digest = hashlib.sha256()
+        written = 0
+        for chunk in response.iter_bytes(DOWNLOAD_CHUNK_SIZE):
+            written += len(chunk)
+            if max_bytes and written > max_bytes:
+                raise PDFTooLargeError(f"{url} exceeded {max_bytes} bytes")
+            digest.update(chunk)
+            dest.write(chunk)
+    PDF_DOWNLOAD_BYTES.inc(written)
+    PDF_DOWNLOAD_SECONDS.observe(time.perf_counter() - started)
+    return digest.hexdigest(), response.headers
+
+
+def fetch_pdf(url: str) -> Optional[Path]:
+    """
+    Return a local path to the PDF at `url`, downloading it into the PDF
+    cache on a miss. Versioned arXiv PDFs are immutable and served straight
+    from the cache; unversioned URLs are revalidated with a conditional
+    request. Returns None if the download fails.
+    """
+    arxiv_id, version = key_for_url(url)
+    cached = pdf_cache.get(arxiv_id, version)
+    if cached and version != UNVERSIONED:
+        return cached.path
+
+    headers = {}
+    if cached and cached.etag:
+        headers["If-None-Match"] = cached.etag
+    if cached and cached.last_modified:
+        headers["If-Modified-Since"] = cached.last_modified
+
+    tmp = tempfile.NamedTemporaryFile(
+        prefix="download_", suffix=".pdf", dir=pdf_cache.tmp_dir(), delete=False
+    )
+    tmp_path = Path(tmp.name)
+    try:
+        with tmp:
+            result = download_pdf_to_file(url, tmp, headers=headers)
+        if result is None:
+            tmp_path.unlink(missing_ok=True)
+            return cached.path
+        sha256, response_headers = result
+        entry = pdf_cache.put(
+            arxiv_id,
+            version,
+            tmp_path,
+            sha256=sha256,
+            etag=response_headers.get("ETag"),
+            last_modified=response_headers.get("Last-Modified"),
+        )
+        return entry.path
+    except Exception as e:
+        tmp_path.unlink(missing_ok=True)
+        logger.error(f"Error downloading PDF from {url}: {e}")
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Background queue
+# ---------------------------------------------------------------------------
+
+class ExtractionQueue:
+    """
+    Bounded pool of worker threads that extract full text for pending papers.
+
+    Paper IDs are de-duplicated while queued or in progress. A failed
+    extraction is retried with exponential backoff until `max_retries`
+    attempts have been made, after which the paper is marked as failed.
+    Only a started queue accepts papers: in a process that is not the
+    ingest leader, new papers stay pending until the leader's periodic
+    `enqueue_pending(new_only=True)` picks them up.
+    """
+
+    def __init__(self, workers: int, max_retries: int, retry_delay: int):
+        self.workers = workers
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._queued: Set[str] = set()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._timers: List[threading.Timer] = []
+
+    def start(self) -> None:
+        """Start the workers and pick up papers left pending by a previous run."""
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker, name=f"extraction-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        count = self.enqueue_pending()
+        logger.info(
+            f"Extraction queue started with {self.workers} worker(s), "
+            f"{count} pending paper(s)"
+        )
+
+    def stop(self, timeout: float = 5.0) -> None:
+        with self._lock:
+            for timer in self._timers:
+                timer.cancel()
+            self._timers.clear()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads.clear()
+        close_http_client()
+
+    def enqueue(self, paper_id: str) -> None:
+        with self._lock:
+            if not self._threads or paper_id in self._queued:
+                return
+            self._queued.add(paper_id)
+        self._queue.put(paper_id)
+
+    def enqueue_pending(self, new_only: bool = False) -> int:
+        """
+        Queue every paper whose full text is still pending. With `new_only`,
+        skip papers that already failed once; their retry is on a timer.
+        """
+        db = SessionLocal()
+        try:
+            query = db.query(Paper.id).filter(Paper.full_text_status == FULL_TEXT_PENDING)
+            if new_only:
+                query = query.filter(func.coalesce(Paper.full_text_attempts, 0) == 0)
+            rows = query.order_by(Paper.published_date.desc()).all()
+        finally:
+            db.close()
+        for (paper_id,) in rows:
+            self.enqueue(paper_id)
+        return len(rows)
+
+    def _schedule_retry(self, paper_id: str, attempt: int) -> None:
+        delay = self.retry_delay * (2 ** (attempt - 1))
+        logger.info(f"Retrying extraction for {paper_id} in {delay}s (attempt {attempt})")
+        timer = threading.Timer(delay, self._retry, args=(paper_id,))
+        timer.daemon = True
+        with self._lock:
+            self._timers.append(timer)
+        timer.start()
+
+    def _retry(self, paper_id: str) -> None:
+        with self._lock:
+            self._timers = [t for t in self._timers if t.is_alive()]
+        self.enqueue(paper_id)
+
+    def _worker(self) -> None:
+        while True:
+            paper_id = self._queue.get()
+            try:
+                if paper_id is None:
+                    return
+                self._process(paper_id)
+            except Exception as e:
+                logger.error(f"Extraction worker error for {paper_id}: {e}")
+            finally:
+                with self._lock:
+                    self._queued.discard(paper_id)
+                self._queue.task_done()
+
+    def _process(self, paper_id: str) -> None:
+        db = SessionLocal()
+        try:
+            paper = db.get(Paper, paper_id)
+            if not paper or paper.full_text_status != FULL_TEXT_PENDING:
+                return
+
+            full_text = ""
+            pdf_path = fetch_pdf(paper.pdf_url)
+            if pdf_path:
+                started = time.perf_counter()
+                full_text = extract_text_from_pdf(pdf_path)
+                PDF_EXTRACTION_SECONDS.observe(
+                    time.perf_counter() - started, outcome="text" if full_text else "empty"
+                )
+
+            if full_text:
+                paper.full_text = full_text
+                paper.full_text_status = FULL_TEXT_READY
+                bump_version(db)
+                db.commit()
+                logger.info(f"Extracted full text for {paper_id} ({len(full_text)} chars)")
+                return
+
+            attempt = (paper.full_text_attempts or 0) + 1
+            paper.full_text_attempts = attempt
+            if attempt >= self.max_retries:
+                paper.full_text_status = FULL_TEXT_FAILED
+                bump_version(db)
+                logger.warning(f"Giving up on full text for {paper_id} after {attempt} attempt(s)")
+            db.commit()
+            if attempt < self.max_retries:
+                self._schedule_retry(paper_id, attempt)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+extraction_queue = ExtractionQueue(
+    workers=settings.extraction_workers,
+    max_retries=settings.extraction_max_retries,
+    retry_delay=settings.extraction_retry_delay,
+)
@@ -0,0 +1,143 @@
+"""
+Facet Rollups
+
+Per-day and per-(day, category) paper counts behind `GET /api/papers/facets`.
+`record_paper` increments them in the same transaction that stores a new
+paper, so they never drift from the papers table. `rebuild_facet_rollups`
+recomputes them from scratch for databases that predate the rollups.
+"""
+import logging
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from models import Paper, Category, DailyPaperCount, DailyCategoryCount
+
+logger = logging.getLogger(__name__)
+
+
+def record_paper(db: Session, paper: Paper) -> None:
+    """Count a newly stored paper. Call after flush, before commit."""
+    if paper.published_date is None:
+        return
+    day = paper.published_date.date()
+    stmt = sqlite_insert(DailyPaperCount).values(day=day, paper_count=1)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["day"],
+        set_={"paper_count": DailyPaperCount.paper_count + 1},
+    ))
+    for category in paper.categories:
+        stmt = sqlite_insert(DailyCategoryCount).values(
+            day=day, category_id=category.id, paper_count=1
+        )
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["day", "category_id"],
+            set_={"paper_count": DailyCategoryCount.paper_count + 1},
+        ))
+
+
+def rebuild_facet_rollups(conn: Connection) -> None:
+    """Recompute both rollup tables from papers and paper_category."""
+    conn.execute(text("DELETE FROM daily_paper_counts"))
+    conn.execute(text("DELETE FROM daily_category_counts"))
+    conn.execute(text(
+        "INSERT INTO daily_paper_counts (day, paper_count) "
+        "SELECT date(published_date), COUNT(*) FROM papers "
+        "WHERE published_date IS NOT NULL GROUP BY date(published_date)"
+    ))
+    conn.execute(text(
+        "INSERT INTO daily_category_counts (day, category_id, paper_count) "
+        "SELECT date(p.published_date), pc.category_id, COUNT(*) "
+        "FROM paper_category pc JOIN papers p ON p.id = pc.paper_id "
+        "WHERE p.published_date IS NOT NULL "
+        "GROUP BY date(p.published_date), pc.category_id"
+    ))
+    logger.info("Rebuilt facet rollups")
+
+
+def _parse_day(value: Optional[str]) -> Optional[date]:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date() if value else None
+    except ValueError:
+        return None
+
+
+def date_bounds(
+    days: Optional[int] = None,
+    date: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> Tuple[Optional[date], Optional[date]]:
+    """
+    Translate the listing date filters into an inclusive start day and an
+    exclusive end day. Invalid dates are ignored, as in `query_papers`.
+    """
+    start, end = None, None
+    if days is not None:
+        start = (datetime.utcnow() - timedelta(days=days)).date()
+    single = _parse_day(date)
+    if single:
+        start = max(start, single) if start else single
+        end = single + timedelta(days=1)
+    since = _parse_day(start_date)
+    if since:
+        start = max(start, since) if start else since
+    until = _parse_day(end_date)
+    if until:
+        until += timedelta(days=1)
+        end = min(end, until) if end else until
+    return start, end
+
+
+def _in_range(query, column, start: Optional[date], end: Optional[date]):
+    if start:
+        query = query.where(column >= start)
+    if end:
+        query = query.where(column < end)
+    return query
+
+
+def get_facets(
+    db: Session,
+    category: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> dict:
+    """
+    Paper counts for a filter set. The category histogram applies only the
+    date filter, so it shows what selecting each category would return; the
+    day histogram and the total apply the category filter as well.
+    """
+    category_counts = db.execute(
+        _in_range(
+            select(Category.name, func.sum(DailyCategoryCount.paper_count).label("n"))
+            .join(Category, Category.id == DailyCategoryCount.category_id),
+            DailyCategoryCount.day, start, end,
+        )
+        .group_by(DailyCategoryCount.category_id)
+        .order_by(text("n DESC"), Category.name)
+    ).all()
+
+    if category:
+        day_query = select(DailyCategoryCount.day, DailyCategoryCount.paper_count).where(
+            DailyCategoryCount.category_id == select(Category.id)
+            .where(Category.name == category)
+            .scalar_subquery()
+        )
+        day_column = DailyCategoryCount.day
+    else:
+        day_query = select(DailyPaperCount.day, DailyPaperCount.paper_count)
+        day_column = DailyPaperCount.day
+    day_counts = db.execute(
+        _in_range(day_query, day_column, start, end).order_by(day_column)
+    ).all()
+
+    return {
+        "total": sum(count for _, count in day_counts),
+        "categories": [{"name": name, "count": count} for name, count in category_counts],
+        "days": [{"date": day.isoformat(), "count": count} for day, count in day_counts],
+    }
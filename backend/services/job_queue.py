@@ -0,0 +1,547 @@
+"""
+Durable Job Queue
+
+Long-running work (research overviews, podcast scripts, arXiv range
+fetches, paper summaries) is stored as rows in the `jobs` table instead of
+living inside the request that asked for it. A pool of workers claims
+queued jobs, records progress and stores the result, so a client that
+disconnects can re-subscribe to the same job and a restarted server
+retries whatever was interrupted.
+
+Each job has a dedupe key derived from its kind and parameters. Submitting
+a job while an identical one is queued or running returns the existing job,
+so concurrent identical requests share one run.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from config import settings
+from database import SessionLocal
+from models import Job, JOB_QUEUED, JOB_RUNNING, JOB_COMPLETE, JOB_FAILED
+from services.arxiv_service import fetch_papers_for_range
+from services.metrics import BACKGROUND_JOB_SECONDS, sse_stream
+from services.overview_cache import preset_params, store_snapshot
+from services.overview_service import generate_overview
+from services.podcast_service import generate_podcast, prepare_podcast_stream
+from services.summary_service import summarize_pending_papers
+
+logger = logging.getLogger(__name__)
+
+JOB_ACTIVE = (JOB_QUEUED, JOB_RUNNING)
+# Job kinds that store papers; with ingest_mode "external" only the ingest
+# worker runs them
+INGEST_JOB_KINDS = {"fetch_range"}
+# Precomputation nobody is waiting for; workers claim these last
+BACKGROUND_JOB_KINDS = {"overview_warm", "summarize_papers"}
+HEARTBEAT_SECONDS = 10.0
+
+
+# ---------------------------------------------------------------------------
+# Submitting and reading jobs
+# ---------------------------------------------------------------------------
+
+def dedupe_key(kind: str, params: dict) -> str:
+    payload = json.dumps([kind, params], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _active_job_id(db, key: str) -> Optional[str]:
+    return db.execute(
+        select(Job.id).where(Job.dedupe_key == key, Job.status.in_(JOB_ACTIVE))
+    ).scalar()
+
+
+def submit_job(kind: str, params: dict) -> str:
+    """
+    Queue a job and return its ID. If an identical job is already queued or
+    running, its ID is returned instead and no new job is created.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    key = dedupe_key(kind, params)
+    db = SessionLocal()
+    try:
+        existing = _active_job_id(db, key)
+        if existing:
+            logger.info(f"Joining in-flight job {existing} ({kind})")
+            return existing
+        job_id = uuid.uuid4().hex
+        db.add(Job(
+            id=job_id, kind=kind, dedupe_key=key, params=json.dumps(params),
+            status=JOB_QUEUED, message="Queued",
+        ))
+        try:
+            db.commit()
+        except IntegrityError:
+            # An identical job was submitted between the lookup and the insert
+            db.rollback()
+            existing = _active_job_id(db, key)
+            if not existing:
+                raise
+            return existing
+    finally:
+        db.close()
+    logger.info(f"Queued job {job_id} ({kind})")
+    job_queue.notify()
+    return job_id
+
+
+def active_job(kind: str, params: dict) -> Optional[str]:
+    """ID of the queued or running job of this kind with these params, if any."""
+    db = SessionLocal()
+    try:
+        return _active_job_id(db, dedupe_key(kind, params))
+    finally:
+        db.close()
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        if job is None:
+            return None
+        return {
+            "id": job.id,
+            "kind": job.kind,
+            "status": job.status,
+            "progress": job.progress,
+            "message": job.message,
+            "result": json.loads(job.result) if job.result else None,
+            "error": job.error,
+            "seq": job.seq,
+            "attempts": job.attempts,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+        }
+    finally:
+        db.close()
+
+
+def _job_seq(job_id: str) -> Optional[Tuple[int, str]]:
+    db = SessionLocal()
+    try:
+        return db.execute(select(Job.seq, Job.status).where(Job.id == job_id)).first()
+    finally:
+        db.close()
+
+
+def job_event(job: dict) -> dict:
+    """
+    SSE payload for a job snapshot, in the shape the frontend already reads:
+    `processing` while active, then `complete` with a result or `error`.
+    """
+    event = {"job_id": job["id"], "kind": job["kind"]}
+    if job["status"] == JOB_COMPLETE:
+        event.update(status="complete", result=job["result"])
+    elif job["status"] == JOB_FAILED:
+        event.update(status="error", detail=job["error"])
+    else:
+        event.update(
+            status="processing",
+            state=job["status"],
+            progress=job["progress"],
+            message=job["message"],
+        )
+    return event
+
+
+async def job_events(job_id: str, last_event_id: Optional[int] = None) -> AsyncIterator[str]:
+    """
+    Stream a job as server-sent events: one event per change after
+    `last_event_id` (the client's Last-Event-ID), ending once the job has
+    finished. Idle periods are filled with comment heartbeats.
+    """
+    with sse_stream("job"):
+        last_seq = -1 if last_event_id is None else last_event_id
+        idle = 0.0
+        while True:
+            row = _job_seq(job_id)
+            if row is None:
+                return
+            seq, status = row
+            if seq > last_seq:
+                job = get_job(job_id)
+                if job is None:
+                    return
+                last_seq, idle = job["seq"], 0.0
+                yield f"id: {last_seq}\ndata: {json.dumps(job_event(job), default=str)}\n\n"
+                if job["status"] not in JOB_ACTIVE:
+                    return
+            elif status not in JOB_ACTIVE:
+                # The client already has the final event
+                return
+            elif idle >= HEARTBEAT_SECONDS:
+                idle = 0.0
+                yield ": heartbeat\n\n"
+            await asyncio.sleep(settings.job_poll_interval)
+            idle += settings.job_poll_interval
+
+
+def _update_running_job(job_id: str, worker_id: str, **values) -> bool:
+    """Update a job this worker still owns and bump its event sequence."""
+    db = SessionLocal()
+    try:
+        updated = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.worker_id == worker_id, Job.status == JOB_RUNNING)
+            .values(seq=Job.seq + 1, **values)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        return bool(updated)
+    finally:
+        db.close()
+
+
+def prune_jobs(retention_days: Optional[int] = None) -> int:
+    """Delete finished jobs older than the retention period."""
+    days = settings.job_retention_days if retention_days is None else retention_days
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    db = SessionLocal()
+    try:
+        removed = db.execute(
+            delete(Job)
+            .where(Job.status.in_((JOB_COMPLETE, JOB_FAILED)), Job.finished_at < cutoff)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        return removed
+    finally:
+        db.close()
+
+
+class JobContext:
+    """Passed to job handlers to report progress. Safe to call from threads."""
+
+    def __init__(self, job_id: str, worker_id: str):
+        self.job_id = job_id
+        self.worker_id = worker_id
+
+    def progress(self, fraction: Optional[float] = None, message: Optional[str] = None) -> None:
+        values = {}
+        if fraction is not None:
+            values["progress"] = min(max(fraction, 0.0), 1.0)
+        if message is not None:
+            values["message"] = message
+        if values:
+            _update_running_job(self.job_id, self.worker_id, **values)
+
+
+# ---------------------------------------------------------------------------
+# Worker pool
+# ---------------------------------------------------------------------------
+
+class JobQueue:
+    """
+    Pool of async workers that run jobs from the `jobs` table.
+
+    Workers run on the event loop that starts them, so async handlers share
+    the app's LLM clients and in-memory podcast streams; blocking handlers
+    run in a thread. A running job holds a lease that its worker renews
+    while the handler runs. If the process dies the lease lapses and any
+    worker retries the job, up to `max_attempts` times. `kinds` restricts
+    which job kinds this pool runs (all registered kinds by default).
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        lease_seconds: int,
+        max_attempts: int,
+        poll_interval: float,
+        kinds: Optional[Iterable[str]] = None,
+    ):
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.kinds = set(kinds) if kinds else None
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        pruned = prune_jobs()
+        for i in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker(), name=f"job-worker-{i}"))
+        logger.info(
+            f"Job queue started with {self.workers} worker(s)"
+            + (f", pruned {pruned} old job(s)" if pruned else "")
+        )
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        released = self._release()
+        if released:
+            logger.info(f"Requeued {released} interrupted job(s)")
+
+    def notify(self) -> None:
+        """Wake idle workers after a submission from this process."""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _claimable(self, now: datetime):
+        condition = or_(
+            Job.status == JOB_QUEUED,
+            and_(Job.status == JOB_RUNNING, Job.lease_expires_at < now),
+        )
+        if self.kinds:
+            condition = and_(condition, Job.kind.in_(self.kinds))
+        return condition
+
+    def _claim(self) -> Optional[Tuple[str, str, dict, int]]:
+        """Atomically take the oldest claimable job, or return None."""
+        now = datetime.utcnow()
+        claimable = self._claimable(now)
+        db = SessionLocal()
+        try:
+            candidate = (
+                select(Job.id).where(claimable)
+                .order_by(Job.kind.in_(BACKGROUND_JOB_KINDS), Job.created_at).limit(1)
+                .scalar_subquery()
+            )
+            row = db.execute(
+                update(Job)
+                .where(Job.id == candidate, claimable)
+                .values(
+                    status=JOB_RUNNING,
+                    worker_id=self.worker_id,
+                    attempts=Job.attempts + 1,
+                    lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+                    started_at=func.coalesce(Job.started_at, now),
+                    message="Running",
+                    seq=Job.seq + 1,
+                )
+                .returning(Job.id, Job.kind, Job.params, Job.attempts)
+                .execution_options(synchronize_session=False)
+            ).first()
+            db.commit()
+        finally:
+            db.close()
+        if row is None:
+            return None
+        job_id, kind, params, attempts = row
+        return job_id, kind, json.loads(params), attempts
+
+    def _renew(self, job_id: str) -> None:
+        lease = datetime.utcnow() + timedelta(seconds=self.lease_seconds)
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.worker_id == self.worker_id)
+                .values(lease_expires_at=lease)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _finish(self, job_id: str, result: Optional[dict] = None, error: Optional[str] = None) -> None:
+        values = {"finished_at": datetime.utcnow(), "lease_expires_at": None}
+        if error is None:
+            values.update(
+                status=JOB_COMPLETE, progress=1.0, message="Complete",
+                result=json.dumps(result, default=str),
+            )
+        else:
+            values.update(status=JOB_FAILED, message="Failed", error=error)
+        if not _update_running_job(job_id, self.worker_id, **values):
+            logger.warning(f"Job {job_id} was taken over by another worker, result discarded")
+
+    def _release(self) -> int:
+        """Hand this pool's running jobs back to the queue on shutdown."""
+        db = SessionLocal()
+        try:
+            released = db.execute(
+                update(Job)
+                .where(Job.worker_id == self.worker_id, Job.status == JOB_RUNNING)
+                .values(
+                    status=JOB_QUEUED,
+                    worker_id=None,
+                    lease_expires_at=None,
+                    attempts=Job.attempts - 1,  # an orderly shutdown is not a failure
+                    message="Requeued",
+                    seq=Job.seq + 1,
+                )
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            return released
+        finally:
+            db.close()
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                claimed = self._claim()
+            except Exception as e:
+                logger.error(f"Job queue claim failed: {e}")
+                claimed = None
+            if claimed is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+            try:
+                await self._run(*claimed)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job worker error for {claimed[0]}: {e}")
+
+    async def _run(self, job_id: str, kind: str, params: dict, attempt: int) -> None:
+        if attempt > self.max_attempts:
+            logger.warning(f"Giving up on job {job_id} ({kind}) after {attempt - 1} attempt(s)")
+            self._finish(job_id, error=f"Job was interrupted {attempt - 1} time(s), giving up")
+            return
+        handler = HANDLERS.get(kind)
+        if handler is None:
+            self._finish(job_id, error=f"Unknown job kind: {kind}")
+            return
+
+        logger.info(f"Running job {job_id} ({kind}), attempt {attempt}")
+        started = time.perf_counter()
+        ctx = JobContext(job_id, self.worker_id)
+        if asyncio.iscoroutinefunction(handler):
+            task = asyncio.ensure_future(handler(params, ctx))
+        else:
+            task = asyncio.ensure_future(asyncio.to_thread(handler, params, ctx))
+
+        # Renew the lease while the handler runs
+        try:
+            while not task.done():
+                try:
+                    await asyncio.wait_for(asyncio.shield(task), timeout=self.lease_seconds / 3)
+                except asyncio.TimeoutError:
+                    self._renew(job_id)
+                except Exception:
+                    # The handler failed; task.result() below reports it
+                    pass
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+
+        try:
+            result = task.result()
+        except Exception as e:
+            logger.error(f"Job {job_id} ({kind}) failed: {e}")
+            self._finish(job_id, error=str(e))
+            status = JOB_FAILED
+        else:
+            logger.info(f"Job {job_id} ({kind}) complete")
+            self._finish(job_id, result=result)
+            status = JOB_COMPLETE
+        BACKGROUND_JOB_SECONDS.observe(time.perf_counter() - started, kind=kind, status=status)
+
+
+# ---------------------------------------------------------------------------
+# Job handlers
+#
+# Handlers take the job's params and a JobContext and return a JSON-ready
+# result. Coroutine handlers run on the worker's event loop, plain
+# functions in a thread.
+# ---------------------------------------------------------------------------
+
+def _parse_day(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%d")
+
+
+async def run_overview_job(params: dict, ctx: JobContext) -> dict:
+    db = SessionLocal()
+    try:
+        return await generate_overview(
+            db,
+            _parse_day(params["start_date"]),
+            _parse_day(params["end_date"]) + timedelta(days=1),
+            search=params.get("search"),
+            category=params.get("category"),
+            on_progress=ctx.progress,
+        )
+    finally:
+        db.close()
+
+
+async def run_overview_warm_job(params: dict, ctx: JobContext) -> dict:
+    """Generate a preset's overview (and podcast) and store it as a snapshot."""
+    result = await run_overview_job(params, ctx)
+    podcast = None
+    if settings.overview_warm_podcasts and result["paper_count"]:
+        ctx.progress(None, "Generating podcast")
+        podcast = await generate_podcast(result["markdown"])
+    store_snapshot(params, result, podcast)
+    return {**result, "podcast": podcast} if podcast else result
+
+
+async def run_summarize_job(params: dict, ctx: JobContext) -> dict:
+    """
+    Summarize the pending papers. With `warm_overviews`, queue the overview
+    presets afterwards so their snapshots are built from the summaries.
+    """
+    try:
+        return await summarize_pending_papers(on_progress=ctx.progress)
+    finally:
+        if params.get("warm_overviews"):
+            for preset in preset_params():
+                submit_job("overview_warm", preset)
+
+
+async def run_podcast_job(params: dict, ctx: JobContext) -> dict:
+    ctx.progress(0.0, "Writing podcast script")
+    return await prepare_podcast_stream(params["overview_markdown"])
+
+
+def run_fetch_range_job(params: dict, ctx: JobContext) -> dict:
+    db = SessionLocal()
+    try:
+        new_papers = fetch_papers_for_range(
+            db,
+            _parse_day(params["start_date"]),
+            _parse_day(params["end_date"]),
+            params.get("category"),
+            on_progress=ctx.progress,
+        )
+    finally:
+        db.close()
+    return {"new_papers": new_papers}
+
+
+HANDLERS: Dict[str, Callable] = {
+    "overview": run_overview_job,
+    "overview_warm": run_overview_warm_job,
+    "podcast": run_podcast_job,
+    "summarize_papers": run_summarize_job,
+    "fetch_range": run_fetch_range_job,
+}
+
+
+job_queue = JobQueue(
+    workers=settings.job_workers,
+    lease_seconds=settings.job_lease_seconds,
+    max_attempts=settings.job_max_attempts,
+    poll_interval=settings.job_poll_interval,
+    kinds=None if settings.ingest_mode == "embedded" else set(HANDLERS) - INGEST_JOB_KINDS,
+)
@@ -0,0 +1,127 @@
+"""
+Leader Election
+
+A named lease in the `leases` table that one process holds at a time.
+Every API worker and the standalone ingest worker compete for the "ingest"
+lease, and only the holder runs the arXiv scheduler and the extraction
+queue, so running uvicorn with N workers does not multiply ingestion.
+
+The holder renews the lease every `ttl / 3` seconds. If it dies, the lease
+expires after `ttl` seconds and the next process to try takes over.
+"""
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from database import SessionLocal
+from models import Lease
+
+logger = logging.getLogger(__name__)
+
+
+def try_acquire_lease(name: str, holder: str, ttl: float) -> bool:
+    """Take or renew a lease. Returns True if `holder` now holds it."""
+    now = datetime.utcnow()
+    stmt = sqlite_insert(Lease).values(
+        name=name, holder=holder, expires_at=now + timedelta(seconds=ttl)
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["name"],
+        set_={"holder": stmt.excluded.holder, "expires_at": stmt.excluded.expires_at},
+        where=(Lease.holder == stmt.excluded.holder) | (Lease.expires_at < now),
+    )
+    db = SessionLocal()
+    try:
+        db.execute(stmt)
+        current = db.execute(select(Lease.holder).where(Lease.name == name)).scalar()
+        db.commit()
+        return current == holder
+    finally:
+        db.close()
+
+
+def release_lease(name: str, holder: str) -> None:
+    db = SessionLocal()
+    try:
+        db.query(Lease).filter(Lease.name == name, Lease.holder == holder).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+class LeaderElection:
+    """
+    Background thread that keeps trying to hold a lease. `on_elected` runs
+    when this process becomes leader and `on_demoted` when it stops being
+    leader, whether it lost the lease or is shutting down.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float,
+        on_elected: Callable[[], None],
+        on_demoted: Callable[[], None],
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=f"leader-{self.name}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        if not self._thread:
+            return
+        self._stop.set()
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        try:
+            while not self._stop.is_set():
+                try:
+                    leader = try_acquire_lease(self.name, self.holder, self.ttl)
+                except Exception as e:
+                    # A lease we cannot renew may be taken over, so step down
+                    logger.error(f"Lease '{self.name}' check failed: {e}")
+                    leader = False
+                if leader and not self.is_leader:
+                    logger.info(f"Acquired lease '{self.name}' as {self.holder}")
+                    self.is_leader = True
+                    self._call(self.on_elected)
+                elif not leader and self.is_leader:
+                    logger.warning(f"Lost lease '{self.name}', stepping down")
+                    self.is_leader = False
+                    self._call(self.on_demoted)
+                self._stop.wait(timeout=self.ttl / 3)
+        finally:
+            if self.is_leader:
+                self.is_leader = False
+                self._call(self.on_demoted)
+                release_lease(self.name, self.holder)
+                logger.info(f"Released lease '{self.name}'")
+
+    def _call(self, callback: Callable[[], None]) -> None:
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"Lease '{self.name}' callback {callback.__name__} failed: {e}")
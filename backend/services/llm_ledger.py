@@ -0,0 +1,133 @@
+"""
+LLM Usage Ledger
+One row per `call_llm` / `stream_llm` invocation: the caller tag, the
+provider and model that served it, prompt and completion tokens, time to
+first token, total latency, primary attempts and fallback use. Rows are
+written on a worker thread so recording never delays a response, and
+`llm_stats` aggregates them per caller and provider for
+GET /api/admin/llm-stats.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from models import LlmCall
+from services.metrics import LLM_CALL_SECONDS, add_timing
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (50, 95, 99)
+
+
+def _insert(row: dict) -> None:
+    db = SessionLocal()
+    try:
+        db.add(LlmCall(**row))
+        db.commit()
+    except Exception as e:
+        logger.warning(f"Could not record LLM call: {e}")
+    finally:
+        db.close()
+
+
+def record_call(
+    caller: str,
+    provider: str,
+    model: str,
+    latency: float,
+    prompt_tokens: Optional[int] = None,
+    completion_tokens: Optional[int] = None,
+    ttft: Optional[float] = None,
+    attempts: int = 0,
+    fallback: bool = False,
+    streamed: bool = False,
+    error: Optional[str] = None,
+) -> None:
+    """Queue a ledger row; returns immediately."""
+    LLM_CALL_SECONDS.observe(latency, caller=caller, provider=provider, status="error" if error else "ok")
+    add_timing("llm", latency)
+    row = {
+        "created_at": datetime.utcnow(),
+        "caller": caller,
+        "provider": provider,
+        "model": model,
+        "streamed": streamed,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "ttft": ttft,
+        "latency": latency,
+        "attempts": attempts,
+        "fallback": fallback,
+        "error": error[:500] if error else None,
+    }
+    try:
+        asyncio.get_running_loop().run_in_executor(None, _insert, row)
+    except RuntimeError:
+        # Called outside an event loop
+        _insert(row)
+
+
+def prune_llm_calls(retention_days: Optional[int] = None) -> int:
+    """Delete ledger rows older than the retention period."""
+    days = settings.llm_ledger_retention_days if retention_days is None else retention_days
+    db = SessionLocal()
+    try:
+        removed = db.execute(
+            delete(LlmCall)
+            .where(LlmCall.created_at < datetime.utcnow() - timedelta(days=days))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        return removed
+    finally:
+        db.close()
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {f"p{p}": None for p in PERCENTILES}
+    return {
+        f"p{p}": round(float(v), 3)
+        for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))
+    }
+
+
+def llm_stats(db: Session, since: datetime) -> List[dict]:
+    """Calls since `since` aggregated per (caller, provider), busiest first."""
+    rows = db.execute(
+        select(
+            LlmCall.caller, LlmCall.provider, LlmCall.prompt_tokens,
+            LlmCall.completion_tokens, LlmCall.ttft, LlmCall.latency,
+            LlmCall.attempts, LlmCall.fallback, LlmCall.error,
+        ).where(LlmCall.created_at >= since)
+    ).all()
+
+    groups: Dict[Tuple[str, str], list] = defaultdict(list)
+    for row in rows:
+        groups[(row.caller, row.provider)].append(row)
+
+    stats = []
+    for (caller, provider), calls in groups.items():
+        ok = [c for c in calls if c.error is None]
+        stats.append({
+            "caller": caller,
+            "provider": provider,
+            "calls": len(calls),
+            "errors": len(calls) - len(ok),
+            "fallbacks": sum(1 for c in calls if c.fallback),
+            "retries": sum(max(c.attempts - 1, 0) for c in calls),
+            "prompt_tokens": sum(c.prompt_tokens or 0 for c in ok),
+            "completion_tokens": sum(c.completion_tokens or 0 for c in ok),
+            "latency_seconds": _percentiles([c.latency for c in ok]),
+            "ttft_seconds": _percentiles([c.ttft for c in ok if c.ttft is not None]),
+        })
+    stats.sort(key=lambda s: s["calls"], reverse=True)
+    return stats
@@ -4,16 +4,25 @@ Centralized LLM Service
 Primary:  OpenAI-compatible API (AcademicCloud) – 3 retries
 Fallback: OpenRouter (free tier)
 
+Streaming can instead hedge (settings.chat_hedging): the fallback starts
+only if the primary is slow to its first token, and the first to stream wins.
+
+Every invocation is recorded in the usage ledger under a caller tag.
+
 Every module should call `call_llm()` or `stream_llm()` instead of
 constructing its own clients.
 """
 import asyncio
 import logging
-from typing import List, Dict, Optional, AsyncIterator
+import time
+from typing import List, Dict, Optional, AsyncIterator, Tuple
 
-from openai import AsyncOpenAI
+from openai import APITimeoutError, AsyncOpenAI
 
 from config import settings
+from services.llm_ledger import record_call
+from services.model_registry import model_registry
+from services.tokens import count_tokens
 
 logger = logging.getLogger(__name__)
 
@@ -47,13 +56,47 @@ def _get_fallback_client() -> AsyncOpenAI:
     global _fallback_client
     if _fallback_client is None:
         _fallback_client = AsyncOpenAI(
-            base_url="https://openrouter.ai/api/v1",
+            base_url=settings.openrouter_base_url.rstrip("/"),
             api_key=settings.openrouter_api_key,
         )
         logger.info("Fallback LLM client configured: OpenRouter")
     return _fallback_client
 
 
+def model_chain(fallback_model: Optional[str] = None) -> List[str]:
+    """Models `call_llm` tries, in order."""
+    chain = [settings.openai_model] if _get_primary_client() else []
+    return chain + [fallback_model or settings.overview_model]
+
+
+def _prompt_tokens(messages: List[Dict[str, str]]) -> int:
+    """Estimate for providers that report no usage."""
+    return sum(count_tokens(m["content"]) for m in messages)
+
+
+async def _complete(
+    client: AsyncOpenAI, model: str, messages: List[Dict[str, str]], timeout: int
+) -> Tuple[str, int, int]:
+    """
+    One chat completion, recording its latency in the model registry.
+    Returns (content, prompt_tokens, completion_tokens).
+    """
+    started = time.perf_counter()
+    completion = await client.chat.completions.create(
+        model=model,
+        messages=messages,
+        timeout=timeout,
+    )
+    content = completion.choices[0].message.content
+    usage = completion.usage
+    if usage is None:
+        return content, _prompt_tokens(messages), count_tokens(content or "")
+    model_registry.record(
+        model, usage.prompt_tokens, usage.completion_tokens, time.perf_counter() - started
+    )
+    return content, usage.prompt_tokens, usage.completion_tokens
+
+
 # ---------------------------------------------------------------------------
 # Non-streaming call  (overview, podcast, overview-chat, paper-summarize)
 # ---------------------------------------------------------------------------
@@ -62,6 +105,7 @@ async def call_llm(
     messages: List[Dict[str, str]],
     timeout: int = 120,
     fallback_model: Optional[str] = None,
+    caller: str = "unknown",
 ) -> str:
     """
     Call the LLM with automatic retry + fallback.
@@ -74,29 +118,35 @@ async def call_llm(
         timeout:        Per-request timeout in seconds.
         fallback_model: Model ID to use on OpenRouter fallback.
                         Defaults to settings.overview_model.
+        caller:         Tag the call is recorded under in the usage ledger.
 
     Returns:
         The assistant's response text.
     """
     fb_model = fallback_model or settings.overview_model
     primary = _get_primary_client()
+    started = time.perf_counter()
+    attempts = 0
 
     # ---- Primary with retries ----
     if primary:
         last_err = None
         for attempt in range(1, PRIMARY_MAX_RETRIES + 1):
+            attempts = attempt
             try:
                 logger.info(
                     f"[LLM] Primary attempt {attempt}/{PRIMARY_MAX_RETRIES} "
                     f"model={settings.openai_model}"
                 )
-                completion = await primary.chat.completions.create(
-                    model=settings.openai_model,
-                    messages=messages,
-                    timeout=timeout,
+                content, prompt_tokens, completion_tokens = await _complete(
+                    primary, settings.openai_model, messages, timeout
                 )
                 logger.info("[LLM] Primary succeeded")
-                return completion.choices[0].message.content
+                record_call(
+                    caller, "primary", settings.openai_model, time.perf_counter() - started,
+                    prompt_tokens, completion_tokens, attempts=attempts,
+                )
+                return content
             except Exception as e:
                 last_err = e
                 logger.warning(
@@ -112,30 +162,204 @@ async def call_llm(
     # ---- Fallback ----
     fallback = _get_fallback_client()
     logger.info(f"[LLM] Fallback call: model={fb_model}")
-    completion = await fallback.chat.completions.create(
-        model=fb_model,
-        messages=messages,
-        timeout=timeout,
-    )
+    try:
+        content, prompt_tokens, completion_tokens = await _complete(
+            fallback, fb_model, messages, timeout
+        )
+    except Exception as e:
+        record_call(
+            caller, "openrouter", fb_model, time.perf_counter() - started,
+            attempts=attempts, fallback=primary is not None, error=str(e),
+        )
+        raise
     logger.info("[LLM] Fallback succeeded")
-    return completion.choices[0].message.content
+    record_call(
+        caller, "openrouter", fb_model, time.perf_counter() - started,
+        prompt_tokens, completion_tokens, attempts=attempts, fallback=primary is not None,
+    )
+    return content
 
 
 # ---------------------------------------------------------------------------
 # Streaming call  (chat with paper)
+#
+# Streams are opened by reading up to their first content chunk, so time to
+# first token (TTFT) can be recorded per model and, in hedging mode, two
+# providers can race for it.
 # ---------------------------------------------------------------------------
 
-async def stream_llm(
+DEFAULT_HEDGE_DELAY = 2.0  # seconds, until the primary has TTFT samples
+
+
+class _OpenedStream:
+    """A stream whose leading chunks, up to the first content, are already read."""
+
+    def __init__(self, provider: str, model: str, stream, head: list, ttft: float):
+        self.provider = provider
+        self.model = model
+        self.stream = stream
+        self.head = head
+        self.ttft = ttft
+
+    async def chunks(self) -> AsyncIterator:
+        try:
+            for chunk in self.head:
+                yield chunk
+            async for chunk in self.stream:
+                yield chunk
+        finally:
+            await self.stream.close()
+
+
+async def _open_stream(
+    client: AsyncOpenAI, provider: str, model: str, messages: List[Dict[str, str]], timeout: int
+) -> _OpenedStream:
+    started = time.perf_counter()
+    stream = None
+    head = []
+    try:
+        stream = await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            stream=True,
+            timeout=timeout,
+        )
+        while True:
+            try:
+                chunk = await stream.__anext__()
+            except StopAsyncIteration:
+                break
+            head.append(chunk)
+            if chunk.choices and chunk.choices[0].delta.content:
+                break
+    except BaseException as e:
+        # Includes cancellation of a hedge loser
+        if stream is not None:
+            await stream.close()
+        if isinstance(e, (asyncio.CancelledError, APITimeoutError)):
+            # Censored sample: the first token would have taken at least this
+            # long. Without it the slow opens that lose a hedge are never
+            # sampled and the p95 hedge delay keeps falling.
+            model_registry.record_ttft(model, time.perf_counter() - started)
+        raise
+    ttft = time.perf_counter() - started
+    model_registry.record_ttft(model, ttft)
+    return _OpenedStream(provider, model, stream, head, ttft)
+
+
+def hedge_delay() -> float:
+    """Seconds to wait for the primary's first token before starting the fallback."""
+    if settings.chat_hedge_delay > 0:
+        return settings.chat_hedge_delay
+    p95 = model_registry.ttft_quantile(settings.openai_model, 0.95)
+    return p95 if p95 is not None else DEFAULT_HEDGE_DELAY
+
+
+async def _close_task(task: asyncio.Task) -> None:
+    """Cancel a losing open, or close its stream if it already opened."""
+    if not task.done():
+        task.cancel()
+    try:
+        opened = await task
+    except BaseException:
+        return
+    await opened.stream.close()
+
+
+async def _hedged_stream(
+    primary: AsyncOpenAI,
     messages: List[Dict[str, str]],
-    timeout: int = 120,
-    fallback_model: str = "openrouter/auto",
-) -> AsyncIterator:
+    timeout: int,
+    fallback_model: str,
+) -> _OpenedStream:
+    """
+    Open the primary stream; if it has no first token within hedge_delay()
+    (or fails), open the fallback as well and keep whichever streams first.
     """
-    Stream the LLM response with retry + fallback.
+    primary_task = asyncio.create_task(
+        _open_stream(primary, "primary", settings.openai_model, messages, timeout)
+    )
+    done, _ = await asyncio.wait({primary_task}, timeout=hedge_delay())
+    if primary_task in done and primary_task.exception() is None:
+        return primary_task.result()
 
-    Returns an async iterator of chat completion chunks.
+    logger.info(f"[LLM-stream] Hedging: starting fallback model={fallback_model}")
+    fallback_task = asyncio.create_task(
+        _open_stream(_get_fallback_client(), "openrouter", fallback_model, messages, timeout)
+    )
+    pending = {primary_task, fallback_task}
+    last_err = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    last_err = task.exception()
+                    logger.warning(f"[LLM-stream] Hedged attempt failed: {last_err}")
+                    continue
+                winner = task.result()
+                loser = fallback_task if task is primary_task else primary_task
+                # A loser that had already failed was not racing
+                raced = not loser.done() or loser.exception() is None
+                await _close_task(loser)
+                if raced:
+                    model_registry.record_hedge(winner.model, won=True)
+                    model_registry.record_hedge(
+                        fallback_model if winner.model == settings.openai_model else settings.openai_model,
+                        won=False,
+                    )
+                logger.info(f"[LLM-stream] Hedge won by model={winner.model} ttft={winner.ttft:.2f}s")
+                return winner
+    finally:
+        # The request itself may be cancelled (client disconnect)
+        for task in (primary_task, fallback_task):
+            if not task.done():
+                await _close_task(task)
+    raise last_err
+
+
+async def _recorded(
+    opened: _OpenedStream,
+    messages: List[Dict[str, str]],
+    caller: str,
+    started: float,
+    attempts: int,
+    fallback: bool,
+) -> AsyncIterator:
     """
-    primary = _get_primary_client()
+    Relay an opened stream, then record it in the usage ledger. TTFT here
+    runs from the stream_llm call, so it includes retries and hedging.
+    """
+    parts, usage, error, ttft = [], None, None, None
+    try:
+        async for chunk in opened.chunks():
+            if ttft is None:
+                ttft = time.perf_counter() - started
+            usage = getattr(chunk, "usage", None) or usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+            yield chunk
+    except Exception as e:
+        error = str(e)
+        raise
+    finally:
+        record_call(
+            caller, opened.provider, opened.model, time.perf_counter() - started,
+            usage.prompt_tokens if usage else _prompt_tokens(messages),
+            usage.completion_tokens if usage else count_tokens("".join(parts)),
+            ttft=ttft, attempts=attempts, fallback=fallback, streamed=True, error=error,
+        )
+
+
+async def _open_with_fallback(
+    primary: Optional[AsyncOpenAI],
+    messages: List[Dict[str, str]],
+    timeout: int,
+    fallback_model: str,
+) -> Tuple[_OpenedStream, int]:
+    """Open a stream as stream_llm describes. Returns it and the number of primary attempts."""
+    if primary and settings.chat_hedging:
+        return await _hedged_stream(primary, messages, timeout, fallback_model), 1
 
     # ---- Primary with retries ----
     if primary:
@@ -146,14 +370,9 @@ async def stream_llm(
                     f"[LLM-stream] Primary attempt {attempt}/{PRIMARY_MAX_RETRIES} "
                     f"model={settings.openai_model}"
                 )
-                stream = await primary.chat.completions.create(
-                    model=settings.openai_model,
-                    messages=messages,
-                    stream=True,
-                    timeout=timeout,
-                )
-                # Yield the first chunk to verify it works, then yield rest
-                return stream
+                # Reading up to the first token also verifies that the stream works
+                opened = await _open_stream(primary, "primary", settings.openai_model, messages, timeout)
+                return opened, attempt
             except Exception as e:
                 last_err = e
                 logger.warning(
@@ -169,10 +388,35 @@ async def stream_llm(
     # ---- Fallback ----
     fallback = _get_fallback_client()
     logger.info(f"[LLM-stream] Fallback call: model={fallback_model}")
-    stream = await fallback.chat.completions.create(
-        model=fallback_model,
-        messages=messages,
-        stream=True,
-        timeout=timeout,
+    opened = await _open_stream(fallback, "openrouter", fallback_model, messages, timeout)
+    return opened, PRIMARY_MAX_RETRIES if primary else 0
+
+
+async def stream_llm(
+    messages: List[Dict[str, str]],
+    timeout: int = 120,
+    fallback_model: str = "openrouter/auto",
+    caller: str = "unknown",
+) -> AsyncIterator:
+    """
+    Stream the LLM response with retry + fallback, or with hedging when
+    settings.chat_hedging is on.
+
+    Returns an async iterator of chat completion chunks.
+    """
+    primary = _get_primary_client()
+    started = time.perf_counter()
+    try:
+        opened, attempts = await _open_with_fallback(primary, messages, timeout, fallback_model)
+    except Exception as e:
+        # Every path to here exhausted the primary attempts and the fallback
+        attempts = (1 if settings.chat_hedging else PRIMARY_MAX_RETRIES) if primary else 0
+        record_call(
+            caller, "openrouter", fallback_model, time.perf_counter() - started,
+            attempts=attempts, fallback=primary is not None, streamed=True, error=str(e),
+        )
+        raise
+    return _recorded(
+        opened, messages, caller, started, attempts,
+        fallback=primary is not None and opened.provider == "openrouter",
     )
-    return stream
@@ -0,0 +1,314 @@
+"""
+Metrics
+Counters, gauges and histograms rendered in the Prometheus text format at
+GET /metrics, plus per-request Server-Timing headers. Values live in the
+process that records them: with several API workers each scrape reports
+the worker that answered it, and `python -m ingest` serves its own on
+INGEST_METRICS_PORT.
+
+Server-Timing is collected in a context variable that MetricsMiddleware
+sets per request. Sync endpoints run in a copy of that context, so DB
+queries, serialization and LLM calls made on their behalf are attributed
+to the request that caused them.
+"""
+import http.server
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUERY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+JOB_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+
+# ---------------------------------------------------------------------------
+# Metric types
+# ---------------------------------------------------------------------------
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names: Tuple[str, ...], values: Tuple[str, ...], le: Optional[str] = None) -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if le is not None:
+        parts.append(f'le="{le}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def _samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        if not self.labels:
+            self._values[()] = 0.0
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> Iterator[str]:
+        for key, value in self._values.items():
+            yield f"{self.name}{_label_str(self.labels, key)} {value}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        # key -> (per-bucket counts, sum, count)
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def _samples(self) -> Iterator[str]:
+        for key, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                yield f"{self.name}_bucket{_label_str(self.labels, key, str(bound))} {cumulative}"
+            yield f"{self.name}_bucket{_label_str(self.labels, key, '+Inf')} {count}"
+            yield f"{self.name}_sum{_label_str(self.labels, key)} {total}"
+            yield f"{self.name}_count{_label_str(self.labels, key)} {count}"
+
+
+REGISTRY: List[_Metric] = []
+
+
+def render() -> str:
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template; streamed responses run until the stream ends",
+    ("method", "route", "status"),
+)
+SSE_STREAMS_ACTIVE = Gauge("sse_streams_active", "Server-sent event streams currently open", ("stream",))
+SSE_STREAMS_TOTAL = Counter("sse_streams_total", "Server-sent event streams opened", ("stream",))
+INGESTED_PAPERS = Counter("ingest_papers_total", "New papers stored from arXiv")
+PDF_DOWNLOAD_BYTES = Counter("pdf_download_bytes_total", "PDF bytes downloaded")
+PDF_DOWNLOAD_SECONDS = Histogram("pdf_download_duration_seconds", "PDF download time")
+PDF_EXTRACTION_SECONDS = Histogram(
+    "pdf_extraction_duration_seconds", "Full-text extraction time per PDF", ("outcome",)
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "Database statement latency", ("statement",), buckets=QUERY_BUCKETS
+)
+SCHEDULER_JOB_SECONDS = Histogram(
+    "scheduler_job_duration_seconds", "Duration of scheduled ingestion jobs", ("job", "status"),
+    buckets=JOB_BUCKETS,
+)
+BACKGROUND_JOB_SECONDS = Histogram(
+    "background_job_duration_seconds", "Duration of queued background jobs", ("kind", "status"),
+    buckets=JOB_BUCKETS,
+)
+LLM_CALL_SECONDS = Histogram(
+    "llm_call_duration_seconds", "LLM call latency including retries", ("caller", "provider", "status"),
+)
+
+
+@contextmanager
+def sse_stream(stream: str) -> Iterator[None]:
+    """Count a server-sent event stream while it is open."""
+    SSE_STREAMS_TOTAL.inc(stream=stream)
+    SSE_STREAMS_ACTIVE.inc(stream=stream)
+    try:
+        yield
+    finally:
+        SSE_STREAMS_ACTIVE.dec(stream=stream)
+
+
+def timed_job(name: str, func: Callable) -> Callable:
+    """Wrap a scheduler job so its runs are timed."""
+    def run(*args, **kwargs):
+        started = time.perf_counter()
+        status = "error"
+        try:
+            result = func(*args, **kwargs)
+            status = "ok"
+            return result
+        finally:
+            SCHEDULER_JOB_SECONDS.observe(time.perf_counter() - started, job=name, status=status)
+    return run
+
+
+# ---------------------------------------------------------------------------
+# Server-Timing
+# ---------------------------------------------------------------------------
+
+class RequestTiming:
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+        self.db_queries = 0
+
+    def add(self, name: str, seconds: float) -> None:
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def header(self) -> str:
+        entries = []
+        for name, seconds in self.durations.items():
+            entry = f"{name};dur={seconds * 1000:.1f}"
+            if name == "db":
+                entry += f';desc="{self.db_queries} queries"'
+            entries.append(entry)
+        return ", ".join(entries)
+
+
+_request_timing: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+def add_timing(name: str, seconds: float) -> None:
+    """Attribute time to the current request's Server-Timing, if any."""
+    timing = _request_timing.get()
+    if timing is not None:
+        timing.add(name, seconds)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Time a block for Server-Timing, excluding DB queries run inside it."""
+    timing = _request_timing.get()
+    if timing is None:
+        yield
+        return
+    started, db_before = time.perf_counter(), timing.durations.get("db", 0.0)
+    try:
+        yield
+    finally:
+        nested_db = timing.durations.get("db", 0.0) - db_before
+        timing.add(name, time.perf_counter() - started - nested_db)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement the engine executes."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        DB_QUERY_SECONDS.observe(elapsed, statement=statement.lstrip().split(None, 1)[0].upper())
+        timing = _request_timing.get()
+        if timing is not None:
+            timing.add("db", elapsed)
+            timing.db_queries += 1
+
+
+class MetricsMiddleware:
+    """
+    Record request latency per route and add a Server-Timing header (db,
+    serialize, llm and the total up to the response headers).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timing = RequestTiming()
+        token = _request_timing.set(timing)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                timing.add("total", time.perf_counter() - started)
+                MutableHeaders(scope=message).append("Server-Timing", timing.header())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status),
+            )
+            _request_timing.reset(token)
+
+
+def serve_metrics(port: int) -> http.server.ThreadingHTTPServer:
+    """Serve GET /metrics from a daemon thread, for processes without the API."""
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("", port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
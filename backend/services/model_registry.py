@@ -0,0 +1,181 @@
+"""
+Model Registry
+Context length, output limit and observed speed of every model the LLM
+service calls. Limits come from OpenRouter's /models listing, KNOWN_MODELS
+or the config defaults (AcademicCloud's listing has no context_length).
+Speed is fitted from the latencies of recent successful calls, so the
+overview can trade prompt size against the number of calls it makes.
+Streaming calls also record time to first token and, when chat requests
+are hedged, which provider's stream won.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+
+import httpx
+import numpy as np
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+LISTING_REFRESH_SECONDS = 24 * 3600
+LISTING_RETRY_SECONDS = 600  # after a failed fetch
+SYSTEM_PROMPT_RESERVE = 300  # tokens for system prompt and instructions
+STATS_WINDOW = 50  # recent calls the latency fit and TTFT quantiles use
+MIN_FIT_SAMPLES = 5
+
+
+class ModelSpec(NamedTuple):
+    context_length: int
+    max_output: int
+
+
+class LatencyModel(NamedTuple):
+    """seconds = overhead + prompt / input_rate + completion / output_rate"""
+    overhead: float  # seconds per call
+    input_rate: float  # prompt tokens per second
+    output_rate: float  # completion tokens per second
+    output_tokens: float  # typical completion length
+    samples: int = 0  # calls the fit is based on; 0 means defaults
+
+    def estimate(self, prompt_tokens: float, output_tokens: Optional[float] = None) -> float:
+        if output_tokens is None:
+            output_tokens = self.output_tokens
+        return self.overhead + prompt_tokens / self.input_rate + output_tokens / self.output_rate
+
+
+# Limits for models whose provider does not report them
+KNOWN_MODELS: Dict[str, ModelSpec] = {
+    "google/gemini-2.0-flash-001": ModelSpec(1_048_576, 8_192),
+}
+
+# Used until a model has MIN_FIT_SAMPLES recorded calls
+DEFAULT_LATENCY = LatencyModel(overhead=1.0, input_rate=2_000.0, output_rate=40.0, output_tokens=600.0)
+
+
+def _fit_latency(samples: List[Tuple[int, int, float]]) -> LatencyModel:
+    """Least-squares fit of the latency model; falls back to the defaults per term."""
+    x = np.array([[1.0, p, c] for p, c, _ in samples], dtype=float)
+    y = np.array([s for _, _, s in samples], dtype=float)
+    output_tokens = float(np.mean(x[:, 2]))
+    # Prompt and completion sizes within one workload are often too uniform
+    # to separate the terms (checked on unit-scaled columns)
+    if np.linalg.matrix_rank(x / np.maximum(x.max(axis=0), 1.0), tol=0.05) == 3:
+        (overhead, per_input, per_output), *_ = np.linalg.lstsq(x, y, rcond=None)
+        if per_input > 0 and per_output > 0:
+            return LatencyModel(
+                overhead=max(float(overhead), 0.0),
+                input_rate=float(1.0 / per_input),
+                output_rate=float(1.0 / per_output),
+                output_tokens=output_tokens,
+                samples=len(samples),
+            )
+    # Keep the default overhead and prefill speed and attribute the rest to decoding
+    decode = y - DEFAULT_LATENCY.overhead - x[:, 1] / DEFAULT_LATENCY.input_rate
+    output_rate = float(np.sum(x[:, 2]) / max(float(np.sum(np.maximum(decode, 0.0))), 1e-3))
+    return DEFAULT_LATENCY._replace(output_rate=output_rate, output_tokens=output_tokens, samples=len(samples))
+
+
+class ModelRegistry:
+    """Per-model limits and a rolling window of (prompt, completion, seconds) samples."""
+
+    def __init__(self):
+        self._listed: Dict[str, ModelSpec] = {}
+        self._listing_due = 0.0
+        self._samples: Dict[str, Deque[Tuple[int, int, float]]] = {}
+        self._fits: Dict[str, LatencyModel] = {}
+        self._ttfts: Dict[str, Deque[float]] = {}
+        self._hedges: Dict[str, List[int]] = {}  # model -> [wins, losses]
+        self._lock = threading.Lock()
+
+    async def refresh(self) -> None:
+        """Fetch OpenRouter's model listing if it is due; failures keep the old limits."""
+        if time.monotonic() < self._listing_due:
+            return
+        try:
+            async with httpx.AsyncClient(timeout=10) as client:
+                response = await client.get(settings.openrouter_base_url.rstrip("/") + "/models")
+                response.raise_for_status()
+            listed = {}
+            for entry in response.json().get("data", []):
+                context = entry.get("context_length")
+                if not context:
+                    continue
+                max_output = (entry.get("top_provider") or {}).get("max_completion_tokens")
+                listed[entry["id"]] = ModelSpec(int(context), int(max_output or context // 4))
+            self._listed = listed
+            self._listing_due = time.monotonic() + LISTING_REFRESH_SECONDS
+            logger.info(f"Loaded limits for {len(listed)} OpenRouter models")
+        except Exception as e:
+            self._listing_due = time.monotonic() + LISTING_RETRY_SECONDS
+            logger.warning(f"Could not fetch OpenRouter model listing: {e}")
+
+    def spec(self, model: str) -> ModelSpec:
+        if model == settings.openai_model:
+            return ModelSpec(settings.openai_context_window, settings.openai_max_output)
+        if model in self._listed:
+            return self._listed[model]
+        if model in KNOWN_MODELS:
+            return KNOWN_MODELS[model]
+        return ModelSpec(settings.overview_context_window, settings.overview_max_output)
+
+    def input_budget(self, model: str) -> int:
+        """Prompt tokens a call may use, leaving room for the system prompt and the response."""
+        spec = self.spec(model)
+        response_reserve = min(spec.max_output, spec.context_length // 10)
+        return int(spec.context_length * settings.overview_budget_ratio) - SYSTEM_PROMPT_RESERVE - response_reserve
+
+    def record(self, model: str, prompt_tokens: int, completion_tokens: int, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.setdefault(model, deque(maxlen=STATS_WINDOW))
+            samples.append((prompt_tokens, completion_tokens, seconds))
+            self._fits.pop(model, None)
+
+    def latency(self, model: str) -> LatencyModel:
+        with self._lock:
+            fit = self._fits.get(model)
+            if fit is None:
+                samples = list(self._samples.get(model, ()))
+                fit = _fit_latency(samples) if len(samples) >= MIN_FIT_SAMPLES else DEFAULT_LATENCY
+                self._fits[model] = fit
+            return fit
+
+    def record_ttft(self, model: str, seconds: float) -> None:
+        with self._lock:
+            self._ttfts.setdefault(model, deque(maxlen=STATS_WINDOW)).append(seconds)
+
+    def ttft_quantile(self, model: str, q: float) -> Optional[float]:
+        """Quantile of recent times to first token, or None before MIN_FIT_SAMPLES streams."""
+        with self._lock:
+            ttfts = list(self._ttfts.get(model, ()))
+        if len(ttfts) < MIN_FIT_SAMPLES:
+            return None
+        return float(np.quantile(ttfts, q))
+
+    def record_hedge(self, model: str, won: bool) -> None:
+        with self._lock:
+            self._hedges.setdefault(model, [0, 0])[0 if won else 1] += 1
+
+    def describe(self, model: str) -> Dict:
+        spec, fit = self.spec(model), self.latency(model)
+        wins, losses = self._hedges.get(model, (0, 0))
+        ttft_p50, ttft_p95 = self.ttft_quantile(model, 0.5), self.ttft_quantile(model, 0.95)
+        return {
+            "model": model,
+            "context_length": spec.context_length,
+            "max_output": spec.max_output,
+            "tokens_per_second": round(fit.output_rate, 1),
+            "prompt_tokens_per_second": round(fit.input_rate, 1),
+            "overhead_seconds": round(fit.overhead, 2),
+            "samples": fit.samples,
+            "ttft_p50_seconds": round(ttft_p50, 3) if ttft_p50 is not None else None,
+            "ttft_p95_seconds": round(ttft_p95, 3) if ttft_p95 is not None else None,
+            "hedge_wins": wins,
+            "hedge_losses": losses,
+        }
+
+
+model_registry = ModelRegistry()
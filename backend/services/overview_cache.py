@@ -0,0 +1,118 @@
+"""
+Overview Cache
+Precomputed overviews for the filter presets in settings.overview_presets.
+Presets are relative ("the last 7 days in cs.AI"), so each warming run
+resolves them to concrete filters and queues an `overview_warm` job per
+preset; the job stores its result as a snapshot keyed by those filters.
+POST /api/overview/generate answers a request whose filters match a
+snapshot exactly from the stored result, stamped with when it was
+generated. Warming runs after every ingestion, so a snapshot is at most
+one ingestion run behind the papers table.
+"""
+import hashlib
+import json
+import logging
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import delete
+
+from config import settings
+from database import SessionLocal
+from models import OverviewSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+def overview_params(
+    start_date: str,
+    end_date: str,
+    search: Optional[str] = None,
+    category: Optional[str] = None,
+) -> dict:
+    """Canonical overview filters, as stored in jobs and snapshots."""
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "search": search or None,
+        "category": category or None,
+    }
+
+
+def resolve_preset(preset: dict, today: Optional[date] = None) -> dict:
+    """The filters a preset stands for today, matching what the frontend sends."""
+    today = today or datetime.utcnow().date()
+    start = today - timedelta(days=preset.get("days", 7))
+    return overview_params(
+        start.isoformat(), today.isoformat(), preset.get("search"), preset.get("category")
+    )
+
+
+def preset_params(today: Optional[date] = None) -> List[dict]:
+    return [resolve_preset(preset, today) for preset in settings.overview_presets]
+
+
+def snapshot_key(params: dict) -> str:
+    payload = json.dumps(params, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_snapshot(params: dict) -> Optional[dict]:
+    """The stored overview for exactly these filters, or None."""
+    db = SessionLocal()
+    try:
+        snapshot = db.get(OverviewSnapshot, snapshot_key(params))
+        if snapshot is None:
+            return None
+        result = json.loads(snapshot.result)
+        result["generated_at"] = snapshot.generated_at.isoformat(timespec="seconds")
+        result["precomputed"] = True
+        if snapshot.podcast:
+            result["podcast"] = json.loads(snapshot.podcast)
+        return result
+    finally:
+        db.close()
+
+
+def store_snapshot(params: dict, result: dict, podcast: Optional[dict] = None) -> None:
+    db = SessionLocal()
+    try:
+        db.merge(OverviewSnapshot(
+            key=snapshot_key(params),
+            params=json.dumps(params),
+            result=json.dumps(result, default=str),
+            podcast=json.dumps(podcast) if podcast else None,
+            generated_at=datetime.utcnow(),
+        ))
+        db.commit()
+    finally:
+        db.close()
+    logger.info(f"Stored overview snapshot for {params}")
+
+
+def missing_presets(today: Optional[date] = None) -> List[dict]:
+    """Resolved presets that have no snapshot yet, e.g. after the date rolled over."""
+    db = SessionLocal()
+    try:
+        return [
+            params for params in preset_params(today)
+            if db.get(OverviewSnapshot, snapshot_key(params)) is None
+        ]
+    finally:
+        db.close()
+
+
+def prune_snapshots(retention_days: Optional[int] = None) -> int:
+    """Delete snapshots older than the retention period."""
+    days = settings.overview_snapshot_retention_days if retention_days is None else retention_days
+    db = SessionLocal()
+    try:
+        removed = db.execute(
+            delete(OverviewSnapshot)
+            .where(OverviewSnapshot.generated_at < datetime.utcnow() - timedelta(days=days))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        return removed
+    finally:
+        db.close()
@@ -3,59 +3,139 @@ Research Overview Service
 Clusters papers by category, batches abstracts within token budget,
 and orchestrates LLM calls to produce a coherent markdown narrative.
 """
+import asyncio
 import logging
-import tiktoken
+import math
 from collections import defaultdict
-from datetime import datetime
-from typing import List, Dict, Tuple, Optional
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Dict, Iterable, Iterator, NamedTuple, Tuple, Optional
 
 from sqlalchemy.orm import Session
 
-from sqlalchemy import or_
-from models import Paper, Author, Category
+from sqlalchemy import or_, select
+from models import Paper, Author, Category, paper_author_association, paper_category_association
 from config import settings
-from services.llm_service import call_llm
+from services.llm_service import call_llm, model_chain
+from services.model_registry import LatencyModel, model_registry
+from services.summary_service import render_summary
+from services.tokens import count_tokens, truncate_tokens
+from services.trend_service import trend_context
 
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
-# Token counting
+# Loading
+#
+# Prompts only use a few fields per paper, so papers are read as plain
+# column tuples: no ORM identity map, no full_text and no relationship
+# loads. Rows are streamed with yield_per, and each chunk's authors and
+# primary category are fetched with one query apiece. Papers with a
+# structured summary are prompted with it instead of the abstract.
 # ---------------------------------------------------------------------------
-# Use cl100k_base encoding (GPT-4/3.5 tokenizer) as a reasonable approximation
-# for any model. It's close enough for budget enforcement.
-_encoding = tiktoken.get_encoding("cl100k_base")
-
-
-def count_tokens(text: str) -> int:
-    """Estimate token count for a string."""
-    return len(_encoding.encode(text))
 
+PROMPT_AUTHORS = 5
+LOAD_CHUNK_SIZE = 1000
+
+
+class PaperDigest(NamedTuple):
+    """The fields of a paper that overview prompts use."""
+    id: str
+    title: str
+    abstract: str
+    published_date: Optional[datetime]
+    authors: Tuple[str, ...]  # the first PROMPT_AUTHORS, in stored order
+    author_count: int
+    category: Optional[str]  # primary (first stored) category
+    summary: Optional[str] = None  # rendered structured summary, if any
+
+
+def _first_authors(db: Session, paper_ids: List[str]) -> Dict[str, Tuple[List[str], int]]:
+    """First PROMPT_AUTHORS author names and the author count per paper."""
+    pa = paper_author_association.c
+    rows = db.execute(
+        select(pa.paper_id, Author.name)
+        .join(Author, Author.id == pa.author_id)
+        .where(pa.paper_id.in_(paper_ids))
+        .order_by(pa.paper_id, pa.position)
+    )
+    authors: Dict[str, Tuple[List[str], int]] = {}
+    for paper_id, name in rows:
+        names, count = authors.get(paper_id, ([], 0))
+        if count < PROMPT_AUTHORS:
+            names.append(name)
+        authors[paper_id] = (names, count + 1)
+    return authors
+
+
+def _primary_categories(db: Session, paper_ids: List[str]) -> Dict[str, int]:
+    """Category ID of each paper's first stored category."""
+    pc = paper_category_association.c
+    primary: Dict[str, int] = {}
+    rows = db.execute(
+        select(pc.paper_id, pc.category_id)
+        .where(pc.paper_id.in_(paper_ids))
+        .order_by(pc.paper_id, pc.position)
+    )
+    for paper_id, category_id in rows:
+        primary.setdefault(paper_id, category_id)
+    return primary
 
-# ---------------------------------------------------------------------------
-# Context window — hardcoded for the primary model (AcademicCloud doesn't
-# expose context_length in its /models response).
-# ---------------------------------------------------------------------------
-PRIMARY_CONTEXT_WINDOW = 32_000  # Safe batch size to ensure fast, sub-10s responses
 
+def iter_overview_papers(
+    db: Session,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    search: Optional[str] = None,
+    category: Optional[str] = None,
+    chunk_size: int = LOAD_CHUNK_SIZE,
+) -> Iterator[PaperDigest]:
+    """Stream the papers matching an overview's filters, newest first."""
+    columns = [Paper.id, Paper.title, Paper.abstract, Paper.published_date]
+    if settings.overview_use_summaries:
+        columns.append(Paper.summary)
+    query = select(*columns)
+    if start_date:
+        query = query.where(Paper.published_date >= start_date)
+    if end_date:
+        query = query.where(Paper.published_date < end_date)
+    if search:
+        search_term = f"%{search}%"
+        query = query.where(
+            or_(
+                Paper.title.ilike(search_term),
+                Paper.abstract.ilike(search_term),
+            )
+        )
+    if category:
+        query = query.where(Paper.categories.any(Category.name == category))
 
-def _get_context_window() -> int:
-    """Return the context window for the current primary model."""
-    return PRIMARY_CONTEXT_WINDOW
+    category_names = dict(db.execute(select(Category.id, Category.name)).all())
+    result = db.execute(
+        query.order_by(Paper.published_date.desc()),
+        execution_options={"yield_per": chunk_size},
+    )
+    for rows in result.partitions():
+        ids = [row.id for row in rows]
+        authors = _first_authors(db, ids)
+        primary = _primary_categories(db, ids)
+        for row in rows:
+            names, count = authors.get(row.id, ((), 0))
+            yield PaperDigest(
+                row.id, row.title, row.abstract, row.published_date,
+                tuple(names), count, category_names.get(primary.get(row.id)),
+                render_summary(row.summary) if settings.overview_use_summaries else None,
+            )
 
 
 # ---------------------------------------------------------------------------
 # Clustering
 # ---------------------------------------------------------------------------
 
-def cluster_papers_by_category(papers: List[Paper]) -> Dict[str, List[Paper]]:
+def cluster_papers_by_category(papers: Iterable[PaperDigest]) -> Dict[str, List[PaperDigest]]:
     """Group papers by their primary (first) ArXiv category."""
-    clusters: Dict[str, List[Paper]] = defaultdict(list)
+    clusters: Dict[str, List[PaperDigest]] = defaultdict(list)
     for paper in papers:
-        if paper.categories:
-            primary_cat = paper.categories[0].name
-        else:
-            primary_cat = "Uncategorized"
-        clusters[primary_cat].append(paper)
+        clusters[paper.category or "Uncategorized"].append(paper)
 
     # Sort clusters by size descending so the biggest themes come first
     sorted_clusters = dict(
@@ -101,30 +181,32 @@ def _friendly_category(cat_id: str) -> str:
     return CATEGORY_LABELS.get(cat_id, cat_id)
 
 
-def format_paper_for_prompt(paper: Paper) -> str:
+def format_paper_for_prompt(paper: PaperDigest) -> str:
     """Format a single paper's info for inclusion in a prompt."""
-    authors = ", ".join(a.name for a in paper.authors[:5])
-    if len(paper.authors) > 5:
+    authors = ", ".join(paper.authors)
+    if paper.author_count > PROMPT_AUTHORS:
         authors += " et al."
     date_str = paper.published_date.strftime("%Y-%m-%d") if paper.published_date else "Unknown"
-    return f"### {paper.title}\n**Authors:** {authors} | **Date:** {date_str}\n\n{paper.abstract}\n"
+    return f"### {paper.title}\n**Authors:** {authors} | **Date:** {date_str}\n\n{paper.summary or paper.abstract}\n"
 
 
 def batch_papers_by_budget(
-    papers: List[Paper],
+    papers: List[PaperDigest],
     max_tokens: int,
-) -> List[List[Paper]]:
+    token_counts: Optional[List[int]] = None,
+) -> List[List[PaperDigest]]:
     """
     Split a list of papers into batches such that the concatenated abstracts
-    in each batch fit within max_tokens.
+    in each batch fit within max_tokens. `token_counts` are the papers'
+    prompt sizes, if already known.
     """
-    batches: List[List[Paper]] = []
-    current_batch: List[Paper] = []
+    if token_counts is None:
+        token_counts = [count_tokens(format_paper_for_prompt(p)) for p in papers]
+    batches: List[List[PaperDigest]] = []
+    current_batch: List[PaperDigest] = []
     current_tokens = 0
 
-    for paper in papers:
-        paper_text = format_paper_for_prompt(paper)
-        paper_tokens = count_tokens(paper_text)
+    for paper, paper_tokens in zip(papers, token_counts):
 
         if current_tokens + paper_tokens > max_tokens and current_batch:
             batches.append(current_batch)
@@ -140,12 +222,126 @@ def batch_papers_by_budget(
     return batches
 
 
+# ---------------------------------------------------------------------------
+# Batch sizing
+#
+# Bigger batches mean fewer calls but slower ones, and how much slower
+# depends on the model's observed prefill and decode speed. Candidate batch
+# sizes are scored by the estimated wall time of the batch calls (run
+# `concurrency` at a time) plus the merge rounds that follow, and the
+# fastest one wins.
+# ---------------------------------------------------------------------------
+
+MIN_BATCH_TOKENS = 1_000
+BATCH_SIZE_STEP = 1.25  # ratio between candidate batch sizes
+
+
+def estimate_overview_seconds(
+    cluster_tokens: List[int],
+    batch_tokens: int,
+    max_tokens: int,
+    concurrency: int,
+    latency: LatencyModel,
+) -> float:
+    """Estimated wall time to summarize clusters of the given prompt sizes."""
+    calls, longest = 0.0, 0.0
+    merge_depth = 0
+    fan_in = max(2, int(max_tokens // max(latency.output_tokens, 1)))
+    for tokens in cluster_tokens:
+        batches = max(1, math.ceil(tokens / batch_tokens))
+        call_seconds = latency.estimate(tokens / batches)
+        calls += batches * call_seconds
+        longest = max(longest, call_seconds)
+        if batches > 1:
+            merge_depth = max(merge_depth, math.ceil(math.log(batches, fan_in)))
+    batch_seconds = max(calls / concurrency, longest)
+    merge_seconds = merge_depth * latency.estimate(fan_in * latency.output_tokens)
+    return batch_seconds + merge_seconds
+
+
+def choose_batch_tokens(
+    cluster_tokens: List[int],
+    max_tokens: int,
+    concurrency: int,
+    latency: LatencyModel,
+) -> int:
+    """Batch size, at most max_tokens, with the lowest estimated overview latency."""
+    candidates = [max_tokens]
+    size = float(min(MIN_BATCH_TOKENS, max_tokens))
+    while size < max_tokens:
+        candidates.append(int(size))
+        size *= BATCH_SIZE_STEP
+    return min(
+        candidates,
+        key=lambda b: (
+            estimate_overview_seconds(cluster_tokens, b, max_tokens, concurrency, latency),
+            -b,
+        ),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Tree reduction
+#
+# Summaries are merged in consecutive fan-in groups whose combined size fits
+# the token budget, and all merges of one level run concurrently. Every level
+# divides the number of summaries by the fan-in, so n batch summaries take
+# O(log n) sequential LLM rounds and no merge prompt exceeds the budget.
+# ---------------------------------------------------------------------------
+
+def group_by_budget(texts: List[str], max_tokens: int) -> List[List[str]]:
+    """Split texts into consecutive groups whose token total fits max_tokens."""
+    groups: List[List[str]] = []
+    current: List[str] = []
+    current_tokens = 0
+    for text in texts:
+        tokens = count_tokens(text)
+        if current and current_tokens + tokens > max_tokens:
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+async def reduce_summaries(
+    summaries: List[str],
+    max_tokens: int,
+    merge: Callable[[List[str]], Awaitable[str]],
+) -> List[str]:
+    """
+    Merge summaries level by level until together they fit in max_tokens.
+    `merge` condenses one group into a single summary; groups of one are
+    carried to the next level unchanged.
+    """
+    summaries = list(summaries)
+    while len(summaries) > 1 and sum(count_tokens(s) for s in summaries) > max_tokens:
+        groups = group_by_budget(summaries, max_tokens)
+        if len(groups) == len(summaries):
+            # Every summary is over half the budget: shorten them and pair up
+            half = max_tokens // 2
+            groups = [
+                [truncate_tokens(s, half) for s in summaries[i:i + 2]]
+                for i in range(0, len(summaries), 2)
+            ]
+
+        async def merge_group(group: List[str]) -> str:
+            return group[0] if len(group) == 1 else await merge(group)
+
+        summaries = list(await asyncio.gather(*(merge_group(g) for g in groups)))
+        logger.info(f"Reduced to {len(summaries)} summaries")
+    return summaries
+
+
 # ---------------------------------------------------------------------------
 # LLM prompts
 # ---------------------------------------------------------------------------
 
 SYSTEM_PROMPT_CLUSTER = """You are a research analyst writing a weekly research digest newsletter. 
 Your task is to synthesize the provided paper abstracts into a coherent, engaging narrative section.
+Some papers come as a short digest (contribution, method, results) instead of an abstract.
 
 Guidelines:
 - Write in clear, flowing prose — not a list of summaries.
@@ -166,6 +362,13 @@ Write a concise executive overview (2-3 paragraphs) that:
 - Highlights the most impactful or novel work.
 - Notes cross-cutting trends or connections between fields.
 - Uses an engaging, newsletter-style tone.
+- If trend data is provided, use its counts to contrast "now" with "then" and never invent numbers.
+"""
+
+SYSTEM_PROMPT_CONDENSE = """You are a research analyst preparing notes for a research digest.
+You will receive several section summaries. Condense them into one shorter summary that
+keeps each section's name, paper count, key themes and the most notable paper titles.
+Do NOT add a heading.
 """
 
 
@@ -179,78 +382,85 @@ async def generate_overview(
     end_date: datetime,
     search: Optional[str] = None,
     category: Optional[str] = None,
+    on_progress: Optional[Callable[[float, str], None]] = None,
 ) -> Dict:
     """
     Generate a comprehensive markdown narrative overview of papers matching
     the given filters (date range, search, category).
+    `on_progress(fraction, message)` is called as each stage starts.
     
     Returns dict with keys: markdown, paper_count, cluster_count
     """
-    # 1. Query papers with all filters
-    query = db.query(Paper)
-    
-    if start_date:
-        query = query.filter(Paper.published_date >= start_date)
-    if end_date:
-        query = query.filter(Paper.published_date < end_date)
-    
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                Paper.title.ilike(search_term),
-                Paper.abstract.ilike(search_term),
-            )
-        )
-    
-    if category:
-        query = query.filter(Paper.categories.any(Category.name == category))
-    
-    papers = query.order_by(Paper.published_date.desc()).all()
-
-    if not papers:
-        return {
-            "markdown": "# Research Overview\n\nNo papers found in the selected time range.",
-            "paper_count": 0,
-            "cluster_count": 0,
-        }
+    report = on_progress or (lambda fraction, message: None)
+    # 1. Stream the matching papers as lightweight tuples
+    papers = iter_overview_papers(db, start_date, end_date, search, category)
 
     # 2. Cluster (skip re-clustering when a specific category is selected)
     if category:
         # When filtering by category, show all papers under that category heading
-        cat_label = _friendly_category(category)
-        clusters = {category: papers}
+        clusters = {category: list(papers)}
     else:
         clusters = cluster_papers_by_category(papers)
-    logger.info(f"Found {len(papers)} papers in {len(clusters)} categories")
-
-    # 3. Determine token budget
-    context_window = _get_context_window()
+    paper_count = sum(len(cat_papers) for cat_papers in clusters.values())
 
-    system_prompt_reserve = 300  # tokens for system prompt
-    response_reserve = int(context_window * 0.10)  # 10% for response
-    max_abstract_tokens = int(
-        context_window * settings.overview_budget_ratio
-        - system_prompt_reserve
-        - response_reserve
+    if not paper_count:
+        return {
+            "markdown": "# Research Overview\n\nNo papers found in the selected time range.",
+            "paper_count": 0,
+            "cluster_count": 0,
+            "generated_at": datetime.utcnow().isoformat(timespec="seconds"),
+        }
+    logger.info(f"Found {paper_count} papers in {len(clusters)} categories")
+
+    # 3. Determine token budget: prompts must fit every model call_llm may
+    # fall back to, and batches are sized for the first model's speed
+    await model_registry.refresh()
+    chain = model_chain()
+    max_abstract_tokens = min(model_registry.input_budget(m) for m in chain)
+    token_counts = {
+        cat_id: [count_tokens(format_paper_for_prompt(p)) for p in cat_papers]
+        for cat_id, cat_papers in clusters.items()
+    }
+    latency = model_registry.latency(chain[0])
+    batch_tokens = choose_batch_tokens(
+        [sum(counts) for counts in token_counts.values()],
+        max_abstract_tokens,
+        settings.overview_concurrency,
+        latency,
     )
     logger.info(
-        f"Token budget: context_window={context_window}, "
-        f"max_abstract_tokens={max_abstract_tokens}"
+        f"Token budget: models={chain}, max_abstract_tokens={max_abstract_tokens}, "
+        f"batch_tokens={batch_tokens} (latency fit from {latency.samples} calls)"
     )
 
-    # 4. Generate per-cluster narratives (uses centralized call_llm with 3 retries + fallback)
-    section_narratives: List[Tuple[str, str, int]] = []  # (category, narrative, paper_count)
+    # 4. Generate per-cluster narratives. Clusters and their batches run
+    # concurrently (bounded by overview_concurrency); batch summaries are
+    # tree-reduced (uses centralized call_llm with 3 retries + fallback)
+    semaphore = asyncio.Semaphore(settings.overview_concurrency)
 
-    for cat_id, cat_papers in clusters.items():
+    async def llm(system_prompt: str, user_prompt: str, caller: str) -> str:
+        async with semaphore:
+            return await call_llm(
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+                timeout=120,
+                caller=caller,
+            )
+
+    report(0.05, f"Summarizing {paper_count} papers in {len(clusters)} categories")
+    done = 0
+
+    async def summarize_cluster(cat_id: str, cat_papers: List[PaperDigest]) -> Tuple[str, str, int]:
+        nonlocal done
         cat_label = _friendly_category(cat_id)
-        batches = batch_papers_by_budget(cat_papers, max_abstract_tokens)
+        batches = batch_papers_by_budget(cat_papers, batch_tokens, token_counts[cat_id])
         logger.info(
             f"Category '{cat_label}': {len(cat_papers)} papers, {len(batches)} batch(es)"
         )
 
-        batch_narratives = []
-        for batch in batches:
+        async def summarize_batch(batch: List[PaperDigest]) -> str:
             abstracts_text = "\n---\n".join(
                 format_paper_for_prompt(p) for p in batch
             )
@@ -259,62 +469,68 @@ async def generate_overview(
                 f"{abstracts_text}\n\n"
                 f"Synthesize these into a cohesive narrative section."
             )
-
             try:
-                narrative = await call_llm(
-                    messages=[
-                        {"role": "system", "content": SYSTEM_PROMPT_CLUSTER},
-                        {"role": "user", "content": user_prompt},
-                    ],
-                    timeout=120,
-                )
-                batch_narratives.append(narrative)
+                return await llm(SYSTEM_PROMPT_CLUSTER, user_prompt, "overview-cluster")
             except Exception as e:
                 logger.error(f"LLM call failed for {cat_label}: {e}")
-                batch_narratives.append(
-                    f"*Summary could not be generated for this batch ({e}).*"
-                )
-
-        # If multiple batches, merge them
-        if len(batch_narratives) == 1:
-            final_narrative = batch_narratives[0]
-        else:
+                return f"*Summary could not be generated for this batch ({e}).*"
+
+        async def merge(parts: List[str]) -> str:
             merge_prompt = (
                 "Merge the following partial summaries into one coherent section:\n\n"
-                + "\n\n---\n\n".join(batch_narratives)
+                + "\n\n---\n\n".join(parts)
             )
             try:
-                final_narrative = await call_llm(
-                    messages=[
-                        {"role": "system", "content": SYSTEM_PROMPT_CLUSTER},
-                        {"role": "user", "content": merge_prompt},
-                    ],
-                    timeout=120,
-                )
+                return await llm(SYSTEM_PROMPT_CLUSTER, merge_prompt, "overview-merge")
             except Exception as e:
                 logger.error(f"Merge LLM call failed for {cat_label}: {e}")
-                final_narrative = "\n\n".join(batch_narratives)
+                return "\n\n".join(parts)
 
-        section_narratives.append((cat_label, final_narrative, len(cat_papers)))
+        batch_narratives = await asyncio.gather(*(summarize_batch(b) for b in batches))
+        parts = await reduce_summaries(batch_narratives, max_abstract_tokens, merge)
+        final_narrative = parts[0] if len(parts) == 1 else await merge(parts)
 
-    # 5. Generate executive summary
+        done += 1
+        report(
+            0.05 + 0.85 * done / len(clusters),
+            f"Summarized {cat_label} ({done}/{len(clusters)})",
+        )
+        return cat_label, final_narrative, len(cat_papers)
+
+    # (category, narrative, paper_count), in cluster order
+    section_narratives: List[Tuple[str, str, int]] = await asyncio.gather(
+        *(summarize_cluster(cat_id, cat_papers) for cat_id, cat_papers in clusters.items())
+    )
+
+    # 5. Generate executive summary from the full section narratives, condensed
+    # by the same tree reduction when together they exceed the budget
     executive_summary = ""
     if len(section_narratives) > 1:
-        sections_overview = "\n\n".join(
-            f"**{label}** ({count} papers):\n{narrative[:500]}..."
-            for label, narrative, count in section_narratives
+        report(0.9, "Writing executive summary")
+        trend_lines = ""
+        if settings.overview_include_trends:
+            trend_lines = trend_context(db, (end_date - timedelta(days=1)).date())
+
+        async def condense(parts: List[str]) -> str:
+            try:
+                return await llm(SYSTEM_PROMPT_CONDENSE, "\n\n".join(parts), "overview-condense")
+            except Exception as e:
+                logger.error(f"Condense LLM call failed: {e}")
+                return "\n\n".join(truncate_tokens(p, max_abstract_tokens // len(parts)) for p in parts)
+
+        sections = await reduce_summaries(
+            [
+                f"**{label}** ({count} papers):\n{narrative}"
+                for label, narrative, count in section_narratives
+            ],
+            max_abstract_tokens - count_tokens(trend_lines),
+            condense,
         )
+        synthesis_prompt = "Here are the section summaries:\n\n" + "\n\n".join(sections)
+        if trend_lines:
+            synthesis_prompt += f"\n\nTrend data from the archive:\n{trend_lines}"
         try:
-            executive_summary = await call_llm(
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT_SYNTHESIS},
-                    {
-                        "role": "user",
-                        "content": f"Here are the section summaries:\n\n{sections_overview}",
-                    },
-                ],
-                timeout=120,
-            )
+            executive_summary = await llm(SYSTEM_PROMPT_SYNTHESIS, synthesis_prompt, "overview-executive")
         except Exception as e:
             logger.error(f"Executive summary LLM call failed: {e}")
 
@@ -324,7 +540,7 @@ async def generate_overview(
 
     md_parts = [
         f"# 📡 Research Overview",
-        f"**{start_str} — {end_str}** · {len(papers)} papers across {len(clusters)} categories\n",
+        f"**{start_str} — {end_str}** · {paper_count} papers across {len(clusters)} categories\n",
     ]
 
     if executive_summary:
@@ -351,6 +567,7 @@ async def generate_overview(
 
     return {
         "markdown": markdown,
-        "paper_count": len(papers),
+        "paper_count": paper_count,
         "cluster_count": len(clusters),
+        "generated_at": datetime.utcnow().isoformat(timespec="seconds"),
     }
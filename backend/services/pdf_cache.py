@@ -0,0 +1,202 @@
+"""
+On-disk PDF Cache
+
+Downloaded PDFs are stored content-addressed (by SHA-256) under
+`settings.pdf_cache_dir` and indexed by arXiv ID and version, so full text
+can be re-extracted, or a lost database rebuilt, without downloading every
+PDF again. The index lives next to the blobs in its own SQLite file so the
+cache survives independently of the main database. When the cache grows
+beyond `settings.pdf_cache_max_bytes`, least recently used entries are
+evicted.
+"""
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional, Tuple
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# "https://arxiv.org/pdf/2401.12345v2" -> ("2401.12345", 2)
+# "http://arxiv.org/pdf/hep-th/9901001v1" -> ("hep-th/9901001", 1)
+_ARXIV_PDF_RE = re.compile(r"/pdf/(?P<id>.+?)(?:v(?P<version>\d+))?(?:\.pdf)?$")
+
+UNVERSIONED = 0
+
+
+class CacheEntry(NamedTuple):
+    arxiv_id: str
+    version: int
+    sha256: str
+    size: int
+    etag: Optional[str]
+    last_modified: Optional[str]
+    path: Path
+
+
+def key_for_url(url: str) -> Tuple[str, int]:
+    """Return the (arxiv_id, version) cache key for a PDF URL."""
+    match = _ARXIV_PDF_RE.search(url)
+    if not match:
+        return url, UNVERSIONED
+    version = match.group("version")
+    return match.group("id"), int(version) if version else UNVERSIONED
+
+
+class PDFCache:
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    # -- setup ---------------------------------------------------------------
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            (self.root / "objects").mkdir(parents=True, exist_ok=True)
+            (self.root / "tmp").mkdir(exist_ok=True)
+            self._conn = sqlite3.connect(
+                str(self.root / "index.db"), check_same_thread=False
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " arxiv_id TEXT NOT NULL,"
+                " version INTEGER NOT NULL,"
+                " sha256 TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " etag TEXT,"
+                " last_modified TEXT,"
+                " last_access REAL NOT NULL,"
+                " PRIMARY KEY (arxiv_id, version))"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_entries_last_access ON entries (last_access)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _blob_path(self, sha256: str) -> Path:
+        return self.root / "objects" / sha256[:2] / f"{sha256}.pdf"
+
+    def tmp_dir(self) -> Path:
+        """Directory for in-progress downloads (same filesystem as the blobs)."""
+        with self._lock:
+            self._db()
+        return self.root / "tmp"
+
+    # -- lookups -------------------------------------------------------------
+
+    def get(self, arxiv_id: str, version: int, touch: bool = True) -> Optional[CacheEntry]:
+        """Return the cached entry for an arXiv ID/version, or None on a miss."""
+        with self._lock:
+            db = self._db()
+            row = db.execute(
+                "SELECT arxiv_id, version, sha256, size, etag, last_modified "
+                "FROM entries WHERE arxiv_id = ? AND version = ?",
+                (arxiv_id, version),
+            ).fetchone()
+            if row is None:
+                return None
+            entry = CacheEntry(*row, path=self._blob_path(row[2]))
+            if not entry.path.exists():
+                db.execute(
+                    "DELETE FROM entries WHERE arxiv_id = ? AND version = ?",
+                    (arxiv_id, version),
+                )
+                db.commit()
+                return None
+            if touch:
+                db.execute(
+                    "UPDATE entries SET last_access = ? WHERE arxiv_id = ? AND version = ?",
+                    (time.time(), arxiv_id, version),
+                )
+                db.commit()
+            return entry
+
+    def get_for_url(self, url: str, touch: bool = True) -> Optional[CacheEntry]:
+        return self.get(*key_for_url(url), touch=touch)
+
+    # -- writes --------------------------------------------------------------
+
+    def put(
+        self,
+        arxiv_id: str,
+        version: int,
+        tmp_path: Path,
+        sha256: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> CacheEntry:
+        """Move a downloaded file into the cache and index it."""
+        blob = self._blob_path(sha256)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        if blob.exists():
+            tmp_path.unlink(missing_ok=True)  # identical content already stored
+        else:
+            os.replace(tmp_path, blob)
+        size = blob.stat().st_size
+
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(arxiv_id, version, sha256, size, etag, last_modified, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (arxiv_id, version, sha256, size, etag, last_modified, time.time()),
+            )
+            db.commit()
+            self._evict_locked(keep=sha256)
+        return CacheEntry(arxiv_id, version, sha256, size, etag, last_modified, blob)
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._total_bytes_locked()
+
+    def _total_bytes_locked(self) -> int:
+        # Blobs are shared between entries with identical content
+        row = self._db().execute(
+            "SELECT COALESCE(SUM(size), 0) FROM "
+            "(SELECT sha256, MAX(size) AS size FROM entries GROUP BY sha256)"
+        ).fetchone()
+        return row[0]
+
+    def _evict_locked(self, keep: Optional[str] = None) -> int:
+        if not self.max_bytes:
+            return 0
+        db = self._db()
+        total = self._total_bytes_locked()
+        if total <= self.max_bytes:
+            return 0
+
+        evicted = 0
+        rows = db.execute(
+            "SELECT arxiv_id, version, sha256, size FROM entries ORDER BY last_access ASC"
+        ).fetchall()
+        for arxiv_id, version, sha256, size in rows:
+            if total <= self.max_bytes:
+                break
+            if sha256 == keep:
+                continue
+            db.execute(
+                "DELETE FROM entries WHERE arxiv_id = ? AND version = ?",
+                (arxiv_id, version),
+            )
+            still_used = db.execute(
+                "SELECT 1 FROM entries WHERE sha256 = ? LIMIT 1", (sha256,)
+            ).fetchone()
+            if not still_used:
+                self._blob_path(sha256).unlink(missing_ok=True)
+                total -= size
+            evicted += 1
+        db.commit()
+        logger.info(f"PDF cache: evicted {evicted} entries, {total} bytes remain")
+        return evicted
+
+
+pdf_cache = PDFCache(Path(settings.pdf_cache_dir), settings.pdf_cache_max_bytes)
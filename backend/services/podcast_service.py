@@ -3,15 +3,28 @@ Podcast Service — converts overview markdown into an audio podcast.
 
 Two-step pipeline:
 1. LLM converts markdown narrative → conversational podcast script
-2. edge-tts synthesizes the script → MP3 audio
+2. The script is split on paragraph/sentence boundaries and the chunks are
+   synthesized concurrently by a pluggable TTS engine (edge-tts by default)
+   → MP3 audio, which can be streamed back in order while it is produced
+
+Results are cached in PODCAST_DIR by a hash of (markdown, voice), so voicing
+the same overview again returns the stored script and audio immediately.
 """
+import asyncio
+import hashlib
+import json
 import logging
 import os
+import re
+import time
 import uuid
+from collections import OrderedDict
 from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
 import edge_tts
 
+from config import settings
 from services.llm_service import call_llm
 
 logger = logging.getLogger(__name__)
@@ -53,45 +66,456 @@ async def generate_podcast_script(markdown: str) -> str:
         },
     ]
 
-    script = await call_llm(messages=messages, timeout=120)
+    script = await call_llm(messages=messages, timeout=120, caller="podcast-script")
     logger.info(f"Generated podcast script: {len(script)} chars")
     return script
 
 
+# ---------------------------------------------------------------------------
+# TTS engines
+#
+# An engine only needs `async synthesize(text, voice) -> bytes` returning MP3
+# data. MP3 frames can be concatenated, so chunks synthesized independently
+# play back as one continuous file.
+# ---------------------------------------------------------------------------
+
+class EdgeTTSSynthesizer:
+    """Microsoft Edge online TTS via edge-tts."""
+
+    async def synthesize(self, text: str, voice: str) -> bytes:
+        communicate = edge_tts.Communicate(text, voice)
+        audio = bytearray()
+        async for message in communicate.stream():
+            if message["type"] == "audio":
+                audio.extend(message["data"])
+        return bytes(audio)
+
+
+class StubSynthesizer:
+    """
+    Offline synthesizer that emits silent MP3 frames (roughly 0.4s per word)
+    after an optional delay. Lets the chunking and streaming pipeline be
+    exercised without network access.
+    """
+
+    # One silent MPEG-1 Layer III frame: 128 kbit/s, 44.1 kHz, ~26 ms
+    SILENT_FRAME = b"\xff\xfb\x90\x04" + b"\x00" * 413
+    FRAMES_PER_WORD = 15
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    async def synthesize(self, text: str, voice: str) -> bytes:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return self.SILENT_FRAME * (len(text.split()) * self.FRAMES_PER_WORD)
+
+
+TTS_ENGINES = {
+    "edge": EdgeTTSSynthesizer,
+    "stub": StubSynthesizer,
+}
+
+_synthesizer = None
+
+
+def get_synthesizer():
+    """Return the TTS engine selected by settings.tts_engine."""
+    global _synthesizer
+    if _synthesizer is None:
+        if settings.tts_engine not in TTS_ENGINES:
+            raise ValueError(
+                f"Unknown TTS engine '{settings.tts_engine}', "
+                f"expected one of {sorted(TTS_ENGINES)}"
+            )
+        _synthesizer = TTS_ENGINES[settings.tts_engine]()
+        logger.info(f"TTS engine: {settings.tts_engine}")
+    return _synthesizer
+
+
+# ---------------------------------------------------------------------------
+# Chunked synthesis
+# ---------------------------------------------------------------------------
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_script(script: str, max_chars: Optional[int] = None) -> List[str]:
+    """
+    Split a script into chunks of at most max_chars, breaking on paragraph
+    boundaries first and sentence boundaries inside long paragraphs.
+    """
+    max_chars = max_chars or settings.tts_chunk_chars
+    chunks: List[str] = []
+    current = ""
+    for paragraph in re.split(r"\n\s*\n", script):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        pieces = [paragraph] if len(paragraph) <= max_chars else _SENTENCE_END.split(paragraph)
+        for piece in pieces:
+            if current and len(current) + 1 + len(piece) > max_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current} {piece}" if current else piece
+        # Prefer to end a chunk at a paragraph break once it is half full
+        if len(current) >= max_chars // 2:
+            chunks.append(current)
+            current = ""
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def synthesize_chunks(script: str, voice: str = DEFAULT_VOICE) -> AsyncIterator[bytes]:
+    """
+    Synthesize script chunks concurrently (at most settings.tts_concurrency at
+    a time) and yield their audio in script order as soon as each is ready.
+    """
+    synthesizer = get_synthesizer()
+    semaphore = asyncio.Semaphore(settings.tts_concurrency)
+
+    async def _synthesize(chunk: str) -> bytes:
+        async with semaphore:
+            return await synthesizer.synthesize(chunk, voice)
+
+    chunks = split_script(script)
+    tasks = [asyncio.ensure_future(_synthesize(chunk)) for chunk in chunks]
+    logger.info(f"Synthesizing podcast in {len(chunks)} chunk(s)")
+    try:
+        for task in tasks:
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
 async def generate_podcast_audio(
     script: str,
     voice: str = DEFAULT_VOICE,
+    filename: Optional[str] = None,
 ) -> str:
     """
-    Synthesize a podcast script into an MP3 file using edge-tts.
+    Synthesize a podcast script into an MP3 file.
     Returns the filename of the generated audio.
     """
-    filename = f"podcast_{uuid.uuid4().hex[:12]}.mp3"
+    filename = filename or f"podcast_{uuid.uuid4().hex[:12]}.mp3"
     filepath = PODCAST_DIR / filename
+    # Write to a temporary name so a half-written file is never served or
+    # cached, per process as another worker may be caching the same podcast
+    tmp_path = filepath.with_name(f"{filepath.stem}.{os.getpid()}.part")
 
     try:
-        communicate = edge_tts.Communicate(script, voice)
-        await communicate.save(str(filepath))
+        with open(tmp_path, "wb") as f:
+            async for audio in synthesize_chunks(script, voice):
+                f.write(audio)
+        os.replace(tmp_path, filepath)
         file_size = os.path.getsize(filepath)
         logger.info(f"Generated podcast audio: {filename} ({file_size} bytes)")
         return filename
     except Exception as e:
         logger.error(f"Failed to generate podcast audio: {e}")
         # Clean up partial file if it exists
-        if filepath.exists():
-            filepath.unlink()
+        if tmp_path.exists():
+            tmp_path.unlink()
         raise
 
 
+# ---------------------------------------------------------------------------
+# Result cache
+# ---------------------------------------------------------------------------
+
+_cache_stats = {"hits": 0, "misses": 0}
+_inflight: Dict[str, "asyncio.Task[str]"] = {}
+_script_inflight: Dict[str, "asyncio.Task[str]"] = {}
+
+
+def podcast_cache_key(markdown: str, voice: str) -> str:
+    """Stable key for a (markdown, voice) pair."""
+    digest = hashlib.sha256()
+    digest.update(voice.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(markdown.encode("utf-8"))
+    return digest.hexdigest()[:24]
+
+
+def _log_cache_stats(outcome: str, key: str) -> None:
+    hits, misses = _cache_stats["hits"], _cache_stats["misses"]
+    ratio = hits / (hits + misses)
+    logger.info(
+        f"Podcast cache {outcome} for {key}: {hits} hits, {misses} misses "
+        f"({ratio:.0%} hit rate)"
+    )
+
+
+def evict_podcasts(
+    max_bytes: Optional[int] = None,
+    max_age_days: Optional[int] = None,
+) -> int:
+    """
+    Delete podcasts older than max_age_days, then the least recently used
+    ones until PODCAST_DIR fits in max_bytes. Returns the number of podcasts
+    removed. A cache hit refreshes a podcast's mtime.
+    """
+    max_bytes = settings.podcast_cache_max_bytes if max_bytes is None else max_bytes
+    max_age_days = settings.podcast_cache_max_age_days if max_age_days is None else max_age_days
+
+    podcasts = []
+    for audio in PODCAST_DIR.glob("podcast_*.mp3"):
+        try:
+            stat = audio.stat()
+        except FileNotFoundError:
+            continue
+        podcasts.append((stat.st_mtime, stat.st_size, audio))
+    podcasts.sort()  # least recently used first
+
+    cutoff = time.time() - max_age_days * 86400 if max_age_days else None
+    total = sum(size for _, size, _ in podcasts)
+    removed = 0
+    for mtime, size, audio in podcasts:
+        expired = cutoff is not None and mtime < cutoff
+        oversized = bool(max_bytes) and total > max_bytes
+        if not expired and not oversized:
+            continue
+        audio.unlink(missing_ok=True)
+        audio.with_suffix(".json").unlink(missing_ok=True)
+        audio.with_suffix(".txt").unlink(missing_ok=True)
+        total -= size
+        removed += 1
+
+    # Scripts prepared for streaming whose audio was never completed
+    if cutoff is not None:
+        for pattern in ("podcast_*.json", "podcast_*.txt"):
+            for script in PODCAST_DIR.glob(pattern):
+                if not script.with_suffix(".mp3").exists() and script.stat().st_mtime < cutoff:
+                    script.unlink(missing_ok=True)
+
+    if removed:
+        logger.info(f"Evicted {removed} cached podcast(s), {total} bytes remain")
+    return removed
+
+
+def _script_path(key: str) -> Path:
+    return PODCAST_DIR / f"podcast_{Path(key).name}.json"
+
+
+def _read_script(key: str) -> Optional[Tuple[str, str]]:
+    """The stored (script, voice) for a key, or None."""
+    path = _script_path(key)
+    if path.exists():
+        stored = json.loads(path.read_text(encoding="utf-8"))
+        return stored["script"], stored["voice"]
+    # Scripts cached before the voice was stored all used the default one
+    legacy = path.with_suffix(".txt")
+    if legacy.exists():
+        return legacy.read_text(encoding="utf-8"), DEFAULT_VOICE
+    return None
+
+
+async def _load_or_generate_script(key: str, markdown: str, voice: str) -> str:
+    """Return the cached script for a key, generating it once if missing."""
+    stored = _read_script(key)
+    if stored is not None:
+        return stored[0]
+
+    task = _script_inflight.get(key)
+    if task is None:
+        async def _generate() -> str:
+            script = await generate_podcast_script(markdown)
+            # Stored with its voice, so any worker can synthesize it from disk
+            _script_path(key).write_text(
+                json.dumps({"script": script, "voice": voice}), encoding="utf-8"
+            )
+            return script
+
+        task = asyncio.ensure_future(_generate())
+        _script_inflight[key] = task
+        task.add_done_callback(lambda _: _script_inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+
+async def _generate_and_store(markdown: str, voice: str, key: str) -> str:
+    script = await _load_or_generate_script(key, markdown, voice)
+    await generate_podcast_audio(script, voice, filename=f"podcast_{key}.mp3")
+    evict_podcasts()
+    return script
+
+
 async def generate_podcast(markdown: str, voice: str = DEFAULT_VOICE) -> dict:
     """
     Full podcast pipeline: markdown → script → audio.
     Returns dict with filename and script.
     """
-    script = await generate_podcast_script(markdown)
-    filename = await generate_podcast_audio(script, voice)
+    key = podcast_cache_key(markdown, voice)
+    filename = f"podcast_{key}.mp3"
+    audio_path = PODCAST_DIR / filename
+    stored = _read_script(key) if audio_path.exists() else None
+
+    if stored is not None:
+        _cache_stats["hits"] += 1
+        _log_cache_stats("hit", key)
+        os.utime(audio_path)
+        script = stored[0]
+    else:
+        # Identical concurrent requests share one generation run
+        task = _inflight.get(key)
+        if task is None:
+            _cache_stats["misses"] += 1
+            _log_cache_stats("miss", key)
+            task = asyncio.ensure_future(_generate_and_store(markdown, voice, key))
+            _inflight[key] = task
+            task.add_done_callback(lambda _: _inflight.pop(key, None))
+        script = await asyncio.shield(task)
+
     return {
         "filename": filename,
         "script": script,
         "audio_url": f"/api/overview/podcast/{filename}",
     }
+
+
+# ---------------------------------------------------------------------------
+# Progressive streaming
+#
+# prepare_podcast_stream() only writes the script; the audio is synthesized
+# while the client plays it from stream_podcast_audio(), and written to the
+# cache at the same time so later requests are served from disk.
+# ---------------------------------------------------------------------------
+
+MAX_PENDING_STREAMS = 32
+_pending_streams: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+
+
+def _podcast_result(key: str, script: str) -> dict:
+    filename = f"podcast_{key}.mp3"
+    return {
+        "filename": filename,
+        "script": script,
+        "audio_url": f"/api/overview/podcast/{filename}",
+        "stream_url": f"/api/overview/podcast/stream/{key}",
+    }
+
+
+async def prepare_podcast_stream(markdown: str, voice: str = DEFAULT_VOICE) -> dict:
+    """
+    Generate (or load) the podcast script and register it for streaming.
+    Returns the same dict as generate_podcast plus a `stream_url`.
+    """
+    key = podcast_cache_key(markdown, voice)
+    audio_path = PODCAST_DIR / f"podcast_{key}.mp3"
+
+    script = await _load_or_generate_script(key, markdown, voice)
+    if audio_path.exists():
+        _cache_stats["hits"] += 1
+        _log_cache_stats("hit", key)
+        os.utime(audio_path)
+        return _podcast_result(key, script)
+
+    _cache_stats["misses"] += 1
+    _log_cache_stats("miss", key)
+    _pending_streams[key] = (script, voice)
+    _pending_streams.move_to_end(key)
+    while len(_pending_streams) > MAX_PENDING_STREAMS:
+        _pending_streams.popitem(last=False)
+    return _podcast_result(key, script)
+
+
+def has_podcast_stream(key: str) -> bool:
+    """
+    True if the podcast can be streamed. With several API workers the stream
+    may be requested from a different process than the one that prepared
+    it, so a script found on disk is registered here on demand.
+    """
+    if key in _pending_streams:
+        return True
+    stored = _read_script(key)
+    if stored is None:
+        return False
+    _pending_streams[key] = stored
+    while len(_pending_streams) > MAX_PENDING_STREAMS:
+        _pending_streams.popitem(last=False)
+    return True
+
+
+class _SharedSynthesis:
+    """
+    One synthesis of a prepared podcast, written into the cache as it goes.
+    Every listener of the key replays the chunks synthesized so far and then
+    follows along, so concurrent listeners share one run. Like generate_podcast
+    runs, it completes even if every listener disconnects.
+    """
+
+    def __init__(self, key: str, script: str, voice: str):
+        self.key = key
+        self.chunks: List[bytes] = []
+        self.finished = False
+        self.error: Optional[BaseException] = None
+        self._updated = asyncio.Event()
+        self.task = asyncio.ensure_future(self._run(script, voice))
+
+    def _notify(self) -> None:
+        updated, self._updated = self._updated, asyncio.Event()
+        updated.set()
+
+    async def _run(self, script: str, voice: str) -> None:
+        filename = f"podcast_{self.key}.mp3"
+        filepath = PODCAST_DIR / filename
+        # Per-process temp file: another worker may be caching the same podcast
+        tmp_path = filepath.with_name(f"{filepath.stem}.{os.getpid()}.part")
+        try:
+            with open(tmp_path, "wb") as f:
+                async for audio in synthesize_chunks(script, voice):
+                    f.write(audio)
+                    self.chunks.append(audio)
+                    self._notify()
+            os.replace(tmp_path, filepath)
+            _pending_streams.pop(self.key, None)
+            logger.info(f"Streamed and cached podcast audio: {filename}")
+            evict_podcasts()
+        except BaseException as e:
+            tmp_path.unlink(missing_ok=True)
+            self.error = e
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            logger.error(f"Failed to stream podcast audio {filename}: {e}")
+        finally:
+            self.finished = True
+            _live_streams.pop(self.key, None)
+            self._notify()
+
+    async def listen(self) -> AsyncIterator[bytes]:
+        sent = 0
+        while True:
+            updated = self._updated
+            while sent < len(self.chunks):
+                yield self.chunks[sent]
+                sent += 1
+            if self.finished:
+                if self.error is not None:
+                    raise RuntimeError(f"Podcast synthesis failed: {self.error}")
+                return
+            await updated.wait()
+
+
+_live_streams: Dict[str, _SharedSynthesis] = {}
+
+
+async def stream_podcast_audio(key: str) -> AsyncIterator[bytes]:
+    """
+    Yield MP3 audio for a prepared podcast chunk by chunk. The first stream
+    for a key starts the synthesis, which also writes the audio into the
+    cache; streams opened meanwhile join it instead of synthesizing again.
+    """
+    synthesis = _live_streams.get(key)
+    if synthesis is None and key not in _pending_streams:
+        # Finished since the caller checked for the cached file
+        with open(PODCAST_DIR / f"podcast_{key}.mp3", "rb") as f:
+            while audio := f.read(64 * 1024):
+                yield audio
+        return
+    if synthesis is None:
+        script, voice = _pending_streams[key]
+        synthesis = _SharedSynthesis(key, script, voice)
+        _live_streams[key] = synthesis
+    async for audio in synthesis.listen():
+        yield audio
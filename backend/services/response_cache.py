@@ -0,0 +1,134 @@
+"""
+HTTP Response Cache
+Serialized JSON bodies for read-only endpoints, keyed by route and query
+parameters and valid for one dataset version. Every response carries a
+strong ETag (a hash of its body), so clients revalidate with If-None-Match
+and get a 304 when nothing changed. Bodies are gzipped for clients that
+accept it, and the compressed copy is cached alongside the plain one.
+"""
+import gzip
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, NamedTuple, Optional
+
+from fastapi import Request, Response
+
+from config import settings
+from services.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# Clients may store responses but must revalidate before every reuse, since
+# listings change whenever ingestion commits
+CACHE_CONTROL = "public, no-cache"
+GZIP_MIN_BYTES = 1024
+
+
+class CachedBody(NamedTuple):
+    body: bytes
+    etag: str
+    gzipped: Optional[bytes] = None  # filled in the first time a client accepts gzip
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + len(self.gzipped or b"")
+
+
+class ResponseCache:
+    """Size-bounded LRU of serialized bodies for the current dataset version."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, CachedBody]" = OrderedDict()
+        self._size = 0
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: int) -> Optional[CachedBody]:
+        with self._lock:
+            if version != self._version:
+                # Every entry belongs to an older dataset version
+                self._entries.clear()
+                self._size = 0
+                self._version = version
+                return None
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Hashable, version: int, entry: CachedBody) -> None:
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            if version != self._version:
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old.size
+            self._entries[key] = entry
+            self._size += entry.size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+
+
+response_cache = ResponseCache(settings.response_cache_max_bytes)
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison, so a W/ prefix is ignored."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def _accepts_gzip(request: Request) -> bool:
+    return "gzip" in request.headers.get("accept-encoding", "").lower()
+
+
+def cached_response(
+    request: Request,
+    key: Optional[Hashable],
+    version: int,
+    build: Callable[[], bytes],
+) -> Response:
+    """
+    Serve a JSON body from the cache or `build()` it, with ETag and
+    Cache-Control headers, gzipped if the client accepts it. A `key` of None
+    skips the cache (for responses that depend on the clock), but the ETag
+    still applies.
+    """
+    entry = response_cache.get(key, version) if key is not None else None
+    changed = entry is None
+    if entry is None:
+        body = build()
+        entry = CachedBody(body, make_etag(body))
+
+    use_gzip = _accepts_gzip(request) and len(entry.body) >= GZIP_MIN_BYTES
+    if use_gzip and entry.gzipped is None:
+        # mtime=0 makes the compressed bytes identical across processes
+        with timed("gzip"):
+            entry = entry._replace(gzipped=gzip.compress(entry.body, mtime=0))
+        changed = True
+    if changed and key is not None:
+        response_cache.put(key, version, entry)
+
+    headers = {"Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if use_gzip:
+        # Each encoding is its own representation and needs its own strong ETag
+        content, headers["ETag"] = entry.gzipped, entry.etag[:-1] + '-gzip"'
+        headers["Content-Encoding"] = "gzip"
+    else:
+        content, headers["ETag"] = entry.body, entry.etag
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        headers.pop("Content-Encoding", None)
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type="application/json", headers=headers)
@@ -0,0 +1,198 @@
+"""
+Paper Summary Service
+Compact structured summaries of each paper (key contribution, method,
+results), written in the background after ingestion and stored on the
+paper. Overview prompts use them in place of the abstracts, so a batch of
+the same token budget covers several times as many papers.
+
+Papers are summarized several per LLM call, a bounded number of calls at a
+time. Every batch is committed as soon as its reply arrives and papers are
+picked by `summary_status`, so an interrupted run resumes where it stopped.
+"""
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.orm import load_only
+
+from config import settings
+from database import SessionLocal
+from models import Paper, SUMMARY_PENDING, SUMMARY_READY, SUMMARY_FAILED
+from services.llm_service import call_llm
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_FIELDS = ("contribution", "method", "results")
+ABSTRACT_MAX_CHARS = 3_000
+CHUNK_BATCHES = 4  # batches per concurrent call loaded from the DB at a time
+
+SYSTEM_PROMPT_SUMMARIZE = """You write compact structured digests of research papers.
+For every paper, state its key contribution, its method and its results, each in one
+sentence of at most 25 words. Keep concrete names, datasets and numbers.
+Answer with a JSON array only, one object per paper, in this form:
+[{"id": "<paper id>", "contribution": "...", "method": "...", "results": "..."}]
+"""
+
+
+# ---------------------------------------------------------------------------
+# Formatting
+# ---------------------------------------------------------------------------
+
+def render_summary(summary: Optional[str]) -> Optional[str]:
+    """Prompt text for a stored summary, or None if there is none."""
+    if not summary:
+        return None
+    try:
+        fields = json.loads(summary)
+    except ValueError:
+        return None
+    return (
+        f"**Contribution:** {fields['contribution']}\n"
+        f"**Method:** {fields['method']}\n"
+        f"**Results:** {fields['results']}"
+    )
+
+
+def parse_summaries(reply: str) -> Dict[str, dict]:
+    """The complete summaries in an LLM reply, by paper ID."""
+    start, end = reply.find("["), reply.rfind("]")
+    if start < 0 or end < start:
+        return {}
+    try:
+        items = json.loads(reply[start:end + 1])
+    except ValueError:
+        return {}
+    summaries = {}
+    for item in items:
+        if not isinstance(item, dict) or not item.get("id"):
+            continue
+        fields = {field: str(item.get(field) or "").strip() for field in SUMMARY_FIELDS}
+        if all(fields.values()):
+            summaries[str(item["id"])] = fields
+    return summaries
+
+
+def _batch_prompt(papers: List[Paper]) -> str:
+    entries = "\n\n".join(
+        f"[{p.id}] {p.title}\n{(p.abstract or '')[:ABSTRACT_MAX_CHARS]}" for p in papers
+    )
+    return f"Summarize these {len(papers)} papers:\n\n{entries}"
+
+
+# ---------------------------------------------------------------------------
+# Background run
+# ---------------------------------------------------------------------------
+
+def _pending_ids() -> List[str]:
+    """Papers waiting for a summary, newest first."""
+    query = select(Paper.id).where(Paper.summary_status == SUMMARY_PENDING)
+    if settings.paper_summary_days:
+        since = datetime.utcnow() - timedelta(days=settings.paper_summary_days)
+        query = query.where(Paper.published_date >= since)
+    db = SessionLocal()
+    try:
+        return list(db.execute(query.order_by(Paper.published_date.desc())).scalars())
+    finally:
+        db.close()
+
+
+def _store_summaries(paper_ids: List[str], summaries: Dict[str, dict]) -> int:
+    """
+    Store a batch's summaries. Papers the reply left out count an attempt
+    and are marked failed after paper_summary_max_retries. Returns the
+    number of papers that failed for good.
+    """
+    failed = 0
+    db = SessionLocal()
+    try:
+        papers = (
+            db.query(Paper)
+            .options(load_only(Paper.id, Paper.summary, Paper.summary_status, Paper.summary_attempts))
+            .filter(Paper.id.in_(paper_ids))
+        )
+        for paper in papers:
+            fields = summaries.get(paper.id)
+            if fields:
+                paper.summary = json.dumps(fields)
+                paper.summary_status = SUMMARY_READY
+                continue
+            paper.summary_attempts = (paper.summary_attempts or 0) + 1
+            if paper.summary_attempts >= settings.paper_summary_max_retries:
+                paper.summary_status = SUMMARY_FAILED
+                failed += 1
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    return failed
+
+
+async def summarize_pending_papers(
+    on_progress: Optional[Callable[[float, str], None]] = None,
+) -> Dict[str, int]:
+    """
+    Summarize every pending paper within paper_summary_days. Papers stored
+    while the run is going are picked up before it ends. Raises if the LLM
+    failed every call of a chunk, leaving the rest for the next run.
+    """
+    report = on_progress or (lambda fraction, message: None)
+    batch_size = max(settings.paper_summary_batch_size, 1)
+    concurrency = max(settings.paper_summary_concurrency, 1)
+    semaphore = asyncio.Semaphore(concurrency)
+    counts = {"summarized": 0, "failed": 0}
+    seen: Set[str] = set()
+
+    async def summarize_batch(papers: List[Paper]) -> bool:
+        async with semaphore:
+            try:
+                reply = await call_llm(
+                    messages=[
+                        {"role": "system", "content": SYSTEM_PROMPT_SUMMARIZE},
+                        {"role": "user", "content": _batch_prompt(papers)},
+                    ],
+                    timeout=120,
+                    caller="paper-summarize",
+                )
+            except Exception as e:
+                # Not the papers' fault: they stay pending without an attempt
+                logger.error(f"Summary LLM call failed for {len(papers)} papers: {e}")
+                return False
+        summaries = parse_summaries(reply)
+        ids = [p.id for p in papers]
+        counts["failed"] += await asyncio.to_thread(_store_summaries, ids, summaries)
+        counts["summarized"] += sum(1 for paper_id in ids if paper_id in summaries)
+        return True
+
+    while True:
+        paper_ids = [paper_id for paper_id in await asyncio.to_thread(_pending_ids) if paper_id not in seen]
+        if not paper_ids:
+            break
+        total = len(seen) + len(paper_ids)
+        chunk_size = batch_size * concurrency * CHUNK_BATCHES
+        for i in range(0, len(paper_ids), chunk_size):
+            chunk = paper_ids[i:i + chunk_size]
+            db = SessionLocal()
+            try:
+                papers = (
+                    db.query(Paper)
+                    .options(load_only(Paper.id, Paper.title, Paper.abstract))
+                    .filter(Paper.id.in_(chunk))
+                    .all()
+                )
+                db.expunge_all()
+            finally:
+                db.close()
+            batches = [papers[j:j + batch_size] for j in range(0, len(papers), batch_size)]
+            succeeded = await asyncio.gather(*(summarize_batch(b) for b in batches))
+            if batches and not any(succeeded):
+                raise RuntimeError("Every summary LLM call failed, giving up until the next run")
+            seen.update(chunk)
+            report(len(seen) / total, f"Summarized {counts['summarized']} of {total} papers")
+
+    logger.info(f"Paper summaries: {counts['summarized']} written, {counts['failed']} failed")
+    return counts
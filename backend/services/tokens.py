@@ -0,0 +1,21 @@
+"""
+Token Counting
+Uses cl100k_base encoding (GPT-4/3.5 tokenizer) as a reasonable
+approximation for any model. It's close enough for budget enforcement
+and usage estimates.
+"""
+import tiktoken
+
+_encoding = tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str) -> int:
+    """Estimate token count for a string."""
+    return len(_encoding.encode(text))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    tokens = _encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return _encoding.decode(tokens[:max_tokens])
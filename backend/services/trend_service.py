@@ -0,0 +1,397 @@
+"""
+Trend Engine
+Weekly and monthly rollups of term frequencies (papers mentioning each
+title/abstract unigram and bigram) and category volumes, scored into
+emerging, peaking and fading terms for the "Macro Lens".
+
+- Term counts live in `term_period_counts`. Ingestion increments them per
+  paper; `rebuild_term_rollups` recomputes them with NumPy for databases
+  that predate the table.
+- Category volumes and period totals are summed from the daily facet rollups.
+- Scores are computed with NumPy over a terms x periods matrix and cached
+  in-process until the dataset version changes.
+"""
+import logging
+import re
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from models import Paper, TermPeriodCount
+from services.dataset_version import current_version
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ("week", "month")
+
+# Common English words plus the boilerplate every abstract shares
+STOPWORDS = frozenset("""
+a about above across after again against all almost also although always am
+among an and another any are around as at be because been before being below
+between both but by can cannot could did do does doing done down due during
+each either else enough etc even ever every few for from further get given
+had has have having here how however if in into is it its itself just least
+less like made make many may might more most much must neither no nor not of
+off often on once one only or other our ours out over own per rather same
+several should show shows shown since so some such than that the their them
+then there these they this those through thus to too toward towards two under
+until up upon us use used uses using very via was we well were what when
+where whether which while who whom whose why will with within without would
+yet you your
+paper papers propose proposed proposes present presents presented approach
+approaches method methods result results new novel work study studies based
+demonstrate demonstrates experiment experiments experimental show showed
+achieve achieves achieved provide provides existing recent recently first
+introduce introduces introduced state art across various different several
+significant significantly furthermore moreover addition additionally
+""".split())
+
+_CLAUSE = re.compile(r"[.;:!?]\s+|[()\[\]\n]")
+_TOKEN = re.compile(r"[a-z][a-z0-9]*(?:-[a-z0-9]+)*")
+
+_CACHE_SIZE = 64
+_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+# ---------------------------------------------------------------------------
+# Terms and periods
+# ---------------------------------------------------------------------------
+
+def extract_terms(*texts: Optional[str]) -> Set[str]:
+    """Unigrams and bigrams of non-stopwords; bigrams never span a clause."""
+    terms: Set[str] = set()
+    for body in texts:
+        for clause in _CLAUSE.split((body or "").lower()):
+            previous = None
+            for token in _TOKEN.findall(clause):
+                if len(token) < 3 or token in STOPWORDS:
+                    previous = None
+                    continue
+                terms.add(token)
+                if previous:
+                    terms.add(f"{previous} {token}")
+                previous = token
+    return terms
+
+
+def period_start(day: date, granularity: str) -> date:
+    """Monday of the week, or the first of the month."""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def shift_period(start: date, granularity: str, n: int) -> date:
+    """Move a period start by n periods."""
+    if granularity == "week":
+        return start + timedelta(weeks=n)
+    months = start.year * 12 + start.month - 1 + n
+    return date(months // 12, months % 12 + 1, 1)
+
+
+# SQLite expressions mapping a YYYY-MM-DD `day` column to its period start
+_PERIOD_SQL = {
+    "week": "date(day, 'weekday 0', '-6 days')",
+    "month": "strftime('%Y-%m-01', day)",
+}
+
+
+# ---------------------------------------------------------------------------
+# Rollup maintenance
+# ---------------------------------------------------------------------------
+
+def _upsert_statement():
+    stmt = sqlite_insert(TermPeriodCount)
+    return stmt.on_conflict_do_update(
+        index_elements=["granularity", "period_start", "term"],
+        set_={"paper_count": TermPeriodCount.paper_count + stmt.excluded.paper_count},
+    )
+
+
+def record_paper_terms(db: Session, paper: Paper) -> None:
+    """Count a newly stored paper's terms. Call before commit."""
+    if paper.published_date is None:
+        return
+    terms = extract_terms(paper.title, paper.abstract)
+    if not terms:
+        return
+    day = paper.published_date.date()
+    db.execute(_upsert_statement(), [
+        {"granularity": g, "period_start": period_start(day, g), "term": term, "paper_count": 1}
+        for g in GRANULARITIES
+        for term in terms
+    ])
+
+
+def rebuild_term_rollups(conn: Connection, chunk_size: int = 20000) -> None:
+    """
+    Recompute `term_period_counts` from every stored paper. Terms are mapped
+    to integer IDs and (period, term) pairs counted with NumPy per chunk, so
+    Python only does the tokenizing.
+    """
+    conn.execute(text("DELETE FROM term_period_counts"))
+    vocab: Dict[str, int] = {}
+    period_ids: Dict[tuple, int] = {}
+    partial_keys: List[np.ndarray] = []
+    partial_counts: List[np.ndarray] = []
+
+    def flush(doc_terms: List[np.ndarray], doc_periods: List[List[int]]) -> None:
+        if not doc_terms:
+            return
+        lengths = np.fromiter((len(t) for t in doc_terms), dtype=np.int64, count=len(doc_terms))
+        term_ids = np.concatenate(doc_terms)
+        for g_index in range(len(GRANULARITIES)):
+            periods = np.repeat(np.array([p[g_index] for p in doc_periods], dtype=np.int64), lengths)
+            keys, counts = np.unique((periods << 32) | term_ids, return_counts=True)
+            partial_keys.append(keys)
+            partial_counts.append(counts)
+        doc_terms.clear()
+        doc_periods.clear()
+
+    doc_terms: List[np.ndarray] = []
+    doc_periods: List[List[int]] = []
+    rows = conn.execute(text(
+        "SELECT published_date, title, abstract FROM papers WHERE published_date IS NOT NULL"
+    ))
+    for published, title, abstract in rows:
+        terms = extract_terms(title, abstract)
+        if not terms:
+            continue
+        day = date.fromisoformat(str(published)[:10])
+        doc_periods.append([
+            period_ids.setdefault((g, period_start(day, g)), len(period_ids))
+            for g in GRANULARITIES
+        ])
+        doc_terms.append(np.fromiter(
+            (vocab.setdefault(term, len(vocab)) for term in terms), dtype=np.int64, count=len(terms)
+        ))
+        if len(doc_terms) >= chunk_size:
+            flush(doc_terms, doc_periods)
+    flush(doc_terms, doc_periods)
+    if not partial_keys:
+        return
+
+    # Merge the per-chunk counts: sort all keys once and sum equal runs
+    keys = np.concatenate(partial_keys)
+    counts = np.concatenate(partial_counts)
+    order = np.argsort(keys, kind="stable")
+    keys, counts = keys[order], counts[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    keys, counts = keys[starts], np.add.reduceat(counts, starts)
+
+    terms_by_id = np.array(list(vocab), dtype=object)
+    periods_by_id = [None] * len(period_ids)
+    for period, index in period_ids.items():
+        periods_by_id[index] = period
+    insert = text(
+        "INSERT INTO term_period_counts (granularity, period_start, term, paper_count) "
+        "VALUES (:g, :p, :t, :n)"
+    )
+    batch = []
+    for key, term, count in zip(keys.tolist(), terms_by_id[keys & 0xFFFFFFFF], counts.tolist()):
+        granularity, start = periods_by_id[key >> 32]
+        batch.append({"g": granularity, "p": start.isoformat(), "t": term, "n": count})
+        if len(batch) >= 50000:
+            conn.execute(insert, batch)
+            batch = []
+    if batch:
+        conn.execute(insert, batch)
+    logger.info(f"Rebuilt term rollups: {len(keys)} rows, {len(vocab)} distinct terms")
+
+
+# ---------------------------------------------------------------------------
+# Scoring
+# ---------------------------------------------------------------------------
+
+def _period_index(periods: List[date]) -> Dict[str, int]:
+    return {p.isoformat(): i for i, p in enumerate(periods)}
+
+
+def _scored(terms, bigram, scores, mask, recent_counts, baseline_counts, growth, counts, limit) -> List[Dict]:
+    indices = np.flatnonzero(mask)
+    # Best score first; on ties the bigram wins over its own words
+    indices = indices[np.lexsort((~bigram[indices], -scores[indices]))]
+    picked, covered = [], set()
+    for i in indices:
+        words = set(terms[i].split())
+        if not words <= covered or bigram[i]:
+            picked.append(i)
+            covered |= words
+        if len(picked) == limit:
+            break
+    return [
+        {
+            "term": terms[i],
+            "score": round(float(scores[i]), 3),
+            "recent_count": int(recent_counts[i]),
+            "baseline_count": int(baseline_counts[i]),
+            "growth": round(float(growth[i]), 3),
+            "counts": counts[i].astype(int).tolist(),
+        }
+        for i in picked
+    ]
+
+
+def _compute_trends(
+    db: Session, granularity: str, periods: int, end: Optional[date], limit: int, min_count: int
+) -> Dict:
+    if end is None:
+        latest = db.execute(text("SELECT MAX(day) FROM daily_paper_counts")).scalar()
+        if latest is None:
+            return {"granularity": granularity, "periods": [], "paper_counts": [],
+                    "categories": [], "emerging": [], "peaking": [], "fading": []}
+        end = date.fromisoformat(str(latest))
+    last = period_start(end, granularity)
+    starts = [shift_period(last, granularity, -i) for i in reversed(range(periods))]
+    index = _period_index(starts)
+    bounds = {"first": starts[0].isoformat(), "stop": shift_period(last, granularity, 1).isoformat()}
+    period_sql = _PERIOD_SQL[granularity]
+
+    totals = np.zeros(periods)
+    for start, count in db.execute(text(
+        f"SELECT {period_sql} AS p, SUM(paper_count) FROM daily_paper_counts "
+        f"WHERE day >= :first AND day < :stop GROUP BY p"
+    ), bounds):
+        totals[index[start]] = count
+
+    category_names: Dict[str, int] = {}
+    category_rows = db.execute(text(
+        f"SELECT c.name, {period_sql} AS p, SUM(d.paper_count) "
+        f"FROM daily_category_counts d JOIN categories c ON c.id = d.category_id "
+        f"WHERE d.day >= :first AND d.day < :stop GROUP BY d.category_id, p"
+    ), bounds).all()
+    for name, _, _ in category_rows:
+        category_names.setdefault(name, len(category_names))
+    category_counts = np.zeros((len(category_names), periods))
+    for name, start, count in category_rows:
+        category_counts[category_names[name], index[start]] = count
+
+    term_rows = db.execute(text(
+        "SELECT term, period_start, paper_count FROM term_period_counts "
+        "WHERE granularity = :g AND period_start >= :first AND period_start < :stop"
+    ), {**bounds, "g": granularity}).all()
+
+    # The newest third of the window is "now", everything before it "then"
+    recent = max(1, periods // 3)
+    recent_total, baseline_total = totals[-recent:].sum(), totals[:-recent].sum()
+    result = {
+        "granularity": granularity,
+        "periods": [p.isoformat() for p in starts],
+        "paper_counts": totals.astype(int).tolist(),
+        "recent_periods": recent,
+        "baseline_periods": periods - recent,
+        "categories": [],
+        "emerging": [],
+        "peaking": [],
+        "fading": [],
+    }
+    if baseline_total == 0 or recent_total == 0:
+        return result
+
+    def growth_of(matrix: np.ndarray):
+        recent_counts = matrix[:, -recent:].sum(axis=1)
+        baseline_counts = matrix[:, :-recent].sum(axis=1)
+        # log2 ratio of the smoothed share of papers now vs then
+        growth = (np.log2((recent_counts + 1) / (recent_total + 1))
+                  - np.log2((baseline_counts + 1) / (baseline_total + 1)))
+        return recent_counts, baseline_counts, growth
+
+    names = np.array(list(category_names), dtype=object)
+    if len(names):
+        _, _, category_growth = growth_of(category_counts)
+        order = np.argsort(-category_counts.sum(axis=1), kind="stable")
+        result["categories"] = [
+            {
+                "name": names[i],
+                "counts": category_counts[i].astype(int).tolist(),
+                "growth": round(float(category_growth[i]), 3),
+            }
+            for i in order
+        ]
+
+    if not term_rows:
+        return result
+    terms, term_index = np.unique(
+        np.array([row[0] for row in term_rows], dtype=object), return_inverse=True
+    )
+    column = np.fromiter((index[str(row[1])] for row in term_rows), dtype=np.int64, count=len(term_rows))
+    counts = np.zeros((len(terms), periods))
+    np.add.at(counts, (term_index, column), np.fromiter(
+        (row[2] for row in term_rows), dtype=np.float64, count=len(term_rows)
+    ))
+
+    recent_counts, baseline_counts, growth = growth_of(counts)
+    supported = counts.sum(axis=1) >= min_count
+
+    # Least-squares slope of each term's share over the newer half of the
+    # window separates terms still rising from those that have turned
+    shares = counts / np.maximum(totals, 1)
+    newer = shares[:, periods // 2:]
+    steps = np.arange(newer.shape[1]) - (newer.shape[1] - 1) / 2
+    slope = newer @ steps / max(float(steps @ steps), 1.0)
+
+    bigram = np.fromiter((" " in term for term in terms), dtype=bool, count=len(terms))
+    rising = supported & (growth > 0)
+    rise_score = growth * np.log1p(recent_counts)
+    fall_score = -growth * np.log1p(baseline_counts)
+    result["emerging"] = _scored(terms, bigram, rise_score, rising & (slope > 0),
+                                 recent_counts, baseline_counts, growth, counts, limit)
+    result["peaking"] = _scored(terms, bigram, rise_score, rising & (slope <= 0),
+                                recent_counts, baseline_counts, growth, counts, limit)
+    result["fading"] = _scored(terms, bigram, fall_score, supported & (growth < 0),
+                               recent_counts, baseline_counts, growth, counts, limit)
+    return result
+
+
+def get_trends(
+    db: Session,
+    granularity: str = "week",
+    periods: int = 12,
+    end: Optional[date] = None,
+    limit: int = 10,
+    min_count: int = 5,
+) -> Dict:
+    """
+    Emerging, peaking and fading terms plus category volumes over the
+    `periods` weeks or months ending with the one containing `end` (default:
+    the latest paper). Results are cached until the dataset version changes.
+    """
+    version = current_version(db)
+    key = (granularity, periods, end, limit, min_count)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached and cached[0] == version:
+            _cache.move_to_end(key)
+            return cached[1]
+    result = _compute_trends(db, granularity, periods, end, limit, min_count)
+    with _cache_lock:
+        _cache[key] = (version, result)
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
+
+
+def trend_context(db: Session, end: date, limit: int = 5) -> str:
+    """
+    Markdown lines with real term counts for the overview prompt, comparing
+    the last four weeks before `end` with the eight weeks before those.
+    """
+    trends = get_trends(db, "week", periods=12, end=end, limit=limit)
+    if not trends["emerging"] and not trends["fading"]:
+        return ""
+    recent, baseline = trends["recent_periods"], trends["baseline_periods"]
+    lines = [f"Term counts: papers in the last {recent} weeks vs the {baseline} weeks before."]
+    for label in ("emerging", "peaking", "fading"):
+        for item in trends[label]:
+            lines.append(
+                f"- {label}: \"{item['term']}\": {item['recent_count']} vs {item['baseline_count']} papers"
+            )
+    return "\n".join(lines)
@@ -6,6 +6,8 @@ export default function ChatInterface({ paperId }) {
     const [messages, setMessages] = useState([])
     const [input, setInput] = useState('')
     const [loading, setLoading] = useState(false)
+    // History lives on the server; each turn sends only the new message
+    const [sessionId, setSessionId] = useState(null)
     const messagesEndRef = useRef(null)
 
     const scrollToBottom = () => {
@@ -16,11 +18,15 @@ export default function ChatInterface({ paperId }) {
         scrollToBottom()
     }, [messages, loading])
 
+    useEffect(() => {
+        setMessages([])
+        setSessionId(null)
+    }, [paperId])
+
     const handleSend = async () => {
         if (!input.trim() || loading) return
         const newMsg = { role: 'user', content: input }
-        const updatedMessages = [...messages, newMsg]
-        setMessages(updatedMessages)
+        setMessages(prev => [...prev, newMsg])
         setInput('')
         setLoading(true)
 
@@ -32,7 +38,8 @@ export default function ChatInterface({ paperId }) {
                 },
                 body: JSON.stringify({
                     paper_id: paperId,
-                    messages: updatedMessages,
+                    session_id: sessionId,
+                    message: newMsg.content,
                     model: "openrouter/auto"
                 }),
             })
@@ -40,6 +47,7 @@ export default function ChatInterface({ paperId }) {
             if (!response.ok) {
                 throw new Error('Network response was not ok')
             }
+            setSessionId(response.headers.get('X-Chat-Session-Id'))
 
             const reader = response.body.getReader()
             const decoder = new TextDecoder('utf-8')
@@ -2,11 +2,13 @@ import React, { useState, useRef } from 'react'
 import axios from 'axios'
 import ReactMarkdown from 'react-markdown'
 import { BookOpen, Loader, Sparkles, RefreshCw, Send, Bot, User, MessageSquare, Mic, Download, Play, Pause, Volume2 } from 'lucide-react'
+import { readJobStream } from '../utils/jobStream'
 
 export default function ResearchOverview({ startDate, endDate, search, category }) {
     const [markdown, setMarkdown] = useState('')
     const [paperCount, setPaperCount] = useState(0)
     const [clusterCount, setClusterCount] = useState(0)
+    const [generatedAt, setGeneratedAt] = useState(null)
     const [loading, setLoading] = useState(false)
     const [error, setError] = useState('')
 
@@ -19,6 +21,7 @@ export default function ResearchOverview({ startDate, endDate, search, category
     // Podcast state
     const [podcastLoading, setPodcastLoading] = useState(false)
     const [podcastUrl, setPodcastUrl] = useState('')
+    const [podcastFileUrl, setPodcastFileUrl] = useState('')
     const [podcastError, setPodcastError] = useState('')
     const [podcastStatus, setPodcastStatus] = useState('')
     const audioRef = useRef(null)
@@ -50,38 +53,22 @@ export default function ResearchOverview({ startDate, endDate, search, category
                 throw new Error(errDetail);
             }
 
-            const reader = response.body.getReader();
-            const decoder = new TextDecoder();
-            let buffer = "";
-
-            while (true) {
-                const { done, value } = await reader.read();
-                if (done) break;
-                
-                buffer += decoder.decode(value, { stream: true });
-                const parts = buffer.split('\n\n');
-                buffer = parts.pop() || '';
-
-                for (const part of parts) {
-                    const line = part.trim();
-                    if (line.startsWith('data:')) {
-                        const dataStr = line.substring(5).trim();
-                        if (!dataStr) continue;
-                        
-                        const data = JSON.parse(dataStr);
-                        if (data.status === 'processing') {
-                            // heartbeat, do nothing
-                        } else if (data.status === 'complete') {
-                            setMarkdown(data.result.markdown);
-                            setPaperCount(data.result.paper_count);
-                            setClusterCount(data.result.cluster_count);
-                            setShowChat(true);
-                        } else if (data.status === 'error') {
-                            throw new Error(data.detail || 'Server encountered an error.');
-                        }
+            await readJobStream(response, (data) => {
+                if (data.status === 'complete') {
+                    setMarkdown(data.result.markdown);
+                    setPaperCount(data.result.paper_count);
+                    setClusterCount(data.result.cluster_count);
+                    // Timestamps are UTC without an offset
+                    setGeneratedAt(data.result.generated_at ? new Date(data.result.generated_at + 'Z') : null);
+                    if (data.result.podcast) {
+                        setPodcastUrl(data.result.podcast.audio_url);
+                        setPodcastFileUrl(data.result.podcast.audio_url);
                     }
+                    setShowChat(true);
+                } else if (data.status === 'error') {
+                    throw new Error(data.detail || 'Server encountered an error.');
                 }
-            }
+            });
         } catch (err) {
             console.error(err)
             setError(err.message || 'Failed to generate overview. Please try again.')
@@ -135,38 +122,19 @@ export default function ResearchOverview({ startDate, endDate, search, category
                 throw new Error(errDetail);
             }
 
-            const reader = response.body.getReader();
-            const decoder = new TextDecoder();
-            let buffer = "";
-
-            while (true) {
-                const { done, value } = await reader.read();
-                if (done) break;
-
-                buffer += decoder.decode(value, { stream: true });
-                const parts = buffer.split('\n\n');
-                buffer = parts.pop() || '';
-
-                for (const part of parts) {
-                    const line = part.trim();
-                    if (line.startsWith('data:')) {
-                        const dataStr = line.substring(5).trim();
-                        if (!dataStr) continue;
-
-                        const data = JSON.parse(dataStr);
-                        if (data.status === 'generating_script') {
-                            setPodcastStatus('Writing podcast script with AI...');
-                        } else if (data.status === 'processing') {
-                            setPodcastStatus('Synthesizing audio...');
-                        } else if (data.status === 'complete') {
-                            setPodcastUrl(data.result.audio_url);
-                            setPodcastStatus('');
-                        } else if (data.status === 'error') {
-                            throw new Error(data.detail || 'Failed to generate podcast.');
-                        }
-                    }
+            await readJobStream(response, (data) => {
+                if (data.status === 'processing') {
+                    setPodcastStatus('Writing podcast script with AI...');
+                } else if (data.status === 'complete') {
+                    // stream_url starts playback while the audio is still being synthesized;
+                    // audio_url only exists once it is done, so downloads use the stream too
+                    setPodcastUrl(data.result.stream_url || data.result.audio_url);
+                    setPodcastFileUrl(data.result.stream_url ? '' : data.result.audio_url);
+                    setPodcastStatus('');
+                } else if (data.status === 'error') {
+                    throw new Error(data.detail || 'Failed to generate podcast.');
                 }
-            }
+            });
         } catch (err) {
             console.error(err)
             setPodcastError(err.message || 'Failed to generate podcast.')
@@ -263,6 +231,7 @@ export default function ResearchOverview({ startDate, endDate, search, category
                         </h1>
                         <p style={{ color: 'var(--text-secondary)', fontSize: '0.9rem' }}>
                             {paperCount} papers · {clusterCount} categories
+                            {generatedAt && ` · Generated ${generatedAt.toLocaleString()}`}
                         </p>
                     </div>
                     <div style={{ display: 'flex', gap: '8px', flexWrap: 'wrap' }}>
@@ -310,7 +279,7 @@ export default function ResearchOverview({ startDate, endDate, search, category
                                     />
                                 </div>
                                 <a
-                                    href={podcastUrl}
+                                    href={podcastFileUrl || podcastUrl}
                                     download
                                     className="btn podcast-download"
                                     title="Download MP3"
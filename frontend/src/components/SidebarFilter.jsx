@@ -1,7 +1,7 @@
 import React from 'react'
 import { Search, List, Sparkles, Download } from 'lucide-react'
 
-export default function SidebarFilter({ search, setSearch, category, setCategory, startDate, setStartDate, endDate, setEndDate, showOverview, setShowOverview, onFetchRange, fetchingPapers, fetchMessage }) {
+export default function SidebarFilter({ search, setSearch, category, setCategory, startDate, setStartDate, endDate, setEndDate, showOverview, setShowOverview, onFetchRange, fetchingPapers, fetchMessage, facets }) {
     const categories = [
         { id: '', name: 'All Categories' },
         { id: 'cs.AI', name: 'Artificial Intelligence' },
@@ -10,6 +10,9 @@ export default function SidebarFilter({ search, setSearch, category, setCategory
         { id: 'q-bio.QM', name: 'Quantitative Methods' }
     ]
 
+    // Papers per category for the selected dates, from /api/papers/facets
+    const categoryCounts = Object.fromEntries((facets?.categories || []).map(c => [c.name, c.count]))
+
     const setShortcut = (days) => {
         if (days === '') {
             setStartDate('')
@@ -67,6 +70,11 @@ export default function SidebarFilter({ search, setSearch, category, setCategory
                         onClick={() => setCategory(cat.id)}
                     >
                         {cat.name}
+                        {cat.id && facets && (
+                            <span style={{ marginLeft: 'auto', fontSize: '0.75rem', color: 'var(--text-tertiary)' }}>
+                                {categoryCounts[cat.id] || 0}
+                            </span>
+                        )}
                     </button>
                 ))}
             </div>
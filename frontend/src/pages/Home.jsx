@@ -3,6 +3,7 @@ import axios from 'axios'
 import SidebarFilter from '../components/SidebarFilter'
 import NewsletterList from '../components/NewsletterList'
 import ResearchOverview from '../components/ResearchOverview'
+import { readJobStream } from '../utils/jobStream'
 
 export default function Home() {
     const [papers, setPapers] = useState([])
@@ -21,6 +22,7 @@ export default function Home() {
     const [showOverview, setShowOverview] = useState(false)
     const [fetchingPapers, setFetchingPapers] = useState(false)
     const [fetchMessage, setFetchMessage] = useState('')
+    const [facets, setFacets] = useState(null)
 
     const PAGE_SIZE = 20
 
@@ -51,6 +53,18 @@ export default function Home() {
         }
     }
 
+    const fetchFacets = async () => {
+        try {
+            const params = { category }
+            if (startDate) params.start_date = startDate
+            if (endDate) params.end_date = endDate
+            const res = await axios.get('/api/papers/facets', { params })
+            setFacets(res.data)
+        } catch (err) {
+            console.error(err)
+        }
+    }
+
     const handleLoadMore = () => {
         fetchPapers(true)
     }
@@ -58,6 +72,7 @@ export default function Home() {
     useEffect(() => {
         const delayDebounceFn = setTimeout(() => {
             fetchPapers()
+            fetchFacets()
         }, 500)
         return () => clearTimeout(delayDebounceFn)
     }, [search, category, startDate, endDate])
@@ -89,41 +104,22 @@ export default function Home() {
                 throw new Error(errDetail)
             }
 
-            const reader = response.body.getReader()
-            const decoder = new TextDecoder()
-            let buffer = ''
-
-            while (true) {
-                const { done, value } = await reader.read()
-                if (done) break
-
-                buffer += decoder.decode(value, { stream: true })
-                const parts = buffer.split('\n\n')
-                buffer = parts.pop() || ''
-
-                for (const part of parts) {
-                    const line = part.trim()
-                    if (line.startsWith('data:')) {
-                        const dataStr = line.substring(5).trim()
-                        if (!dataStr) continue
-
-                        const data = JSON.parse(dataStr)
-                        if (data.status === 'processing') {
-                            setFetchMessage(data.message || 'Fetching papers...')
-                        } else if (data.status === 'complete') {
-                            setFetchMessage(`Done! ${data.new_papers} new papers fetched.`)
-                            // Refresh paper list
-                            setTimeout(() => {
-                                fetchPapers()
-                                setFetchingPapers(false)
-                                setFetchMessage('')
-                            }, 2000)
-                        } else if (data.status === 'error') {
-                            throw new Error(data.detail || 'Server encountered an error.')
-                        }
-                    }
+            await readJobStream(response, (data) => {
+                if (data.status === 'processing') {
+                    setFetchMessage(data.message || 'Fetching papers...')
+                } else if (data.status === 'complete') {
+                    setFetchMessage(`Done! ${data.result.new_papers} new papers fetched.`)
+                    // Refresh paper list
+                    setTimeout(() => {
+                        fetchPapers()
+                        fetchFacets()
+                        setFetchingPapers(false)
+                        setFetchMessage('')
+                    }, 2000)
+                } else if (data.status === 'error') {
+                    throw new Error(data.detail || 'Server encountered an error.')
                 }
-            }
+            })
         } catch (err) {
             console.error(err)
             setFetchMessage(`Error: ${err.message}`)
@@ -150,6 +146,7 @@ export default function Home() {
                 onFetchRange={handleFetchRange}
                 fetchingPapers={fetchingPapers}
                 fetchMessage={fetchMessage}
+                facets={facets}
             />
             {showOverview ? (
                 <ResearchOverview startDate={startDate} endDate={endDate} search={search} category={category} />
@@ -0,0 +1,64 @@
+// Reads the server-sent events of a background job (overview, podcast,
+// fetch-range). If the connection drops before the job finishes, it
+// re-subscribes to /api/jobs/{id}/events with the last event id it saw, so
+// the job keeps running server-side and no progress is lost.
+
+async function readEvents(response, handle) {
+    const reader = response.body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ''
+
+    while (true) {
+        const { done, value } = await reader.read()
+        if (done) return false
+
+        buffer += decoder.decode(value, { stream: true })
+        const parts = buffer.split('\n\n')
+        buffer = parts.pop() || ''
+
+        for (const part of parts) {
+            let id = null
+            let data = ''
+            for (const line of part.split('\n')) {
+                if (line.startsWith('id:')) id = line.substring(3).trim()
+                else if (line.startsWith('data:')) data += line.substring(5).trim()
+            }
+            if (!data) continue
+            if (handle(id, JSON.parse(data))) return true
+        }
+    }
+}
+
+export async function readJobStream(response, onEvent, maxRetries = 5) {
+    let jobId = response.headers.get('X-Job-Id')
+    let lastEventId = null
+
+    const handle = (id, data) => {
+        if (id !== null) lastEventId = id
+        jobId = data.job_id || jobId
+        onEvent(data)
+        return data.status === 'complete' || data.status === 'error'
+    }
+
+    for (let attempt = 0; ; attempt++) {
+        try {
+            if (response && await readEvents(response, handle)) return
+        } catch (err) {
+            // TypeError is a network failure; anything else comes from onEvent
+            if (!(err instanceof TypeError)) throw err
+        }
+        if (!jobId || attempt >= maxRetries) {
+            throw new Error('Lost connection to the server before the job finished.')
+        }
+
+        await new Promise(resolve => setTimeout(resolve, 1000 * (attempt + 1)))
+        const headers = lastEventId !== null ? { 'Last-Event-ID': lastEventId } : {}
+        try {
+            response = await fetch(`/api/jobs/${jobId}/events`, { headers })
+            if (!response.ok) throw new Error('The job is no longer available.')
+        } catch (err) {
+            if (!(err instanceof TypeError)) throw err
+            response = null
+        }
+    }
+}